@@ -0,0 +1,35 @@
+"""
+Helpers shared by the benchmarks.
+"""
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of values.
+
+    :param values: List of numbers
+    :param fraction: Percentile as a fraction, e.g. 0.99
+    :return: Number, or ``None`` for an empty list
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(name, latencies, failures, elapsed, **extra):
+    """
+    Summarizes a benchmark run with throughput and latency percentiles in milliseconds.
+
+    :param name: Name of the scenario or mode
+    :param latencies: List of successful request latencies, in seconds
+    :param failures: Amount of failed requests
+    :param elapsed: Wall time of the run, in seconds
+    :return: Dictionary
+    """
+    result = {"name": name, **extra, "requests": len(latencies), "failures": failures,
+              "throughput": round(len(latencies) / elapsed, 2) if elapsed else None}
+    for key, fraction in (("p50_ms", 0.50), ("p99_ms", 0.99)):
+        value = percentile(latencies, fraction)
+        result[key] = round(value * 1000, 3) if value is not None else None
+    return result
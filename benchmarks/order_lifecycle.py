@@ -0,0 +1,230 @@
+"""
+Benchmarks the order lifecycle against the real application.\n
+Seeds a temporary SQLite database, drives ``create_app()`` through the Flask test client from concurrent threads,
+and reports throughput and p50/p99 latency per scenario as JSON, to compare against a baseline.
+
+Run from anywhere, with the application dependencies installed::
+
+    python benchmarks/order_lifecycle.py --users 500 --products 300 --concurrency 8 --output results.json
+"""
+from common import summarize
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from json import dump, dumps, load
+from os import chdir, path
+from platform import python_version
+from random import Random
+from secrets import token_hex
+from sys import path as sys_path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from uuid import UUID
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+PASSWORD = "benchmark"
+
+
+def prepare_environment(directory, arguments):
+    """
+    Writes a configuration for a temporary database and makes the application importable.\n
+    Modules read ``./config.json`` on import, so this has to run before importing the application.
+
+    :param directory: Temporary directory
+    :param arguments: Parsed arguments
+    :return: Nothing
+    """
+    with open(path.join(ROOT, "config-sample.json"), "r", encoding="UTF-8") as handle:
+        config = load(handle)
+
+    config["application"]["debug"] = False
+    config["database"]["filename"] = "benchmark.db"
+    config["database"]["absolute_path"] = path.join(directory, "benchmark.db")
+    config["security"]["key_file"] = path.join(directory, "keys.json")
+    # Only the limits are lifted, the storage and the other settings stay as configured
+    config["ratelimiting"].update({"default": "1000000 per second", "authorization": "1000000 per second",
+                                   "routes": {}})
+    config["metrics"]["database"] = path.join(directory, "metrics.db")
+    config["passwords"]["rounds"] = arguments.rounds
+    config["passwords"]["queue_size"] = max(config["passwords"]["queue_size"], arguments.concurrency)
+    config["events"]["check_interval"] = 3600
+
+    with open(path.join(directory, "config.json"), "w", encoding="UTF-8") as handle:
+        dump(config, handle, indent=2)
+
+    chdir(directory)
+    sys_path.insert(0, ROOT)
+
+
+def seed(arguments):
+    """
+    Seeds the database with users, products, an active event and orders, deterministically.
+
+    :param arguments: Parsed arguments
+    :return: Dictionary with the seeded users, products and event
+    """
+    from models.data import Data
+    from models.event import Event
+    from models.order import Order
+    from models.product import Product
+    from models.user import User
+    from services.database import engine
+    from services.migrations import migrate_db
+    from services.passwords import PasswordPool
+
+    random = Random(arguments.seed)
+
+    def uuid():
+        return str(UUID(int=random.getrandbits(128), version=4))
+
+    migrate_db()
+    hashed = PasswordPool.hash(PASSWORD)
+    users = [{"uuid": uuid(), "username": f"user{index}", "name": f"Bench User{index}",
+              "email": f"user{index}@example.com", "phone_number": f"06{index:08d}", "address": f"Street {index}",
+              "postal_code": f"{index:04d}AB", "password": hashed, "secret": token_hex(16), "admin": False,
+              "flags": [], "tags": [], "created_at": datetime.utcnow()} for index in range(arguments.users)]
+    products = [{"uuid": uuid(), "name": f"Product {index}", "brand": f"Brand {index % 25}",
+                 "price": round(random.uniform(0.5, 3.0), 2), "category": f"Category {index % 10}",
+                 "description": "Benchmark product", "image": "null", "image_path": "/static/images/null.jpg",
+                 "original_link": "", "allergens": [], "ingredients": [], "extra": []}
+                for index in range(arguments.products)]
+    event = {"uuid": uuid()}
+
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), users)
+        connection.execute(Product.__table__.insert(), products)
+        connection.execute(Event.__table__.insert(), event)
+        connection.execute(Data.__table__.insert(), {})
+
+        ordered = users[:min(arguments.orders, len(users))]
+        orders = []
+        for user in ordered:
+            items = random.sample(products, 3)
+            orders.append({"uuid": uuid(), "user": user["uuid"], "event": event["uuid"],
+                           "products": [item["uuid"] for item in items],
+                           "total_price": round(sum(item["price"] for item in items), 2),
+                           "created_at": datetime.utcnow(), "last_changed_at": datetime.utcnow()})
+        if orders:
+            connection.execute(Order.__table__.insert(), orders)
+
+    return {"users": users, "ordered": ordered, "unordered": users[len(ordered):],
+            "products": [product["uuid"] for product in products], "random": random}
+
+
+def run_scenario(app, name, calls, concurrency, expected):
+    """
+    Runs a list of requests from concurrent threads, every thread with its own test client.
+
+    :param app: Flask application
+    :param name: Scenario name
+    :param calls: List of functions taking a test client and returning a response
+    :param concurrency: Amount of threads
+    :param expected: Expected status code
+    :return: Dictionary, summary
+    """
+    chunks = [calls[index::concurrency] for index in range(concurrency)]
+
+    def work(chunk):
+        client = app.test_client()
+        latencies, failures = [], 0
+        for call in chunk:
+            started = perf_counter()
+            response = call(client)
+            if response.status_code == expected:
+                latencies.append(perf_counter() - started)
+            else:
+                failures += 1
+        return latencies, failures
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(work, chunks))
+    elapsed = perf_counter() - started
+
+    latencies = [latency for result, _ in results for latency in result]
+    return summarize(name, latencies, sum(failures for _, failures in results), elapsed, concurrency=concurrency)
+
+
+def shutdown():
+    """
+    Writes what the application buffered and closes its databases, before the temporary directory is removed.\n
+    Exit handlers would otherwise write to a directory that no longer exists.
+
+    :return: Nothing
+    """
+    from atexit import unregister
+
+    from services.database import engine
+    from services.metrics import registry
+    from services.tracking import activity_tracker
+
+    activity_tracker.flush()
+    if registry.store is not None:
+        registry.store.flush(registry)
+        unregister(registry.store.try_flush)
+    engine.dispose()
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--orders", type=int, default=100, help="Users that already ordered for the event")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt rounds of the seeded passwords")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="File to write the JSON results to")
+    arguments = parser.parse_args()
+    # Resolved before switching to the temporary directory
+    arguments.output = path.abspath(arguments.output) if arguments.output else None
+
+    with TemporaryDirectory(prefix="orderserver-benchmark-") as directory:
+        prepare_environment(directory, arguments)
+        data = seed(arguments)
+
+        from flask_jwt_extended import create_access_token
+        from flaskr import create_app
+
+        app = create_app()
+        app.testing = True
+        with app.app_context():
+            tokens = {user["uuid"]: {"Authorization": "Bearer " + create_access_token(
+                identity=user["uuid"], additional_claims={"username": user["username"], "admin": False})}
+                for user in data["users"]}
+
+        random, products, count = data["random"], data["products"], arguments.requests
+        users, ordered, unordered = data["users"], data["ordered"] or data["users"], data["unordered"]
+
+        def order_body():
+            return {"products": random.sample(products, 3), "notes": "benchmark"}
+
+        scenarios = [
+            ("login", 200, [lambda client, user=users[index % len(users)]: client.post(
+                "/auth/login", json={"username": user["username"], "password": PASSWORD})
+                for index in range(count)]),
+            ("product_all", 200, [lambda client, user=users[index % len(users)]: client.get(
+                "/product/all", headers=tokens[user["uuid"]]) for index in range(count)]),
+            ("order_current", 200, [lambda client, user=ordered[index % len(ordered)]: client.get(
+                "/order/current", headers=tokens[user["uuid"]]) for index in range(count)]),
+            ("order_add", 201, [lambda client, user=user, body=order_body(): client.post(
+                "/order/add", json=body, headers=tokens[user["uuid"]]) for user in unordered[:count]]),
+            ("order_edit", 200, [lambda client, user=ordered[index % len(ordered)], body=order_body(): client.put(
+                "/order/edit", json=body, headers=tokens[user["uuid"]]) for index in range(count)]),
+        ]
+
+        results = [run_scenario(app, name, calls, arguments.concurrency, expected)
+                   for name, expected, calls in scenarios if calls]
+        shutdown()
+
+    report = {"timestamp": datetime.utcnow().isoformat(), "python": python_version(),
+              "parameters": vars(arguments), "results": results}
+    if arguments.output:
+        with open(arguments.output, "w", encoding="UTF-8") as handle:
+            dump(report, handle, indent=2)
+    print(dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the WSGI and ASGI serving modes under concurrent polling clients.\n
+Starts each mode as a separate server process, logs in once and polls the read endpoints
+with a fixed number of concurrent clients, reporting throughput and latency percentiles as JSON.
+
+Run from the repository root, with a configured ``config.json`` and the ``asgi`` extras installed::
+
+    python benchmarks/serving_modes.py --clients 500 --duration 20
+"""
+from httpx import AsyncClient, HTTPError, Limits
+
+from common import summarize
+
+from argparse import ArgumentParser
+from asyncio import gather, run, sleep
+from json import dumps
+from subprocess import Popen
+from sys import executable
+from time import perf_counter
+
+MODES = {
+    "wsgi": [executable, "-m", "flask", "--app", "flaskr:create_app", "run", "--with-threads", "--port", "{port}"],
+    "asgi": [executable, "-m", "uvicorn", "--factory", "flaskr.asgi:create_asgi_app", "--port", "{port}",
+             "--log-level", "warning"],
+}
+ENDPOINTS = ("/product/all", "/event/current", "/order/all", "/product/last_changed")
+
+
+async def wait_until_ready(client, timeout=30):
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        try:
+            await client.get("/")
+            return
+        except HTTPError:
+            await sleep(0.2)
+    raise TimeoutError("Server did not start in time")
+
+
+async def poll(client, headers, duration, latencies, failures):
+    deadline = perf_counter() + duration
+    index = 0
+    while perf_counter() < deadline:
+        started = perf_counter()
+        try:
+            response = await client.get(ENDPOINTS[index % len(ENDPOINTS)], headers=headers)
+            if response.status_code >= 500:
+                failures.append(response.status_code)
+            else:
+                latencies.append(perf_counter() - started)
+        except HTTPError as e:
+            failures.append(type(e).__name__)
+        index += 1
+
+
+async def measure(mode, port, clients, duration, username, password):
+    process = Popen([part.format(port=port) for part in MODES[mode]])
+    try:
+        async with AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30,
+                               limits=Limits(max_connections=clients)) as client:
+            await wait_until_ready(client)
+            login = await client.post("/auth/login", json={"username": username, "password": password})
+            headers = {"Authorization": f"Bearer {login.json()['login']['token']}"}
+
+            latencies, failures = [], []
+            started = perf_counter()
+            await gather(*(poll(client, headers, duration, latencies, failures) for _ in range(clients)))
+            elapsed = perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+    return summarize(mode, latencies, len(failures), elapsed, clients=clients)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    arguments = parser.parse_args()
+
+    results = [run(measure(mode, arguments.port, arguments.clients, arguments.duration,
+                           arguments.username, arguments.password)) for mode in arguments.modes]
+    print(dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
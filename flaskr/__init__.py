@@ -1,16 +1,14 @@
 from flask import Flask
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_jwt_extended import JWTManager
-from sqlalchemy.exc import OperationalError
 
-from flaskr import admin, auth, generics, order, product, user, event
-from models.data import Data
-from models.user import User
-from models.event import Event
+from flaskr import admin, auth, generics, order, product, stream, sync, user, event
 from services.config import Config
-from services.database import init_db
-from services.utilities import Utilities
+from services.events import event_scheduler
+from services.keys import load_signing_keys
+from services.metrics import init_metrics
+from services.ratelimiting import init_limiter
+from services.serialization import OrderJSONProvider
+from services.startup import Startup
 
 from os import path, system as os_system
 
@@ -19,60 +17,51 @@ config = Config().get_config()
 
 
 def create_app():
+    startup = Startup()
     app = Flask(config.application.name)
+    app.json = OrderJSONProvider(app)
 
     # Set host configuration
     os_system(f"set FLASK_RUN_HOST={config.server.host}")
     os_system(f"set FLASK_RUN_PORT={config.server.port}")
 
-    # Setup configuration
+    # Setup configuration, signing keys are shared by every worker process
+    with startup.phase("keys"):
+        secret_key, jwt_secret_key = load_signing_keys()
     app.config.from_mapping(
         DEBUG=config.application.debug,
-        SECRET_KEY=Utilities.generate_secret(),
+        SECRET_KEY=secret_key,
         DATABASE=path.join(app.instance_path, config.database.filename),
         SQLALCHEMY_DATABASE_URI=f"sqlite:///{config.database.absolute_path}",
-        JWT_SECRET_KEY=Utilities.generate_secret(),
+        JWT_SECRET_KEY=jwt_secret_key,
     )
 
-    # Configure blueprints/views and ratelimiting
-    # TODO: Make every limit configurable
-    limiter = Limiter(app, key_func=get_remote_address, default_limits=[config.ratelimiting.default])
-    limiter.limit(config.ratelimiting.default)(admin.admin)
-    limiter.limit(config.ratelimiting.authorization)(auth.auth)
-    limiter.limit(config.ratelimiting.default)(generics.generics)
-    limiter.limit(config.ratelimiting.default)(order.order)
-    limiter.limit(config.ratelimiting.default)(product.product)
-    limiter.limit(config.ratelimiting.default)(user.user)
-    limiter.limit(config.ratelimiting.default)(event.event)
+    # Configure blueprints/views and ratelimiting, limits are read from the configuration
+    with startup.phase("blueprints"):
+        blueprints = (admin.admin, auth.auth, generics.generics, order.order, product.product, stream.stream,
+                      sync.sync, user.user, event.event)
+        for blueprint in blueprints:
+            app.register_blueprint(blueprint)
+        limiter = init_limiter(app, blueprints)
 
-    app.register_blueprint(admin.admin)
-    app.register_blueprint(auth.auth)
-    app.register_blueprint(generics.generics)
-    app.register_blueprint(order.order)
-    app.register_blueprint(product.product)
-    app.register_blueprint(user.user)
-    app.register_blueprint(event.event)
+    # Instrument requests and the database, exported on /metrics
+    init_metrics(app, limiter)
 
     # Register JWT
     jwt = JWTManager(app).init_app(app)
 
-    # Check database status
-    # TODO: Improve this function to be more flexible.
-    @app.before_first_request
-    def first_time_run():
-        app.logger.info("Checking for database initialization.")
-        try:
-            result = (User.query.all(), Event.query.all(), Data.query.all())
-        except OperationalError:
-            init_db()
-            app.logger.info("Performing new database initialization.")
-            return
-        if None in result or [] in result:
-            init_db()
-            app.logger.info("Repopulating database tables.")
-            return
-        app.logger.info("Finished checking, no new initialization required.")
+    # Prepare the database once, before serving or forking workers
+    startup.initialize_database()
 
+    # Enforce event deadlines independent of incoming requests
+    with startup.phase("scheduler"):
+        event_scheduler.ensure_started()
+
+    report = startup.report()
+    app.extensions["startup"] = report
+    app.logger.info(f"Started in {report['total']}ms, schema version {report['schema_version']}, "
+                    f"{report['migrations']} migrations applied, seeded {report['seeded'] or 'nothing'}, "
+                    f"phases in ms: {report['phases']}")
     return app
 
 
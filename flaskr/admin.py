@@ -1,14 +1,17 @@
-from flask import Blueprint, request
-from flask_jwt_extended import get_jwt_identity
-
-from models.user import User
-from models.product import Product
-from models.data import Data
-from services.database import db_session
+import click
+from flask import Blueprint, current_app, request
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from services.config import Config
+from services.generator import DataGenerator
+from services.importer import ProductImporter
+from services.passwords import password_pool
+from services.principal import current_principal
 from services.utilities import Utilities, admin_required
 
-from uuid import uuid4
-from datetime import datetime
+from json import dumps
+
+config = Config().get_config()
 
 # Configure blueprint
 admin = Blueprint('admin', __name__, url_prefix='/admin')
@@ -19,53 +22,106 @@ admin = Blueprint('admin', __name__, url_prefix='/admin')
 def get_admin_product_populate():
     """
     Populate all products in the database.\n
-    This is retrieved from the ``products.json``.
+    This is retrieved from the ``products.json``, see ``ProductImporter``.
+    Products missing from an incomplete looking catalog are only removed with ``?force=true``.
 
     :return: JSON status response.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     # Perform tracking
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    # Track time taken
-    start_time = datetime.now()
-
-    # Load in file
-    from json import load
-    result = load(open("./static/products.json"))["products"]
-
-    # Remove old entries
-    db_session.query(Product).delete()
-
-    count = 0
-    for product in result:
-        count += 1
-        # TODO: Improve this to automatic decoding/mapping
-        new_product = Product(id=product["id"], uuid=str(uuid4()), name=product["name"], brand=product["brand"],
-                              price=product["price"], category=product["category"], description=product["description"],
-                              image=product["image"], image_path=product["image_path"], original_link=product["original_link"],
-
-                              nutri_score=product["nutri_score"].upper(), quantity=product["quantity"],
-                              allergens=product["allergens"], ingredients=product["ingredients"],
-
-                              energy=product["energy"], fat=product["fat"], saturated_fat=product["saturated_fat"],
-                              unsaturated_fat=product["unsaturated_fat"], carbohydrates=product["carbohydrates"],
-                              sugars=product["sugars"], fiber=product["fiber"], proteins=product["proteins"],
-                              salt=product["salt"], extra=product["extra"])
-        db_session.add(new_product)
-    db_session.commit()
-
-    # Rehash and re-stamp
-    Data.query.first().generate_changes("products")
-
-    time = Utilities.calculate_time(start_time)
-    return Utilities.return_complex_response(200, f"Successfully repopulated {count} products in {time}ms",
-                                             {"count": count,
-                                              "time": f"{time}ms"
-                                              })
+    try:
+        report = import_products(config.importer.path, request.args.get("force", "false").lower() == "true")
+    except (OSError, ValueError) as e:
+        return Utilities.return_complex_response(500, "Failed to import products, see details.",
+                                                 {"error": e.__str__()})
+    except IntegrityError as e:
+        return Utilities.return_complex_response(409, "Products conflict with existing data, nothing was imported.",
+                                                 {"error": e.orig.__str__()})
+    except SQLAlchemyError as e:
+        return Utilities.return_complex_response(503, "Database unavailable, nothing was imported.",
+                                                 {"error": e.__class__.__name__})
+
+    return Utilities.return_complex_response(200, f"Successfully repopulated {report['read']} products "
+                                                  f"in {report['time']}", report)
+
+
+@admin.cli.command("populate")
+@click.argument("path", default=None, required=False)
+@click.option("--force", is_flag=True, help="Remove missing products, even if the catalog looks incomplete.")
+def cli_admin_product_populate(path, force):
+    """
+    Populate all products in the database from a catalog file.\n
+    Defaults to the configured ``importer.path``.
+    """
+    report = import_products(path or config.importer.path, force)
+    click.echo(dumps(report, indent=2))
+
+
+@admin.cli.command("generate")
+@click.option("--users", default=1000, help="Amount of users to generate.")
+@click.option("--products", default=500, help="Amount of products to generate.")
+@click.option("--events", default=4, help="Amount of weekly events to generate, the last one is active.")
+@click.option("--participation", default=0.6, help="Fraction of users ordering per event.")
+@click.option("--password", default="password", help="Password of every generated user.")
+@click.option("--seed", default=0, help="Seed, the same seed generates the same data.")
+@click.option("--batch-size", default=10000, help="Rows per insert batch.")
+def cli_admin_generate(users, products, events, participation, password, seed, batch_size):
+    """
+    Fill the database with synthetic users, products, events and orders, see ``DataGenerator``.
+    """
+    report = DataGenerator(seed, batch_size).run(users=users, products=products, events=events,
+                                                 participation=participation, password=password)
+    click.echo(dumps(report, indent=2))
+
+
+def import_products(path, force=False):
+    """
+    Imports the product catalog, products are marked as changed by the import if anything changed.
+
+    :param path: Path to the catalog file
+    :param force: Remove products missing from the catalog, even if it looks incomplete
+    :return: Dictionary, import report
+    """
+    return ProductImporter().run(path, force)
+
+
+@admin.route("/passwords", methods=['GET'])
+@admin_required()
+def get_admin_passwords():
+    """
+    Shows the saturation and latency of password verification.
+
+    :return: JSON status response with statistics.
+    """
+    current_user = current_principal()
+
+    if current_user is None:
+        return Utilities.return_response(401, "Unauthorized")
+    current_user.perform_tracking(address=request.remote_addr)
+
+    return Utilities.return_result(200, "Successfully fetched password pool statistics", password_pool.stats())
+
+
+@admin.route("/startup", methods=['GET'])
+@admin_required()
+def get_admin_startup():
+    """
+    Shows how long the phases of startup took, and what database preparation was performed.
+
+    :return: JSON status response with the startup report.
+    """
+    current_user = current_principal()
+
+    if current_user is None:
+        return Utilities.return_response(401, "Unauthorized")
+    current_user.perform_tracking(address=request.remote_addr)
+
+    return Utilities.return_result(200, "Successfully fetched startup report", current_app.extensions["startup"])
 
 
 # @admin.route("/user/<uuid>", methods=['GET'])
@@ -0,0 +1,372 @@
+from a2wsgi import WSGIMiddleware
+from jwt import ExpiredSignatureError, InvalidTokenError, decode
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from flaskr import create_app
+from flaskr.stream import current_versions, format_changes, format_event
+from services.broker import broker
+from services.async_database import async_session
+from services.cache import data_snapshot, product_cache
+from services.conditional import compute_validators, is_not_modified
+from services.config import Config
+from services.database import db_session
+from services.events import active_event
+from services.principal import principal_cache
+from services.reads import Reads
+from services.serialization import Serializer
+from services.tickets import StreamTickets
+
+from asyncio import TimeoutError as AsyncTimeoutError
+from functools import wraps
+from time import time
+
+config = Config().get_config()
+
+# Query parameters only the synchronous handlers support, these requests are delegated
+DELEGATED_PARAMETERS = ("limit", "cursor", "format")
+
+
+def return_json(result, status=200):
+    return Response(Serializer.encode(result), status_code=status, media_type="application/json")
+
+
+def return_response(status=200, message="This is a message"):
+    return return_json({"status": status, "message": message}, status)
+
+
+def respond(response):
+    """
+    Converts a response of ``Reads``, a tuple of result and status, to a Starlette response.
+
+    :param response: Tuple, (dictionary, status)
+    :return: Response
+    """
+    result, status = response
+    return return_json(result, status)
+
+
+def authenticate(request):
+    """
+    Verifies the access token of a request, like ``jwt_required()`` does for the Flask application.\n
+    Returns the claims and ``None``, or ``None`` and an error response.
+
+    :param request: Starlette request
+    :return: Tuple, (claims, error response)
+    """
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None, return_json({"msg": "Missing Authorization Header"}, 401)
+
+    try:
+        claims = decode(header[7:], request.app.state.jwt_key, algorithms=[request.app.state.jwt_algorithm])
+    except ExpiredSignatureError:
+        return None, return_json({"msg": "Token has expired"}, 401)
+    except InvalidTokenError as e:
+        return None, return_json({"msg": e.__str__()}, 422)
+
+    if claims.get("type") != "access":
+        return None, return_json({"msg": "Only non-refresh tokens are allowed"}, 422)
+    return claims, None
+
+
+async def run_sync(fn, *args):
+    """
+    Runs a synchronous service call in the thread pool, e.g. a cache that has to load from the database.
+
+    :param fn: Callable
+    :param args: Arguments
+    :return: Result of the call
+    """
+    def call():
+        try:
+            return fn(*args)
+        finally:
+            db_session.remove()
+    return await run_in_threadpool(call)
+
+
+async def resolve_principal(identity):
+    """
+    Resolves a principal through the shared principal cache, only leaving the event loop on a miss.
+
+    :param identity: JWT identity
+    :return: Principal, or ``None`` if the user doesn't exist
+    """
+    principal = principal_cache.lookup(identity)
+    if principal is None:
+        principal = await run_sync(principal_cache.get, identity)
+    return principal
+
+
+async def tracking_values():
+    """
+    Retrieves the tracking values from the shared ``DataSnapshot``, only leaving the event loop when it is stale.
+
+    :return: Dictionary
+    """
+    values = data_snapshot.fresh()
+    if values is None:
+        values = await run_sync(data_snapshot.get)
+    return values
+
+
+async def fetch_first(statement):
+    async with async_session() as session:
+        return (await session.execute(statement)).first()
+
+
+async def fetch_all(statement):
+    async with async_session() as session:
+        return (await session.execute(statement)).all()
+
+
+def async_view(*models, current_event=False):
+    """
+    Wraps an asynchronous handler with authentication, conditional GET support and activity tracking.\n
+    Behaves like ``jwt_required()`` with ``conditional()``, validators come from the shared ``DataSnapshot``,
+    so a ``304`` doesn't touch the database. Handlers receive the request, the principal and the tracking values.
+
+    :param models: Tracked tables the handler depends on, see ``conditional()``
+    :param current_event: The handler depends on the active event, see ``conditional()``
+    :return: Decorator
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        async def decorator(request):
+            claims, error = authenticate(request)
+            if error is not None:
+                return error
+            identity = claims.get("sub")
+
+            current_user = await resolve_principal(identity)
+            if current_user is None:
+                return return_response(401, "Unauthorized")
+
+            values = await tracking_values()
+            event = None
+            if current_event:
+                if active_event.cached(values.get("events_version")):
+                    event = active_event.validators()
+                else:
+                    event = await run_sync(active_event.validators)
+            etag, last_modified = compute_validators(values, models, f"{request.url.path}?{request.url.query}",
+                                                     identity, event)
+
+            if is_not_modified(etag, last_modified, parse_etags(request.headers.get("If-None-Match")),
+                               parse_date(request.headers.get("If-Modified-Since"))):
+                response = Response(status_code=304)
+            else:
+                current_user.perform_tracking(source=fn.__name__,
+                                              address=request.client.host if request.client else "UNKNOWN")
+
+                response = await fn(request, current_user, values)
+                if response.status_code != 200:
+                    return response
+
+            response.headers["ETag"] = f'"{etag}"'
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified)
+            return response
+        return decorator
+    return wrapper
+
+
+@async_view("products")
+async def get_product_all(request, current_user, values):
+    return respond(Reads.products(await run_sync(product_cache.all)))
+
+
+@async_view("products")
+async def get_product_by_uuid(request, current_user, values):
+    uuid = request.path_params["uuid"]
+    return respond(Reads.product(uuid, await run_sync(product_cache.get, uuid)))
+
+
+@async_view("events", current_event=True)
+async def get_event_current(request, current_user, values):
+    return respond(Reads.current_event(await run_sync(active_event.get)))
+
+
+@async_view("events")
+async def get_event_by_uuid(request, current_user, values):
+    uuid = request.path_params["uuid"]
+    return respond(Reads.event(uuid, await fetch_first(Reads.event_statement(uuid))))
+
+
+@async_view("events")
+async def get_event_all(request, current_user, values):
+    return respond(Reads.events(await fetch_all(Reads.events_statement())))
+
+
+@async_view("orders", "events", current_event=True)
+async def get_order_current(request, current_user, values):
+    current_event = await run_sync(active_event.get)
+
+    if current_event is None:
+        return respond(Reads.current_order(None, None))
+
+    row = await fetch_first(Reads.current_order_statement(current_user.uuid, current_event.uuid))
+    return respond(Reads.current_order(current_event, row))
+
+
+@async_view("orders")
+async def get_order_by_uuid(request, current_user, values):
+    uuid = request.path_params["uuid"]
+    return respond(Reads.order(uuid, await fetch_first(Reads.order_statement(current_user.uuid, uuid))))
+
+
+@async_view("orders")
+async def get_order_all_for_user(request, current_user, values):
+    return respond(Reads.orders(await fetch_all(Reads.orders_statement(current_user.uuid))))
+
+
+def last_changed(model):
+    """
+    Creates an asynchronous ``/last_changed`` handler for a tracked table.
+
+    :param model: Tracked table
+    :return: Handler
+    """
+    @async_view(model)
+    async def get_last_changed(request, current_user, values):
+        return respond(Reads.last_changed(model, values))
+    return get_last_changed
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    Streaming response calling ``on_close`` once it ends, also when the client left before it started.
+    """
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+
+async def get_events_stream(request):
+    """
+    Streams change notifications like the ``/events/stream`` view of the Flask application, without a thread.\n
+    Streams wait on the broker in the event loop, so their amount is only bounded by ``stream.max_subscribers``,
+    not by the threads serving the Flask application.
+
+    :param request: Starlette request
+    :return: Event stream response
+    """
+    ticket = request.query_params.get("ticket")
+    if ticket is None:
+        claims, error = authenticate(request)
+        if error is not None:
+            return error
+        identity, expires = claims.get("sub"), claims.get("exp")
+    else:
+        authenticated = await run_sync(StreamTickets.redeem, request.app.state.secret_key, ticket)
+        if authenticated is None:
+            return return_response(401, "Invalid, expired or used stream ticket.")
+        identity, expires = authenticated
+
+    if expires is not None and expires <= time():
+        return return_response(401, "Token has expired")
+
+    current_user = await resolve_principal(identity)
+    if current_user is None:
+        return return_response(401, "Unauthorized")
+    current_user.perform_tracking(source="get_events_stream",
+                                  address=request.client.host if request.client else "UNKNOWN")
+
+    queue = broker.subscribe(asynchronous=True)
+    if queue is None:
+        response = return_response(503, "Too many open streams, try again later.")
+        response.headers["Retry-After"] = str(config.stream.keepalive)
+        return response
+
+    async def generate():
+        sent = current_versions(await tracking_values())
+        yield f"retry: {config.stream.retry}\n"
+        yield format_event("snapshot", list(sent.values()))
+
+        while True:
+            timeout = config.stream.keepalive
+            if expires is not None:
+                if expires <= time():
+                    yield format_event("expired", {"expired_at": expires})
+                    return
+                timeout = min(timeout, expires - time())
+
+            try:
+                messages = [await queue.get(max(timeout, 0))]
+            except AsyncTimeoutError:
+                # Also picks up changes of other processes, and messages dropped for being slow
+                messages = list(current_versions(await tracking_values()).values())
+
+            for event in format_changes(sent, messages):
+                yield event
+
+    return EventStreamResponse(generate(), lambda: broker.unsubscribe(queue), media_type="text/event-stream",
+                               headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+class DelegatingApplication:
+    """
+    Sends requests using parameters only the synchronous handlers support to the Flask application.
+    """
+
+    def __init__(self, asynchronous, synchronous):
+        self.asynchronous = asynchronous
+        self.synchronous = synchronous
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            query = scope.get("query_string", b"").decode("latin-1")
+            names = {parameter.split("=", 1)[0] for parameter in query.split("&") if parameter}
+            if names.intersection(DELEGATED_PARAMETERS):
+                return await self.synchronous(scope, receive, send)
+        await self.asynchronous(scope, receive, send)
+
+
+def create_asgi_app():
+    """
+    Creates the ASGI application.\n
+    Read-heavy product, event and order endpoints run asynchronously on ``aiosqlite``, sharing the caches and
+    responses of the Flask views, and change notifications are streamed from the event loop.
+    Every other endpoint is served by the Flask application through a WSGI adapter.
+
+    :return: ASGI application
+    """
+    flask_app = create_app()
+    synchronous = WSGIMiddleware(flask_app, workers=config.asgi.wsgi_workers)
+
+    app = Starlette(routes=[
+        Route("/product/all", get_product_all, methods=["GET"]),
+        Route("/product/last_changed", last_changed("products"), methods=["GET"]),
+        Route("/product/{uuid}", get_product_by_uuid, methods=["GET"]),
+        Route("/event/current", get_event_current, methods=["GET"]),
+        Route("/event/all", get_event_all, methods=["GET"]),
+        Route("/event/last_changed", last_changed("events"), methods=["GET"]),
+        Route("/event/{uuid}", get_event_by_uuid, methods=["GET"]),
+        Route("/order/current", get_order_current, methods=["GET"]),
+        Route("/order/all", get_order_all_for_user, methods=["GET"]),
+        Route("/order/last_changed", last_changed("orders"), methods=["GET"]),
+        Route("/order/{uuid}", get_order_by_uuid, methods=["GET"]),
+        Route("/events/stream", get_events_stream, methods=["GET"]),
+        Mount("/", app=synchronous),
+    ])
+
+    app.state.jwt_key = flask_app.config["JWT_SECRET_KEY"]
+    app.state.jwt_algorithm = flask_app.config.get("JWT_ALGORITHM", "HS256")
+    app.state.secret_key = flask_app.config["SECRET_KEY"]
+    return DelegatingApplication(app, synchronous)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(create_asgi_app(), host=config.server.host, port=config.server.port)
@@ -1,11 +1,14 @@
 from flask import Blueprint, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 
 from models.user import User
+from services.config import Config
 from services.database import db_session
+from services.passwords import PoolSaturated, password_pool
+from services.principal import current_principal
 from services.utilities import Utilities, admin_required
 
-from bcrypt import checkpw
+config = Config().get_config()
 
 # Configure blueprint
 auth = Blueprint('auth', __name__, url_prefix='/auth')
@@ -28,13 +31,23 @@ def post_auth_login():
         if not isinstance(password, str):
             raise ValueError(f"Expected str, instead got {type(password)}")
 
-    except AttributeError as e:
+    except (AttributeError, ValueError) as e:
         return Utilities.return_complex_response(400, "Bad request, see details.", {"error": e.__str__()})
 
     user = User.query.filter_by(username=username).first()
 
-    if not checkpw(password.encode("UTF-8"), user.password.encode("UTF-8")):
+    # Verified by the bounded password pool, this thread waits for the result.
+    # Logins beyond the pool's queue, or waiting longer than passwords.timeout, are answered with 503
+    try:
+        valid, rehashed = password_pool.verify(password, user.password if user is not None else None)
+    except PoolSaturated:
+        result, status = Utilities.return_response(503, "Too many logins at once, try again later.")
+        return result, status, {"Retry-After": str(config.passwords.retry_after)}
+
+    if not valid:
         return Utilities.return_response(401, "Unauthorized, wrong username/password")
+    if rehashed is not None:
+        user.password = rehashed
 
     lifetime = Utilities.generate_token_timedelta()
     user.token = create_access_token(identity=user.uuid, fresh=False, expires_delta=lifetime,
@@ -56,7 +69,7 @@ def get_auth_test():
 
     :return: JSON status response.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
@@ -74,7 +87,7 @@ def get_auth_admin_test():
 
     :return: JSON status response.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
@@ -1,8 +1,11 @@
 from flask import Blueprint
 
 from models.data import Data
+from services.conditional import conditional
 from services.config import Config
+from services.serialization import Serializer
 from services.utilities import Utilities
+from services.versioning import with_hash_keys
 
 config = Config().get_config()
 generics = Blueprint('generics', __name__, url_prefix='/')
@@ -31,6 +34,7 @@ def get_generics_version():
 
 
 @generics.route("/last_changed", methods=['GET'])
+@conditional("events", "products", "orders", "users")
 def get_generics_last_changed():
     """
     Retrieves last changed data and returns it.
@@ -38,4 +42,10 @@ def get_generics_last_changed():
     :return: JSON result response with (last changed) data.
     """
 
-    return Utilities.return_result(200, "Fetched result successfully", Data.query.first())
+    data = Data.query.first()
+
+    # The row is created on startup, without it nothing is tracked
+    if data is None:
+        return Utilities.return_response(503, "Change tracking is unavailable, try again later.")
+
+    return Utilities.return_result(200, "Fetched result successfully", with_hash_keys(Serializer.serialize(data)))
@@ -1,13 +1,20 @@
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
 
-from models.data import Data
-from models.event import Event
-from models.user import User
 from models.order import Order
-from models.product import Product
+from services.cache import data_snapshot
 from services.database import db_session
+from services.orders import OrderValidator
+from services.conditional import conditional
+from services.events import active_event
+from services.pagination import Pagination
+from services.principal import current_principal
+from services.reads import Reads
 from services.utilities import Utilities
+from services.views import order_view
+
+from datetime import datetime
 
 # Configure blueprint
 order = Blueprint('order', __name__, url_prefix='/order')
@@ -15,73 +22,66 @@ order = Blueprint('order', __name__, url_prefix='/order')
 
 @order.route("/current", methods=['GET'])
 @jwt_required()
+@conditional("orders", "events", current_event=True)
 def get_order_current():
     """
     Gets the current order for the current event for the user.
 
     :return: JSON result response with (current order) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    current_event = Event.query.filter_by(active=True).first()
+    current_event = active_event.get()
 
     if current_event is None:
-        return Utilities.return_response(500, "No current event exists.")
+        return Reads.current_order(None, None)
 
     # Check if an order exists.
-    current_order = Order.query.filter_by(user=current_user.uuid, event=current_event.uuid).first()
-
-    if current_order is None:
-        return Utilities.return_response(404, "No order for current event exists, use /order/add instead.")
+    current_order = db_session.execute(Reads.current_order_statement(current_user.uuid, current_event.uuid)).first()
 
-    return Utilities.return_result(200, "Successfully retrieved current order", {"uuid": current_order.uuid,
-                                                                                 "products": current_order.products,
-                                                                                 "notes": current_order.notes})
+    return Reads.current_order(current_event, current_order)
 
 
 @order.route("/<uuid>", methods=['GET'])
 @jwt_required()
+@conditional("orders")
 def get_order_by_uuid(uuid):
     """
     Gets an order by uuid for the user.
 
     :return: JSON result response with (order by uuid) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
     # Check if an order exists.
-    current_order = Order.query.filter_by(user=current_user.uuid, uuid=uuid).first()
-
-    if current_order is None:
-        return Utilities.return_response(404, f"No order found with UUID: {uuid}.")
-
-    return Utilities.return_result(200, "Successfully retrieved current order", current_order)
+    return Reads.order(uuid, db_session.execute(Reads.order_statement(current_user.uuid, uuid)).first())
 
 
 @order.route("/event/<uuid>", methods=['GET'])
 @jwt_required()
+@conditional("orders")
 def get_order_by_event(uuid):
     """
     Gets an order sorted by event for the user.
 
     :return: JSON result response with (order by event uuid) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
     # Check if an order exists.
-    current_order = Order.query.filter_by(user=current_user.uuid, event=uuid).first()
+    current_order = order_view.first(order_view.query().filter(Order.user == current_user.uuid, Order.event == uuid))
 
     if current_order is None:
         return Utilities.return_response(404, f"No order found with linked to event: {uuid}.")
@@ -91,6 +91,7 @@ def get_order_by_event(uuid):
 
 @order.route("/all", methods=['GET'])
 @jwt_required()
+@conditional("orders")
 def get_order_all_for_user():
     """
     Gets all orders sorted by uuid for the user.
@@ -98,19 +99,27 @@ def get_order_all_for_user():
     :return: JSON result response with a (list of events) data.
     """
     # TODO: Look at the check for emptiness
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    # Check if any orders exist
-    current_order_list = Order.query.filter_by(user=current_user.uuid).all()
+    try:
+        pagination = Pagination.from_request()
+    except ValueError as e:
+        return Pagination.return_bad_request(e)
 
-    if current_order_list is None or current_order_list == []:
-        return Utilities.return_response(404, "No orders found for any events.")
+    user_orders = order_view.query().filter(Order.user == current_user.uuid)
 
-    return Utilities.return_result(200, f"Successfully retrieved {len(current_order_list)} orders", current_order_list)
+    if pagination.stream:
+        return pagination.stream_query(user_orders, Order.id, order_view.map)
+    if pagination.enabled:
+        result, next_cursor = pagination.page_query(user_orders, Order.id, order_view.map)
+        return Pagination.return_page(f"Successfully retrieved {len(result)} orders", result, next_cursor)
+
+    # Check if any orders exist
+    return Reads.orders(db_session.execute(Reads.orders_statement(current_user.uuid)).all())
 
 
 @order.route("/add", methods=['POST'])
@@ -121,16 +130,19 @@ def post_order_add():
 
     :return: JSON detailed status response with (created event uuid) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
 
-    current_event = Event.query.filter_by(active=True).first()
+    current_event = active_event.get()
 
     if current_event is None:
         return Utilities.return_response(500, "No current event exists.")
 
+    if current_event.deadline <= datetime.utcnow():
+        return Utilities.return_response(403, "Deadline for current event has passed.")
+
     # Check if an order already exists.
     current_order = Order.query.filter_by(user=current_user.uuid, event=current_event.uuid).first()
 
@@ -138,31 +150,16 @@ def post_order_add():
         return Utilities.return_complex_response(409, "Order for current event already exists, use /order/edit instead.",
                                                  {"uuid": current_order.uuid})
 
-    try:
-        # TODO: Turn this validation into a utility
-        user = current_user.uuid
-        total_price = 0.0
-        event = current_event
-        notes = request.json.get("notes", None)
-        products = request.json.get("products", None)
-
-        if not isinstance(products, list):
-            raise AttributeError(f"Expected list, instead got {type(products)}")
-        if not isinstance(notes, str) and notes is not None:
-            raise AttributeError(f"Expected string, instead got {type(notes)}")
-        for product in products:
-            if not isinstance(product, str):
-                raise AttributeError(f"Field <{product}> in product list is not str")
-            product_query = Product.query.filter_by(uuid=product).first()
-            if product_query is None:
-                raise AttributeError(f"Product <{product}> was not found")
-            total_price += product_query.price
-
-        if total_price > event.max_order_price:
-            raise AttributeError(f"Price exceeded maximum: <{event.max_order_price}>")
-
-    except AttributeError as e:
-        return Utilities.return_complex_response(400, "Bad request, see details.", {"error": e.__str__()})
+    event = current_event
+    validated, errors = OrderValidator.validate(request.get_json(silent=True), event)
+
+    if errors:
+        return OrderValidator.return_errors(errors)
+
+    user = current_user.uuid
+    products = validated["products"]
+    notes = validated["notes"]
+    total_price = validated["total_price"]
 
     new_order = Order(
         user=user,
@@ -173,11 +170,14 @@ def post_order_add():
     )
 
     db_session.add(new_order)
-    db_session.commit()
-
-    # Rehash and re-stamp
-    data = Data.query.first()
-    data.perform_changes("orders")
+    try:
+        db_session.commit()
+    except IntegrityError:
+        # A concurrent request created the order first, see ``ix_orders_user_event``
+        db_session.rollback()
+        current_order = Order.query.filter_by(user=current_user.uuid, event=current_event.uuid).first()
+        return Utilities.return_complex_response(409, "Order for current event already exists, use /order/edit instead.",
+                                                 {"uuid": current_order.uuid if current_order is not None else None})
 
     current_user.perform_tracking(address=request.remote_addr)
 
@@ -195,16 +195,19 @@ def delete_order_current():
 
     :return: JSON detailed status response with (deletec event uuid) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
 
-    current_event = Event.query.filter_by(active=True).first()
+    current_event = active_event.get()
 
     if current_event is None:
         return Utilities.return_response(500, "No current event exists.")
 
+    if current_event.deadline <= datetime.utcnow():
+        return Utilities.return_response(403, "Deadline for current event has passed.")
+
     # Check if an order exists.
     current_order = Order.query.filter_by(user=current_user.uuid, event=current_event.uuid).first()
     if current_order is None:
@@ -216,10 +219,6 @@ def delete_order_current():
     db_session.delete(current_order)
     db_session.commit()
 
-    # Rehash and re-stamp
-    data = Data.query.first()
-    data.perform_changes("orders")
-
     current_user.perform_tracking(address=request.remote_addr)
 
     return Utilities.return_complex_response(200, f"Successfully deleted {old}", {"order": {"uuid": uuid}})
@@ -233,46 +232,34 @@ def put_order_edit():
 
     :return: JSON detailed status response with (new order) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
 
-    current_event = Event.query.filter_by(active=True).first()
+    current_event = active_event.get()
 
     if current_event is None:
         return Utilities.return_response(500, "No current event exists.")
 
+    if current_event.deadline <= datetime.utcnow():
+        return Utilities.return_response(403, "Deadline for current event has passed.")
+
     # Check if an order exists.
     current_order = Order.query.filter_by(user=current_user.uuid, event=current_event.uuid).first()
 
     if current_order is None:
         return Utilities.return_response(404, "No order for current event exists, use /order/add instead.")
 
-    try:
-        # TODO: Turn this validation into a utility
-        total_price = 0.0
-        event = current_event
-        notes = request.json.get("notes", None)
-        products = request.json.get("products", None)
-
-        if not isinstance(products, list):
-            raise AttributeError(f"Expected list, instead got {type(products)}")
-        if not isinstance(notes, str) and notes is not None:
-            raise AttributeError(f"Expected string, instead got {type(notes)}")
-        for product in products:
-            if not isinstance(product, str):
-                raise AttributeError(f"Field <{product}> in product list is not str")
-            product_query = Product.query.filter_by(uuid=product).first()
-            if product_query is None:
-                raise AttributeError(f"Product <{product}> was not found")
-            total_price += product_query.price
-
-        if total_price > event.max_order_price:
-            raise AttributeError(f"Price exceeded maximum: <{event.max_order_price}>")
-
-    except AttributeError as e:
-        return Utilities.return_complex_response(400, "Bad request, see details.", {"error": e.__str__()})
+    event = current_event
+    validated, errors = OrderValidator.validate(request.get_json(silent=True), event)
+
+    if errors:
+        return OrderValidator.return_errors(errors)
+
+    products = validated["products"]
+    notes = validated["notes"]
+    total_price = validated["total_price"]
 
     current_order.products = products
     current_order.total_price = total_price
@@ -280,10 +267,6 @@ def put_order_edit():
 
     db_session.commit()
 
-    # Rehash and re-stamp
-    data = Data.query.first()
-    data.perform_changes("orders")
-
     current_user.perform_tracking(address=request.remote_addr)
 
     return Utilities.return_complex_response(200, f"Successfully edited {current_order}",
@@ -295,20 +278,17 @@ def put_order_edit():
 
 @order.route("/last_changed", methods=['GET'])
 @jwt_required()
+@conditional("orders")
 def get_order_last_changed():
     """
-    Retrieves last changed timestamp and hash, indicating changes if different.
+    Retrieves last changed timestamp and version, indicating changes if different.
 
     :return: JSON result response with (last changed) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    data = Data.query.first()
-
-    return Utilities.return_result(200, "Successfully fetched orders last changed",
-                                   {"products_hash": data.orders_hash,
-                                    "products_last_changed": data.orders_last_changed})
+    return Reads.last_changed("orders", data_snapshot.get())
@@ -1,9 +1,11 @@
-from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-
-from models.user import User
-from models.product import Product
-from models.data import Data
+from flask import Blueprint, Response, request
+from flask_jwt_extended import jwt_required
+
+from services.cache import data_snapshot, product_cache
+from services.conditional import conditional
+from services.pagination import Pagination
+from services.principal import current_principal
+from services.reads import Reads
 from services.utilities import Utilities
 
 # Configure blueprint
@@ -12,69 +14,69 @@ product = Blueprint('product', __name__, url_prefix='/product')
 
 @product.route("/all", methods=['GET'])
 @jwt_required()
+@conditional("products")
 def get_product_all():
     """
     Return all current products.
 
     :return: JSON result response with a (list of product) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    local_products = Product.query.all()
-
-    if local_products is None or local_products == []:
-        return Utilities.return_response(404, "No products found")
+    try:
+        pagination = Pagination.from_request()
+    except ValueError as e:
+        return Pagination.return_bad_request(e)
 
-    result = []
+    # Pages and streams are sliced from the catalog cache
+    if pagination.stream:
+        return pagination.stream_sequence(product_cache.all())
+    if pagination.enabled:
+        result, next_cursor = pagination.page_sequence(product_cache.all())
+        return Pagination.return_page(f"Fetched {len(result)} products successfully", result, next_cursor)
 
-    for local_product in local_products:
-        result.append(local_product)
+    # Served from the catalog cache, serialized once per products version
+    if not product_cache.all():
+        return Reads.products([])
 
-    return Utilities.return_result(200, f"Fetched {len(result)} products successfully", result)
+    return Response(product_cache.all_body(), status=200, mimetype="application/json")
 
 
 @product.route("/<uuid>", methods=['GET'])
 @jwt_required()
+@conditional("products")
 def get_product_by_uuid(uuid):
     """
     Retrieves one single product based on uuid.
 
     :return: JSON result response with (product) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    local_product = Product.query.filter_by(uuid=uuid).first() or None
-
-    if local_product is None:
-        return Utilities.return_response(404, f"Product <{uuid}> not found")
-
-    return Utilities.return_result(200, "Fetched product successfully", local_product)
+    return Reads.product(uuid, product_cache.get(uuid))
 
 
 @product.route("/last_changed", methods=['GET'])
 @jwt_required()
+@conditional("products")
 def get_products_last_changed():
     """
-    Retrieves last changed timestamp and hash, indicating changes if different.
+    Retrieves last changed timestamp and version, indicating changes if different.
 
     :return: JSON result response with (last changed) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    data = Data.query.first()
-
-    return Utilities.return_result(200, "Successfully fetched product last changed",
-                                   {"products_hash": data.products_hash,
-                                    "products_last_changed": data.products_last_changed})
+    return Reads.last_changed("products", data_snapshot.get())
@@ -0,0 +1,93 @@
+from flaskr import create_app
+from services.config import Config
+from services.database import engine
+
+from os import cpu_count
+
+config = Config().get_config()
+
+
+def worker_count():
+    """
+    Determines the number of worker processes, ``server.workers`` or two per core plus one if unset.
+
+    :return: Integer
+    """
+    return config.server.workers or (cpu_count() or 1) * 2 + 1
+
+
+def prepare(app):
+    """
+    Readies the parent process for forking workers, the database was already prepared by ``create_app()``.
+
+    :param app: Flask application
+    :return: Nothing
+    """
+    # Connections must never be shared with forked workers
+    engine.dispose()
+
+
+def post_fork(server, worker):
+    # Drop pooled connections inherited from the parent without closing them underneath it
+    engine.dispose(close=False)
+
+
+def serve_gunicorn(app):
+    from gunicorn.app.base import BaseApplication
+
+    class OrderServerApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        "bind": f"{config.server.host}:{config.server.port}",
+        "workers": worker_count(),
+        "threads": config.server.threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "max_requests": config.server.max_requests,
+        "max_requests_jitter": config.server.max_requests_jitter,
+        "timeout": config.server.timeout,
+        "graceful_timeout": config.server.graceful_timeout,
+        "post_fork": post_fork,
+    }
+    OrderServerApplication(app, options).run()
+
+
+def serve_waitress(app):
+    from waitress import serve
+
+    serve(app, host=config.server.host, port=config.server.port, threads=config.server.threads)
+
+
+def main():
+    """
+    Starts the production server.\n
+    Uses gunicorn with a preloaded application and recycled workers where available,
+    falls back to a single multi-threaded waitress process otherwise (e.g. on Windows).
+
+    :return: Nothing
+    """
+    app = create_app()
+    prepare(app)
+
+    try:
+        import gunicorn.app.base  # noqa: F401
+    except ImportError:
+        app.logger.info("gunicorn is unavailable, serving with waitress.")
+        serve_waitress(app)
+        return
+    serve_gunicorn(app)
+
+
+if __name__ == "__main__":
+    main()
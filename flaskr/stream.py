@@ -0,0 +1,149 @@
+from flask import Blueprint, Response, current_app, g, request, stream_with_context
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required, verify_jwt_in_request
+
+from services.broker import STREAMED_TABLES, broker
+from services.cache import data_snapshot
+from services.config import Config
+from services.principal import principal_cache
+from services.serialization import Serializer
+from services.tickets import StreamTickets
+from services.utilities import Utilities
+
+from queue import Empty
+from time import time
+
+config = Config().get_config()
+
+# Configure blueprint
+stream = Blueprint('stream', __name__, url_prefix='/events')
+
+
+def format_event(name, data):
+    return f"event: {name}\ndata: {Serializer.encode(data).decode('UTF-8')}\n\n"
+
+
+def current_versions(values=None):
+    values = data_snapshot.get() if values is None else values
+    return {table: {"table": table, "version": values.get(f"{table}_version"),
+                    "last_changed": values.get(f"{table}_last_changed")} for table in STREAMED_TABLES}
+
+
+def format_changes(sent, messages):
+    """
+    Formats the messages announcing versions newer than the ones sent, updating ``sent``.\n
+    Formats a keepalive comment instead if nothing changed.
+
+    :param sent: Dictionary, latest message sent per table
+    :param messages: Iterable of messages, see ``Broker.publish()``
+    :return: List of strings
+    """
+    events = []
+    for message in messages:
+        last = sent[message["table"]]["version"]
+        if message["version"] is not None and (last is None or message["version"] > last):
+            sent[message["table"]] = message
+            events.append(format_event("change", message))
+    return events or [": keepalive\n\n"]
+
+
+def stream_capacity():
+    """
+    Determines how many streams a worker serves at once.\n
+    Served by WSGI, every stream holds a request thread, ``stream.reserved_threads`` of them are always left for
+    other requests. The ASGI serving mode streams without threads, up to ``stream.max_subscribers``.
+
+    :return: Integer
+    """
+    threads = config.server.threads or 1
+    reserved = config.stream.reserved_threads if config.stream.reserved_threads is not None else 1
+    return max(0, min(config.stream.max_subscribers, threads - reserved))
+
+
+def authenticate_stream():
+    """
+    Authenticates a stream request by its ``ticket`` query parameter, or by its ``Authorization`` header.\n
+    Returns the identity and the expiry of the access token, ``None`` if it doesn't expire.
+
+    :return: Tuple, (identity, expiry), or ``None`` if the ticket is invalid, expired or used
+    """
+    ticket = request.args.get("ticket", None)
+    if ticket is None:
+        verify_jwt_in_request(locations=["headers"])
+        return get_jwt_identity(), get_jwt().get("exp", None)
+    return StreamTickets.redeem(current_app.config["SECRET_KEY"], ticket)
+
+
+@stream.route("/ticket", methods=['POST'])
+@jwt_required()
+def post_events_ticket():
+    """
+    Creates a short-lived ticket to open a stream with.\n
+    ``EventSource`` can't send headers, the ticket is passed as the ``ticket`` query parameter instead of the token,
+    so access tokens never end up in URLs or access logs. Tickets open a single stream, within
+    ``stream.ticket_ttl`` seconds.
+
+    :return: JSON status response with the ticket.
+    """
+    ticket = StreamTickets.issue(current_app.config["SECRET_KEY"], get_jwt_identity(), get_jwt().get("exp", None))
+    return Utilities.return_result(200, "Successfully created stream ticket",
+                                   {"ticket": ticket, "expires_in": config.stream.ticket_ttl})
+
+
+@stream.route("/stream", methods=['GET'])
+def get_events_stream():
+    """
+    Streams change notifications for products, events and orders as Server-Sent Events.\n
+    Starts with a ``snapshot`` event holding every version, followed by a ``change`` event per new version.
+    The stream ends with an ``expired`` event once the access token expires.\n
+    Authenticated by the ``Authorization`` header, or a ticket from ``/events/ticket``.
+
+    :return: Event stream response.
+    """
+    authenticated = authenticate_stream()
+    if authenticated is None:
+        return Utilities.return_response(401, "Invalid, expired or used stream ticket.")
+    identity, expires = authenticated
+
+    if expires is not None and expires <= time():
+        return Utilities.return_response(401, "Token has expired")
+
+    current_user = g.principal = principal_cache.get(identity)
+
+    if current_user is None:
+        return Utilities.return_response(401, "Unauthorized")
+    current_user.perform_tracking(address=request.remote_addr)
+
+    queue = broker.subscribe(stream_capacity())
+    if queue is None:
+        result, status = Utilities.return_response(503, "Too many open streams, try again later.")
+        return result, status, {"Retry-After": str(config.stream.keepalive)}
+
+    def generate():
+        try:
+            sent = current_versions()
+            yield f"retry: {config.stream.retry}\n"
+            yield format_event("snapshot", list(sent.values()))
+
+            while True:
+                timeout = config.stream.keepalive
+                if expires is not None:
+                    if expires <= time():
+                        yield format_event("expired", {"expired_at": expires})
+                        return
+                    timeout = min(timeout, expires - time())
+
+                try:
+                    messages = [queue.get(timeout=max(timeout, 0))]
+                except Empty:
+                    # Also picks up changes of other processes, and messages dropped for being slow
+                    messages = list(current_versions().values())
+
+                yield from format_changes(sent, messages)
+        finally:
+            broker.unsubscribe(queue)
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Also frees the slot of clients that disconnect before the stream started
+    response.call_on_close(lambda: broker.unsubscribe(queue))
+    return response
@@ -0,0 +1,76 @@
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+
+from models.event import Event
+from models.order import Order
+from models.product import Product
+from services.changes import SYNCED_TABLES, ChangeLog
+from services.conditional import conditional
+from services.config import Config
+from services.database import db_session
+from services.events import event_view
+from services.principal import current_principal
+from services.utilities import Utilities
+from services.views import order_view, product_view
+
+config = Config().get_config()
+
+# Configure blueprint
+sync = Blueprint('sync', __name__, url_prefix='/sync')
+
+# Models and views changed rows are fetched with, per synchronized table
+SOURCES = {
+    "products": (Product, product_view),
+    "events": (Event, event_view),
+    "orders": (Order, order_view),
+}
+
+
+@sync.route("", methods=['GET'])
+@jwt_required()
+@conditional(*SYNCED_TABLES)
+def get_sync():
+    """
+    Retrieves the products, events and orders changed since the given sequence number.\n
+    Changed rows are returned in full, deleted rows as tombstones, continue with ``next`` as ``since``.\n
+    Returns a ``410`` if the change log no longer covers ``since``, clients should fetch everything again.
+
+    :return: JSON result response with (changes) data.
+    """
+    current_user = current_principal()
+
+    if current_user is None:
+        return Utilities.return_response(401, "Unauthorized")
+    current_user.perform_tracking(address=request.remote_addr)
+
+    since = request.args.get("since", "0")
+    if not since.isdigit():
+        return Utilities.return_complex_response(400, "Bad request, see details.",
+                                                 {"error": f"Expected a sequence number, instead got <{since}>"})
+    since = int(since)
+
+    result = ChangeLog.read(db_session, since, current_user.uuid, config.sync.max_changes)
+    if result is None:
+        return Utilities.return_complex_response(410, f"Changes since <{since}> are no longer available, "
+                                                      f"fetch everything and synchronize from the returned sequence.",
+                                                 {"next": ChangeLog.latest(db_session)})
+    operations, following, more = result
+
+    changes = {}
+    for table, (model, view) in SOURCES.items():
+        uuids = [uuid for (name, uuid), operation in operations.items() if name == table and operation != "delete"]
+        rows = []
+        if uuids:
+            query = view.query().filter(model.uuid.in_(uuids))
+            if table == "orders":
+                query = query.filter(Order.user == current_user.uuid)
+            rows = view.all(query)
+
+        # Rows removed after their last recorded change are tombstones as well
+        found = {row["uuid"] for row in rows}
+        deleted = [uuid for (name, uuid), operation in operations.items()
+                   if name == table and (operation == "delete" or uuid not in found)]
+        changes[table] = {"changed": rows, "deleted": deleted}
+
+    return Utilities.return_result(200, f"Fetched {len(operations)} changes since {since}",
+                                   {"since": since, "next": following, "more": more, "changes": changes})
@@ -1,8 +1,12 @@
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from models.user import User
+from services.conditional import conditional
+from services.pagination import Pagination
+from services.principal import current_principal
 from services.utilities import Utilities
+from services.views import public_user_view
 
 # Configure blueprint
 user = Blueprint('user', __name__, url_prefix='/user')
@@ -10,6 +14,7 @@ user = Blueprint('user', __name__, url_prefix='/user')
 
 @user.route("/<uuid>", methods=['GET'])
 @jwt_required()
+@conditional("users")
 def get_user_by_uuid(uuid):
     """
     Gets a single user by UUID and returns public information about them.
@@ -19,50 +24,49 @@ def get_user_by_uuid(uuid):
     if not Utilities.is_valid_uuid(uuid):
         return Utilities.return_response(400, "Expected UUID, received something else.")
 
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    argument_user = User.query.filter_by(uuid=uuid).first()
+    argument_user = public_user_view.first(public_user_view.query().filter(User.uuid == uuid))
 
     if argument_user is None:
         return Utilities.return_response(404, f"User <{uuid}> not found.")
 
-    return Utilities.return_result(200, "Fetched user successfully", {"uuid": argument_user.uuid,
-                                                                      "name": argument_user.name,
-                                                                      "username": argument_user.username,
-                                                                      "country": argument_user.country,
-                                                                      "admin": argument_user.admin,
-                                                                      "tags": argument_user.tags,
-                                                                      "active": argument_user.active})
+    return Utilities.return_result(200, "Fetched user successfully", argument_user)
 
 
 @user.route("/all", methods=['GET'])
 @jwt_required()
+@conditional("users")
 def get_user_all():
     """
     Get all users and returns public information about them.
 
     :return: JSON result response with a (list of users) data.
     """
-    current_user = User.query.filter_by(uuid=get_jwt_identity()).first()
+    current_user = current_principal()
 
     if current_user is None:
         return Utilities.return_response(401, "Unauthorized")
     current_user.perform_tracking(address=request.remote_addr)
 
-    fetched_users = User.query.all()
+    try:
+        pagination = Pagination.from_request()
+    except ValueError as e:
+        return Pagination.return_bad_request(e)
 
-    if fetched_users is None or []:
-        return Utilities.return_response(404, "No users were found.")
+    if pagination.stream:
+        return pagination.stream_query(public_user_view.query(), User.id, public_user_view.map)
+    if pagination.enabled:
+        result, next_cursor = pagination.page_query(public_user_view.query(), User.id, public_user_view.map)
+        return Pagination.return_page(f"Successfully fetched {len(result)} users", result, next_cursor)
 
-    result = []
+    result = public_user_view.all()
 
-    for fetched_user in fetched_users:
-        result.append({"uuid": fetched_user.uuid, "name": fetched_user.name, "username": fetched_user.username,
-                       "country": fetched_user.country, "admin": fetched_user.admin, "tags": fetched_user.tags,
-                       "active": fetched_user.active})
+    if not result:
+        return Utilities.return_response(404, "No users were found.")
 
     return Utilities.return_result(200, f"Successfully fetched {len(result)} users", result)
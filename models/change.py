@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String
+
+from services.database import Base
+
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class Change(Base):
+    """
+    Change log entry, recording a single insert, update or delete of a synchronized row.\n
+    The id is the sequence number clients synchronize from, see ``services.changes``.
+    """
+    __tablename__ = 'changes'
+    __table_args__ = (
+        Index("ix_changes_table_uuid", "table", "uuid"),
+        # Sequence numbers are never reused, even once old entries are pruned
+        {"sqlite_autoincrement": True},
+    )
+    id: int = Column(Integer, primary_key=True, nullable=False, unique=True)
+    table: str = Column(String, nullable=False)
+    uuid: str = Column(String(36), nullable=False)
+    operation: str = Column(String, nullable=False)
+    owner: str = Column(String, nullable=True, default=None)
+    changed_at: datetime = Column(DateTime, nullable=False, index=True, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Change {self.id} {self.operation} {self.table} {self.uuid}>"
@@ -13,18 +13,19 @@ class Event(Base):
     Event is an object orders are places upon.\n
     Every event ends at some point, indicating when employees order.
     """
-    # TODO: Decide if this will be manual/automatic.
+    # Deadlines are enforced by services.events.EventScheduler
     # TODO: Add methods to make database changes easier.
     __tablename__ = 'events'
+    __tracked__ = 'events'
     # Core information
     id: int = Column(Integer, primary_key=True, nullable=False, unique=True)
-    uuid: str = Column(String(36), nullable=False, default=str(uuid4()))
+    uuid: str = Column(String(36), nullable=False, index=True, default=lambda: str(uuid4()))
 
     # Unique tracking information
-    active: bool = Column(Boolean, nullable=False, default=True)
-    created_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow())
-    until: datetime = Column(DateTime, nullable=False, default=datetime.utcnow() + timedelta(days=7))
-    deadline: datetime = Column(DateTime, nullable=False, default=datetime.utcnow() + timedelta(days=4))
+    active: bool = Column(Boolean, nullable=False, index=True, default=True)
+    created_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow)
+    until: datetime = Column(DateTime, nullable=False, default=lambda: datetime.utcnow() + timedelta(days=7))
+    deadline: datetime = Column(DateTime, nullable=False, default=lambda: datetime.utcnow() + timedelta(days=4))
 
     # Event unique settings
     max_order_price: float = Column(Float, nullable=False, default=20.0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, String, PickleType, Integer, Boolean, DateTime
+from sqlalchemy import Column, Float, String, JSON, Integer, Boolean, DateTime, Index, text
 
 from services.database import Base
 
@@ -15,22 +15,39 @@ class Order(Base):
     """
     # TODO: Add methods to make database changes easier.
     __tablename__ = 'orders'
+    __tracked__ = 'orders'
+    __owner__ = 'user'
+    __table_args__ = (
+        Index("ix_orders_user_event", "user", "event", unique=True),
+        Index("ix_orders_user_uuid", "user", "uuid"),
+    )
     # Core information
     id: int = Column(Integer, primary_key=True, nullable=False, unique=True, )
-    uuid: str = Column(String(36), nullable=False, default=str(uuid4()))
+    uuid: str = Column(String(36), nullable=False, index=True, default=lambda: str(uuid4()))
     user: str = Column(String, nullable=False)
-    products: list = Column(PickleType, nullable=False, default=[])
+    products: list = Column(JSON, nullable=False, default=[])
     total_price: float = Column(Float, nullable=False)
     notes: str = Column(String, nullable=True, default=None)
     employee_notes: str = Column(String, nullable=True, default=None) # TODO: Implement this!
 
     # Unique tracking information
     event: str = Column(String, nullable=False)
-    created_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow())
-    last_changed_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow())
+    created_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_changed_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow)
     expired: bool = Column(Boolean, nullable=False, default=False)
     completed: bool = Column(Boolean, nullable=False, default=False)
 
+    @classmethod
+    def containing(cls, product: str):
+        """
+        Creates a query for orders containing the given product, evaluated by SQLite.
+
+        :param product: UUID of the product
+        :return: Query
+        """
+        return cls.query.filter(text("EXISTS (SELECT 1 FROM json_each(orders.products) "
+                                     "WHERE json_each.value = :product)")).params(product=product)
+
     def __repr__(self):
         return f"<Order {self.uuid}>"
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, String, PickleType, Integer
+from sqlalchemy import Column, Float, String, JSON, Integer, bindparam, text
 
 from services.database import Base
 
@@ -14,9 +14,10 @@ class Product(Base):
     """
     # TODO: Add methods to make database changes easier.
     __tablename__ = 'products'
+    __tracked__ = 'products'
     # Core information
     id: int = Column(Integer, nullable=False, unique=True, primary_key=True)
-    uuid: str = Column(String(36), nullable=False, default=str(uuid4()))
+    uuid: str = Column(String(36), nullable=False, index=True, default=lambda: str(uuid4()))
     name: str = Column(String, nullable=False, unique=True)
     brand: str = Column(String, nullable=False)
     price: float = Column(Float, nullable=False)
@@ -31,8 +32,8 @@ class Product(Base):
     # Tracking and analytics information
     nutri_score: str = Column(String, nullable=True)
     quantity: str = Column(String, nullable=True)
-    allergens: list = Column(PickleType, default=[], nullable=True)
-    ingredients: list = Column(PickleType, default=[], nullable=True)
+    allergens: list = Column(JSON, default=[], nullable=True)
+    ingredients: list = Column(JSON, default=[], nullable=True)
 
     # Product nutrition information
     energy: float = Column(Float, nullable=True)
@@ -44,7 +45,19 @@ class Product(Base):
     fiber: float = Column(Float, nullable=True)
     proteins: float = Column(Float, nullable=True)
     salt: float = Column(Float, nullable=True)
-    extra: list = Column(PickleType, default=[], nullable=True)
+    extra: list = Column(JSON, default=[], nullable=True)
+
+    @classmethod
+    def without_allergens(cls, allergens: list):
+        """
+        Creates a query for products containing none of the given allergens, evaluated by SQLite.
+
+        :param allergens: List of allergens
+        :return: Query
+        """
+        clause = text("NOT EXISTS (SELECT 1 FROM json_each(products.allergens) "
+                      "WHERE json_each.value IN :allergens)").bindparams(bindparam("allergens", expanding=True))
+        return cls.query.filter(clause).params(allergens=list(allergens))
 
     def __repr__(self):
         return f"<Product {self.name}>"
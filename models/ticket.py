@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from services.database import Base
+
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class Ticket(Base):
+    """
+    Redeemed stream ticket.\n
+    Tickets are signed and carry their own expiry, only their nonce is stored once used, so a ticket opens one stream.
+    Entries are pruned once the ticket would have expired anyway, see ``services.tickets``.
+    """
+    __tablename__ = 'tickets'
+    id: int = Column(Integer, primary_key=True, nullable=False, unique=True)
+    nonce: str = Column(String(32), nullable=False, unique=True)
+    expires_at: datetime = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<Ticket {self.nonce}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, DateTime, Column, Integer, String, PickleType
+from sqlalchemy import Boolean, DateTime, Column, Integer, String, JSON
 
 from services.utilities import Utilities
 from services.database import Base
@@ -18,25 +18,29 @@ class User(Base):
     """
     # TODO: Add methods to make database changes easier.
     __tablename__ = 'users'
+    __tracked__ = 'users'
+    # Changed on every login or action, without changing the users version
+    __untracked__ = ("active", "token", "last_action_at", "last_action_ip", "last_action", "last_login_at",
+                     "last_login_ip", "login_count")
     # User-specific information
     id: int = Column(Integer, primary_key=True, nullable=False, unique=True)
-    uuid: str = Column(String, nullable=False, unique=True, default=str(uuid4()))
+    uuid: str = Column(String, nullable=False, unique=True, default=lambda: str(uuid4()))
     username: str = Column(String, nullable=False, unique=True)
     name: str = Column(String, nullable=False, unique=True)
     email: str = Column(String, nullable=False, unique=True)
     phone_number: str = Column(String, nullable=False, unique=True)
     address: str = Column(String, nullable=False, unique=True)
     postal_code: str = Column(String, nullable=False, unique=True)
-    created_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow())
+    created_at: datetime = Column(DateTime, nullable=False, default=datetime.utcnow)
     country: str = Column(String, nullable=True, default="NL")
 
     # Clearance/security/authentication
-    flags: list = Column(PickleType, nullable=False, default=[])
+    flags: list = Column(JSON, nullable=False, default=[])
     admin: bool = Column(Boolean, nullable=False, default=False)
     password: str = Column(String, nullable=False)
-    secret: str = Column(String, nullable=True, unique=True, default=Utilities.generate_secret())
+    secret: str = Column(String, nullable=True, unique=True, default=Utilities.generate_secret)
     token: str = Column(String, nullable=True, unique=True, default=None)
-    tags: list = Column(PickleType, nullable=False, default=[])
+    tags: list = Column(JSON, nullable=False, default=[])
 
     # Tracking
     active: bool = Column(Boolean, nullable=True, default=None)
@@ -51,22 +55,25 @@ class User(Base):
         return f"{self.name[0]}. {self.name.split(' ')[1]}"
 
     def perform_tracking(self, source: str = None, address: str = "UNKNOWN", active: bool = True, login: bool = False):
+        """
+        Tracks the last action or login of the user.\n
+        Logins are committed directly, other actions are buffered by the activity tracker.
+        """
         from services.database import db_session
+        from services.tracking import activity_tracker
         now = datetime.utcnow()
 
         if source is None:
             source = str(currentframe().f_back.f_code.co_name)
 
-        if login:
-            self.active = active
-            self.login_count += 1
-            self.last_login_at = now
-            self.last_login_ip = address
-        else:
-            self.active = active
-            self.last_action = source
-            self.last_action_at = now
-            self.last_action_ip = address
+        if not login:
+            activity_tracker.track(self.uuid, source, address, active)
+            return
+
+        self.active = active
+        self.login_count += 1
+        self.last_login_at = now
+        self.last_login_ip = address
 
         db_session.commit()
 
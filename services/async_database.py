@@ -0,0 +1,19 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from services.config import Config
+from services.database import apply_pragmas
+
+config = Config().get_config()
+
+# Asynchronous engine for the ASGI serving mode, on the same database and pragmas as the synchronous one.
+# The pool is explicit, older SQLAlchemy releases default file databases of aiosqlite to ``NullPool``
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{config.database.absolute_path}",
+                                   poolclass=AsyncAdaptedQueuePool,
+                                   pool_size=config.database.engine.pool_size,
+                                   max_overflow=config.database.engine.max_overflow)
+event.listen(async_engine.sync_engine, "connect", apply_pragmas)
+
+async_session = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
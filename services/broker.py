@@ -0,0 +1,99 @@
+from services.config import Config
+
+from asyncio import Queue as AsyncioQueue, QueueFull, get_running_loop, wait_for
+from queue import Full, Queue
+from threading import Lock
+
+config = Config().get_config()
+
+# Tracked tables pushed to subscribers, user changes are never broadcast
+STREAMED_TABLES = ("products", "events", "orders")
+
+
+class AsyncQueue:
+    """
+    Queue of a subscriber served by an event loop, filled from any thread.\n
+    Messages are handed to the loop, a stream waiting on ``get()`` doesn't hold a thread.
+    """
+
+    def __init__(self, maxsize: int):
+        self.loop = get_running_loop()
+        self.queue = AsyncioQueue(maxsize=maxsize)
+
+    def put_nowait(self, message: dict):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The loop closed, the subscriber is gone
+            raise Full()
+
+    def _put(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+        except QueueFull:
+            pass
+
+    async def get(self, timeout: float):
+        return await wait_for(self.queue.get(), timeout)
+
+
+class Broker:
+    """
+    In-process publish/subscribe of table changes.\n
+    Every subscriber gets a bounded queue, messages for slow subscribers are dropped once it is full.
+    Subscribers recover by comparing versions with ``DataSnapshot``, which also covers changes of other processes.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._subscribers = set()
+
+    def subscribe(self, limit: int = None, asynchronous: bool = False):
+        """
+        Registers a new subscriber, unless the limit, ``stream.max_subscribers`` by default, is reached.\n
+        Asynchronous subscribers get an ``AsyncQueue``, and have to subscribe from their event loop.
+
+        :param limit: Maximum amount of subscribers
+        :param asynchronous: Create a queue for an event loop
+        :return: Queue, or ``None`` if there is no room
+        """
+        limit = config.stream.max_subscribers if limit is None else limit
+        with self._lock:
+            if len(self._subscribers) >= limit:
+                return None
+            if asynchronous:
+                queue = AsyncQueue(maxsize=config.stream.queue_size)
+            else:
+                queue = Queue(maxsize=config.stream.queue_size)
+            self._subscribers.add(queue)
+            return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    def publish(self, message: dict):
+        """
+        Sends a message to every subscriber, without blocking.
+
+        :param message: Dictionary
+        :return: Integer, amount of subscribers reached
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        reached = 0
+        for queue in subscribers:
+            try:
+                queue.put_nowait(message)
+                reached += 1
+            except Full:
+                pass
+        return reached
+
+    def count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+broker = Broker()
@@ -0,0 +1,224 @@
+from flask import json
+
+from services.config import Config
+from services.metrics import record_cache
+from services.versioning import TRACKED_TABLES
+
+from threading import Lock
+from time import monotonic
+
+config = Config().get_config()
+
+
+class DataSnapshot:
+    """
+    In-process copy of the ``Data`` row.\n
+    Changes performed by this process are applied immediately through ``apply()``.\n
+    Changes performed by other processes are picked up by re-reading the row,
+    at most once every ``cache.revalidate_interval`` seconds.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._values = None
+        self._loaded_at = 0.0
+
+    @staticmethod
+    def columns():
+        """
+        Lists the tracking columns of the ``Data`` row, in the order ``values()`` expects them.
+
+        :return: List of columns
+        """
+        from models.data import Data
+
+        columns = []
+        for table in TRACKED_TABLES:
+            columns.append(getattr(Data, f"{table}_version"))
+            columns.append(getattr(Data, f"{table}_last_changed"))
+        return columns
+
+    @staticmethod
+    def values(row):
+        """
+        Maps a row of the tracking columns to a dictionary.
+
+        :param row: Row selected with ``columns()``, or ``None``
+        :return: Dictionary
+        """
+        if row is None:
+            return {}
+
+        values = {}
+        for index, table in enumerate(TRACKED_TABLES):
+            values[f"{table}_version"] = row[index * 2]
+            values[f"{table}_last_changed"] = row[index * 2 + 1]
+        return values
+
+    def _load(self):
+        from services.database import db_session
+
+        return self.values(db_session.query(*self.columns()).first())
+
+    def fresh(self):
+        """
+        Returns the current tracking values without touching the database, or ``None`` if the snapshot is stale.
+
+        :return: Dictionary, or ``None``
+        """
+        values = self._values
+        if values is not None and monotonic() - self._loaded_at < config.cache.revalidate_interval:
+            return values
+        return None
+
+    def get(self):
+        """
+        Returns the current tracking values, revalidating if the snapshot is stale.\n
+        Returns a dictionary.
+
+        :return: Dictionary, ``<table>_version`` and ``<table>_last_changed`` values
+        """
+        values = self.fresh()
+        if values is not None:
+            record_cache("data_snapshot", True)
+            return values
+
+        record_cache("data_snapshot", False)
+        with self._lock:
+            if self._values is None or monotonic() - self._loaded_at >= config.cache.revalidate_interval:
+                self._values = self._load()
+                self._loaded_at = monotonic()
+            return self._values
+
+    def apply(self, model, version, time):
+        """
+        Applies a change performed by this process, without touching the database.\n
+        Versions only move forward, older versions than the one already known are ignored.
+
+        :param model: String indicating table
+        :param version: New version of the table
+        :param time: New last changed datetime of the table
+        :return: Nothing
+        """
+        with self._lock:
+            if self._values is None or (self._values.get(f"{model}_version") or 0) >= version:
+                return
+            values = dict(self._values)
+            values[f"{model}_version"] = version
+            values[f"{model}_last_changed"] = time
+            self._values = values
+
+    def invalidate(self):
+        """
+        Drops the snapshot, the next ``get()`` reloads it from the database.
+
+        :return: Nothing
+        """
+        with self._lock:
+            self._values = None
+
+
+class CatalogState:
+    """
+    State of the product catalog for a single ``products_version``.
+    """
+    __slots__ = ("version", "products", "index", "body")
+
+    def __init__(self, version, products):
+        self.version = version
+        self.products = products
+        self.index = {product["uuid"]: product for product in products}
+        self.body = None
+
+
+class ProductCache:
+    """
+    Read-through cache of the product catalog.\n
+    Holds the serialized product list, a uuid to product index and the pre-serialized ``/product/all`` body.\n
+    The cache only drops itself when ``Data.products_version`` changes.
+    """
+
+    def __init__(self, snapshot: DataSnapshot):
+        self._snapshot = snapshot
+        self._lock = Lock()
+        self._state = None
+
+    def _build(self, version):
+        from models.product import Product
+        from services.views import product_view
+
+        products = product_view.all(product_view.query().order_by(Product.id))
+        return CatalogState(version, products)
+
+    def state(self):
+        """
+        Returns the catalog state for the current ``products_version``, loading it on a miss.\n
+        Returns a CatalogState.
+
+        :return: CatalogState
+        """
+        version = self._snapshot.get().get("products_version")
+        state = self._state
+        if state is not None and state.version == version:
+            record_cache("products", True)
+            return state
+
+        record_cache("products", False)
+        with self._lock:
+            if self._state is None or self._state.version != version:
+                self._state = self._build(version)
+            return self._state
+
+    def all(self):
+        """
+        Returns all products, ordered by id.\n
+        Returns a list of dictionaries.
+
+        :return: List, products
+        """
+        return self.state().products
+
+    def get(self, uuid):
+        """
+        Returns a single product by UUID, or ``None`` if it doesn't exist.
+
+        :param uuid: UUID of the product
+        :return: Dictionary, product
+        """
+        return self.state().index.get(uuid)
+
+    def index(self):
+        """
+        Returns the uuid to product index.\n
+        Returns a dictionary.
+
+        :return: Dictionary, products by UUID
+        """
+        return self.state().index
+
+    def all_body(self):
+        """
+        Returns the pre-serialized ``/product/all`` response body.\n
+        Serialized once per ``products_version``, requires an application context.
+
+        :return: String, JSON body
+        """
+        from services.reads import Reads
+
+        state = self.state()
+        if state.body is None:
+            state.body = json.dumps(Reads.products(state.products)[0])
+        return state.body
+
+    def invalidate(self):
+        """
+        Drops the cached catalog.
+
+        :return: Nothing
+        """
+        with self._lock:
+            self._state = None
+
+
+data_snapshot = DataSnapshot()
+product_cache = ProductCache(data_snapshot)
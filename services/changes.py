@@ -0,0 +1,136 @@
+from sqlalchemy import event, func, literal, null, or_, select
+
+from models.change import Change
+from services.config import Config
+from services.database import db_session
+from services.versioning import has_tracked_changes
+
+from datetime import datetime, timedelta
+
+config = Config().get_config()
+
+# Tracked tables clients can synchronize, users are never exposed through the change log
+SYNCED_TABLES = ("products", "events", "orders")
+
+
+class ChangeLog:
+    """
+    Records inserts, updates and deletes of synchronized rows, in the transaction making the change.\n
+    ORM changes are recorded by a flush hook, Core bulk changes record themselves through ``record()``
+    or ``record_select()``.\n
+    Models may set ``__owner__`` to the column holding the owning user, their changes are only synchronized to them.
+    """
+    table = Change.__table__
+
+    @staticmethod
+    def record(connection, table: str, entries, time: datetime = None):
+        """
+        Records changes to rows of a table.
+
+        :param connection: Connection within the transaction performing the changes
+        :param table: Synchronized table
+        :param entries: Iterable of (uuid, operation, owner) tuples
+        :return: Integer, amount of changes recorded
+        """
+        time = time or datetime.utcnow()
+        rows = [{"table": table, "uuid": uuid, "operation": operation, "owner": owner, "changed_at": time}
+                for uuid, operation, owner in entries]
+        if rows:
+            connection.execute(ChangeLog.table.insert(), rows)
+        return len(rows)
+
+    @staticmethod
+    def record_select(connection, model, operation: str, where, time: datetime = None):
+        """
+        Records a change for every row of a model matching a condition, with a single ``INSERT ... SELECT``.\n
+        Run it before the statement it describes, while the condition still matches the same rows.
+
+        :param connection: Connection within the transaction performing the changes
+        :param model: Synchronized model
+        :param operation: ``insert``, ``update`` or ``delete``
+        :param where: Condition on the model's table
+        :return: Nothing
+        """
+        columns = model.__table__.c
+        owner = getattr(model, "__owner__", None)
+        query = select(literal(model.__tracked__), columns.uuid, literal(operation),
+                       columns[owner] if owner is not None else null(),
+                       literal(time or datetime.utcnow())).where(where)
+        connection.execute(ChangeLog.table.insert().from_select(
+            ["table", "uuid", "operation", "owner", "changed_at"], query))
+
+    @staticmethod
+    def latest(session):
+        """
+        Retrieves the latest sequence number, clients start synchronizing from it after a full fetch.
+
+        :param session: Session to read with
+        :return: Integer
+        """
+        return session.query(func.max(Change.id)).scalar() or 0
+
+    @staticmethod
+    def read(session, since: int, owner: str, limit: int):
+        """
+        Reads the changes visible to a user after a sequence number.\n
+        Multiple changes to a row are coalesced into its last operation.
+
+        :param session: Session to read with
+        :param since: Last sequence number the client has seen
+        :param owner: UUID of the requesting user
+        :param limit: Maximum amount of changes to read
+        :return: Tuple, (dictionary of (table, uuid) to operation, next sequence number, more changes pending),
+                 or ``None`` if the log no longer covers the sequence number
+        """
+        oldest, latest = session.query(func.min(Change.id), func.max(Change.id)).one()
+        if (oldest is not None and since < oldest - 1) or since > (latest or 0):
+            return None
+
+        rows = session.query(Change.id, Change.table, Change.uuid, Change.operation) \
+            .filter(Change.id > since, Change.id <= (latest or 0),
+                    or_(Change.owner.is_(None), Change.owner == owner)) \
+            .order_by(Change.id).limit(limit + 1).all()
+
+        more = len(rows) > limit
+        rows = rows[:limit]
+
+        operations = {}
+        for _, table, uuid, operation in rows:
+            operations[(table, uuid)] = operation
+        if more:
+            return operations, rows[-1][0], True
+        return operations, max(latest or 0, since), False
+
+    @staticmethod
+    def prune(connection, before: datetime = None):
+        """
+        Removes changes older than ``sync.retention_days``, or recorded before the given datetime.\n
+        The latest change is always kept, it marks how far the log has progressed.
+
+        :param connection: Connection to prune with
+        :param before: Datetime
+        :return: Integer, amount of changes removed
+        """
+        before = before or datetime.utcnow() - timedelta(days=config.sync.retention_days)
+        latest = select(func.max(Change.id)).scalar_subquery()
+        return connection.execute(ChangeLog.table.delete()
+                                  .where(Change.changed_at < before, Change.id < latest)).rowcount
+
+
+@event.listens_for(db_session, "after_flush")
+def record_flush(session, flush_context):
+    entries = {}
+    for operation, instances in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for instance in instances:
+            cls = type(instance)
+            table = getattr(cls, "__tracked__", None)
+            if table not in SYNCED_TABLES:
+                continue
+            if operation == "update" and not has_tracked_changes(instance):
+                continue
+            owner = getattr(cls, "__owner__", None)
+            entries.setdefault(table, []).append(
+                (instance.uuid, operation, getattr(instance, owner) if owner is not None else None))
+
+    for table, rows in entries.items():
+        ChangeLog.record(session.connection(), table, rows)
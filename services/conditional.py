@@ -0,0 +1,94 @@
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from services.cache import data_snapshot
+from services.events import active_event
+from services.principal import current_principal
+from services.utilities import Utilities
+
+from datetime import timezone
+from functools import wraps
+from hashlib import md5
+
+
+def compute_validators(values, models, path, identity, event=None):
+    """
+    Computes the strong ETag and Last-Modified of a response.\n
+    The ETag covers the request path, the identity and the versions of the given tables,
+    and the state of the active event for responses depending on it.
+
+    :param values: Tracking values, see ``DataSnapshot.get()``
+    :param models: Tracked tables the response depends on
+    :param path: Full request path, including the query string
+    :param identity: JWT identity, or ``None``
+    :param event: Validators of the active event, see ``ActiveEventCache.validators()``, or ``None``
+    :return: Tuple, (etag, last modified datetime or ``None``)
+    """
+    key = [path, str(identity)]
+    key.extend(str(values.get(f"{model}_version")) for model in models)
+    changed = [values.get(f"{model}_last_changed") for model in models]
+    if event is not None:
+        key.append(str(event[0]))
+        changed.append(event[1])
+    etag = md5("|".join(key).encode("UTF-8")).hexdigest()
+
+    changed = [value for value in changed if value is not None]
+    last_modified = max(changed).replace(microsecond=0, tzinfo=timezone.utc) if changed else None
+    return etag, last_modified
+
+
+def is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+    """
+    Checks the conditional request headers, ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+
+    :param etag: ETag of the current representation
+    :param last_modified: Last modified datetime, or ``None``
+    :param if_none_match: Parsed ``If-None-Match`` header, ``werkzeug.datastructures.ETags``
+    :param if_modified_since: Parsed ``If-Modified-Since`` header, or ``None``
+    :return: Boolean
+    """
+    if if_none_match:
+        return if_none_match.contains(etag)
+    return last_modified is not None and if_modified_since is not None and if_modified_since >= last_modified
+
+
+def conditional(*models, current_event: bool = False):
+    """
+    Adds conditional GET support to a view, based on the ``Data`` tracking of the given tables.\n
+    Responses get a strong ``ETag`` and ``Last-Modified``, matching ``If-None-Match`` or ``If-Modified-Since``
+    requests get a ``304`` without running the view.\n
+    Apply below ``jwt_required()``, the ETag includes the identity since some views are user specific.
+    The principal is resolved before validators are compared, unknown users get a ``401`` rather than a ``304``.
+
+    :param models: Tracked tables the view depends on, see ``services.versioning``
+    :param current_event: The view depends on the active event, which also changes when it ends by the clock
+    :return: Decorator
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            try:
+                identity = get_jwt_identity()
+            except RuntimeError:
+                identity = None
+
+            # Tokens of removed users must not get a 304 for what they cached before
+            if identity is not None and current_principal() is None:
+                return Utilities.return_response(401, "Unauthorized")
+
+            event = active_event.validators() if current_event else None
+            etag, last_modified = compute_validators(data_snapshot.get(), models, request.full_path, identity, event)
+
+            if is_not_modified(etag, last_modified, request.if_none_match, request.if_modified_since):
+                response = make_response("", 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return decorator
+    return wrapper
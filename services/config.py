@@ -1,24 +1,435 @@
 from python_json_config import ConfigBuilder
 from python_json_config.validators import is_unreserved_port
 
+from copy import deepcopy
+from json import JSONDecodeError, load, loads
+from logging import getLogger
+from os import environ, path as os_path, stat
+from threading import Lock
+from time import monotonic
+from types import MappingProxyType
 
-class Config:
-    def __init__(self, path: str = "./config.json", builder: ConfigBuilder = ConfigBuilder()):
-        self.path = path
-        self.builder = builder
-        self.config = None
+logger = getLogger(__name__)
+
+# Environment variables overriding configuration values, nested keys are separated by a double underscore.
+# E.g. ``ORDERSERVER_SERVER__PORT=9000`` or ``ORDERSERVER_DATABASE__ENGINE__POOL_SIZE=4``
+ENV_PREFIX = "ORDERSERVER_"
+
+# Seconds between checks for changes of the configuration file, unless ``application.reload_interval`` is set
+DEFAULT_RELOAD_INTERVAL = 2
+
+# Defaults of keys added after the first release, configuration files written before them keep working.
+# Values of the file take precedence, sections are merged key by key. Empty mappings, like the limits per route,
+# are values rather than sections, they are only used if the file has none at all.
+DEFAULTS = {
+    "application": {"reload_interval": DEFAULT_RELOAD_INTERVAL},
+    "server": {"workers": 0, "threads": 4, "max_requests": 1000, "max_requests_jitter": 100, "timeout": 30,
+               "graceful_timeout": 30},
+    "security": {"secret_key": "", "jwt_secret_key": "", "key_file": "./instance/keys.json"},
+    "ratelimiting": {"key": "identity", "storage_uri": "memory://", "strategy": "fixed-window", "blueprints": {},
+                     "routes": {}},
+    "database": {"engine": {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -65536,
+                            "mmap_size": 268435456, "busy_timeout": 5000, "pool": "QueuePool", "pool_size": 8,
+                            "max_overflow": 16, "pool_timeout": 30}},
+    "cache": {"revalidate_interval": 5, "principal_ttl": 30, "principal_size": 4096},
+    "events": {"check_interval": 30},
+    "importer": {"path": "./static/products.json", "batch_size": 1000, "chunk_size": 65536, "max_errors": 50,
+                 "max_deletion_ratio": 0.5},
+    "metrics": {"enabled": True, "path": "/metrics", "allowed": ["127.0.0.1", "::1"], "database": "metrics.db",
+                "flush_interval": 5},
+    "passwords": {"rounds": 12, "workers": 4, "queue_size": 32, "timeout": 10, "retry_after": 2},
+    "pagination": {"default_limit": 100, "max_limit": 1000, "stream_batch": 500},
+    "serialization": {"backend": "orjson", "row_cache_size": 10000},
+    "asgi": {"wsgi_workers": 10},
+    "stream": {"keepalive": 15, "retry": 3000, "max_subscribers": 256, "reserved_threads": 2, "ticket_ttl": 30,
+               "queue_size": 64},
+    "sync": {"max_changes": 500, "retention_days": 30},
+    "tracking": {"flush_interval": 5, "flush_size": 500},
+}
+
+# Accepted pragma values of ``database.engine``, see ``services.database``
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+POOL_CLASSES = ("QueuePool", "SingletonThreadPool", "StaticPool", "NullPool")
+
+# Durations in seconds may be fractions
+NUMBER = (int, float)
+
+FIELD_TYPES = (
+    ("application.name", str),
+    ("application.debug", bool),
+    ("application.reload_interval", NUMBER),
+    ("server.host", str),
+    ("server.port", int),
+    ("server.version", str),
+    ("server.workers", int),
+    ("server.threads", int),
+    ("server.max_requests", int),
+    ("server.max_requests_jitter", int),
+    ("server.timeout", NUMBER),
+    ("server.graceful_timeout", NUMBER),
+    ("security.character_list", str),
+    ("security.secret_length", int),
+    ("security.secret_key", str),
+    ("security.jwt_secret_key", str),
+    ("security.key_file", str),
+    ("database.filename", str),
+    ("database.absolute_path", str),
+    ("database.engine.journal_mode", str),
+    ("database.engine.synchronous", str),
+    ("database.engine.cache_size", int),
+    ("database.engine.mmap_size", int),
+    ("database.engine.busy_timeout", int),
+    ("database.engine.pool", str),
+    ("database.engine.pool_size", int),
+    ("database.engine.max_overflow", int),
+    ("database.engine.pool_timeout", NUMBER),
+    ("ratelimiting.default", str),
+    ("ratelimiting.authorization", str),
+    ("ratelimiting.key", str),
+    ("ratelimiting.storage_uri", str),
+    ("ratelimiting.strategy", str),
+    ("cache.revalidate_interval", NUMBER),
+    ("cache.principal_ttl", NUMBER),
+    ("cache.principal_size", int),
+    ("events.check_interval", NUMBER),
+    ("importer.path", str),
+    ("importer.batch_size", int),
+    ("importer.chunk_size", int),
+    ("importer.max_errors", int),
+    ("importer.max_deletion_ratio", NUMBER),
+    ("metrics.enabled", bool),
+    ("metrics.path", str),
+    ("metrics.database", str),
+    ("metrics.flush_interval", NUMBER),
+    ("passwords.rounds", int),
+    ("passwords.workers", int),
+    ("passwords.queue_size", int),
+    ("passwords.timeout", NUMBER),
+    ("passwords.retry_after", int),
+    ("pagination.default_limit", int),
+    ("pagination.max_limit", int),
+    ("pagination.stream_batch", int),
+    ("serialization.backend", str),
+    ("serialization.row_cache_size", int),
+    ("asgi.wsgi_workers", int),
+    ("stream.keepalive", NUMBER),
+    ("stream.retry", int),
+    ("stream.max_subscribers", int),
+    ("stream.reserved_threads", int),
+    ("stream.ticket_ttl", int),
+    ("stream.queue_size", int),
+    ("sync.max_changes", int),
+    ("sync.retention_days", NUMBER),
+    ("tracking.flush_interval", NUMBER),
+    ("tracking.flush_size", int),
+)
+
+
+def at_least(minimum):
+    def validate(value):
+        return value >= minimum, f"has to be at least {minimum}"
+    return validate
+
+
+def one_of(*choices):
+    def validate(value):
+        return str(value).upper() in {choice.upper() for choice in choices}, f"has to be one of {', '.join(choices)}"
+    return validate
+
+
+def is_limit(value):
+    from limits import parse_many
+    try:
+        parse_many(value)
+        return True
+    except ValueError as e:
+        return False, str(e)
+
+
+def is_network(value):
+    from ipaddress import ip_network
+    try:
+        ip_network(value, strict=False)
+        return True
+    except ValueError as e:
+        return False, str(e)
+
+
+FIELD_VALUES = (
+    ("server.port", is_unreserved_port),
+    ("server.workers", at_least(0)),
+    ("server.threads", at_least(1)),
+    ("security.secret_length", at_least(1)),
+    ("database.engine.journal_mode", one_of(*JOURNAL_MODES)),
+    ("database.engine.synchronous", one_of(*SYNCHRONOUS_MODES)),
+    ("database.engine.busy_timeout", at_least(0)),
+    ("database.engine.pool", one_of(*POOL_CLASSES)),
+    ("database.engine.pool_size", at_least(1)),
+    ("database.engine.max_overflow", at_least(-1)),
+    ("database.engine.pool_timeout", at_least(0)),
+    ("ratelimiting.default", is_limit),
+    ("ratelimiting.authorization", is_limit),
+    ("ratelimiting.key", one_of("identity", "address")),
+    ("ratelimiting.strategy", one_of("fixed-window", "fixed-window-elastic-expiry", "moving-window")),
+    ("cache.revalidate_interval", at_least(0)),
+    ("cache.principal_ttl", at_least(0)),
+    ("cache.principal_size", at_least(1)),
+    ("events.check_interval", at_least(1)),
+    ("importer.batch_size", at_least(1)),
+    ("importer.chunk_size", at_least(1)),
+    ("importer.max_errors", at_least(0)),
+    ("importer.max_deletion_ratio", at_least(0)),
+    ("metrics.flush_interval", at_least(0)),
+    ("passwords.rounds", at_least(4)),
+    ("passwords.workers", at_least(1)),
+    ("passwords.queue_size", at_least(0)),
+    ("passwords.timeout", at_least(0)),
+    ("pagination.default_limit", at_least(1)),
+    ("pagination.max_limit", at_least(1)),
+    ("pagination.stream_batch", at_least(1)),
+    ("serialization.backend", one_of("orjson", "json")),
+    ("serialization.row_cache_size", at_least(0)),
+    ("asgi.wsgi_workers", at_least(1)),
+    ("stream.keepalive", at_least(1)),
+    ("stream.max_subscribers", at_least(0)),
+    ("stream.reserved_threads", at_least(0)),
+    ("stream.ticket_ttl", at_least(1)),
+    ("stream.queue_size", at_least(1)),
+    ("sync.max_changes", at_least(1)),
+    ("sync.retention_days", at_least(0)),
+    ("tracking.flush_interval", at_least(0)),
+    ("tracking.flush_size", at_least(1)),
+)
+
+
+class Section:
+    """
+    Read-only view of a configuration section, values are accessed as attributes.\n
+    Nested sections are sections as well, lists become tuples. Missing keys are ``None``.
+    """
+    __slots__ = ("_values",)
+
+    def __init__(self, values: dict):
+        object.__setattr__(self, "_values", MappingProxyType({key: Section.freeze(value)
+                                                              for key, value in values.items()}))
+
+    @staticmethod
+    def freeze(value):
+        if isinstance(value, dict):
+            return Section(value)
+        if isinstance(value, list):
+            return tuple(Section.freeze(item) for item in value)
+        return value
+
+    def __getattr__(self, name: str):
+        try:
+            return self._values[name]
+        except KeyError:
+            if name.startswith("__"):
+                raise AttributeError(name)
+            return None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Configuration is read-only, change the configuration file instead")
+
+    def __contains__(self, name: str):
+        return self._values.get(name) is not None
+
+    def __repr__(self):
+        return f"Section({dict(self._values)!r})"
+
+    def to_dict(self):
+        return {key: value.to_dict() if isinstance(value, Section) else value for key, value in self._values.items()}
+
+
+def apply_defaults(values: dict, defaults: dict = DEFAULTS):
+    """
+    Fills in defaults for keys missing from the configuration, nested sections are merged key by key.
 
-        # Validate data types
-        self.builder.validate_field_type('server.host', str)
-        self.builder.validate_field_type('server.port', int)
-        self.builder.validate_field_type('server.version', str)
+    :param values: Dictionary, parsed configuration
+    :param defaults: Dictionary, defaults
+    :return: List of defaulted keys
+    """
+    defaulted = []
+    for key, default in defaults.items():
+        if isinstance(default, dict) and default and isinstance(values.get(key), dict):
+            defaulted.extend(f"{key}.{name}" for name in apply_defaults(values[key], default))
+        elif key not in values:
+            values[key] = deepcopy(default)
+            defaulted.append(key)
+    return defaulted
 
-        # Validate data values
-        self.builder.validate_field_value('server.port', is_unreserved_port)
 
-        # Parse if all valid
-        self.config = self.builder.parse_config(self.path)
+def apply_environment(values: dict, environment=environ):
+    """
+    Overrides configuration values with ``ORDERSERVER_`` environment variables.\n
+    Values are decoded as JSON where possible, so numbers and booleans keep their type.
+
+    :param values: Dictionary, parsed configuration
+    :param environment: Mapping of environment variables
+    :return: List of overridden keys
+    """
+    overridden = []
+    for name, raw in sorted(environment.items()):
+        if not name.startswith(ENV_PREFIX) or len(name) == len(ENV_PREFIX):
+            continue
+        keys = name[len(ENV_PREFIX):].lower().split("__")
+        try:
+            value = loads(raw)
+        except JSONDecodeError:
+            value = raw
+
+        section = values
+        for key in keys[:-1]:
+            if not isinstance(section.get(key), dict):
+                section[key] = {}
+            section = section[key]
+        section[keys[-1]] = value
+        overridden.append(".".join(keys))
+    return overridden
+
+
+def validate(values: dict):
+    """
+    Validates the types and values of a configuration, ``FIELD_TYPES`` and ``FIELD_VALUES``.\n
+    Booleans are rejected where numbers are expected, limits per blueprint and route have to parse.
+
+    :param values: Dictionary, configuration with defaults and environment overrides applied
+    :return: Nothing, raises an ``AssertionError`` for the first invalid value
+    """
+    # A new builder every time, validators would accumulate on a shared one
+    builder = ConfigBuilder()
+    for field, field_type in FIELD_TYPES:
+        builder.validate_field_type(field, field_type)
+        if field_type is int or field_type is NUMBER:
+            builder.validate_field_value(field, lambda value: not isinstance(value, bool))
+    for field, validator in FIELD_VALUES:
+        builder.validate_field_value(field, validator)
+    builder.parse_config(values)
+
+    ratelimiting = values.get("ratelimiting") or {}
+    for section in ("blueprints", "routes"):
+        limits = ratelimiting.get(section) or {}
+        assert isinstance(limits, dict), f'Config field "ratelimiting.{section}" is not a mapping'
+        for name, value in limits.items():
+            valid = is_limit(value) if isinstance(value, str) else (False, "is not a string")
+            assert valid is True, f'Config field "ratelimiting.{section}.{name}" with value "{value}": {valid[1]}'
+
+    allowed = (values.get("metrics") or {}).get("allowed") or []
+    for value in allowed:
+        valid = is_network(value) if isinstance(value, str) else (False, "is not a string")
+        assert valid is True, f'Config field "metrics.allowed" with value "{value}": {valid[1]}'
+
+
+def parse_snapshot(path: str):
+    """
+    Parses and validates the configuration file, with environment overrides applied.
+
+    :param path: Path to the configuration file
+    :return: Section
+    """
+    with open(path, "r", encoding="UTF-8") as handle:
+        values = load(handle)
+    defaulted = apply_defaults(values)
+    if defaulted:
+        logger.debug(f"Configuration defaults used: {', '.join(defaulted)}")
+    overridden = apply_environment(values)
+    if overridden:
+        logger.info(f"Configuration overridden by the environment: {', '.join(overridden)}")
+
+    validate(values)
+    return Section(values)
+
+
+class LiveConfig:
+    """
+    Current configuration snapshot of a file, replaced when the file changes.\n
+    Attribute access reads the current snapshot, a changed file is picked up within ``application.reload_interval``
+    seconds without a restart. An invalid change is logged and the previous snapshot is kept.\n
+    Values read at import or startup, e.g. database paths or worker counts, still require a restart.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = Lock()
+        self._mtime = self.modified()
+        self._snapshot = parse_snapshot(path)
+        self._checked = monotonic()
+
+    def modified(self):
+        try:
+            result = stat(self._path)
+            return result.st_mtime_ns, result.st_size
+        except OSError:
+            return None
+
+    def snapshot(self):
+        """
+        Retrieves the current snapshot, checking the file for changes at most once per reload interval.
+
+        :return: Section
+        """
+        snapshot = self._snapshot
+        interval = snapshot.application.reload_interval if snapshot.application is not None else None
+        interval = DEFAULT_RELOAD_INTERVAL if interval is None else interval
+        if interval <= 0 or monotonic() - self._checked < interval:
+            return snapshot
+
+        # Another thread checking the file serves the current snapshot meanwhile
+        if not self._lock.acquire(blocking=False):
+            return snapshot
+        try:
+            self._checked = monotonic()
+            modified = self.modified()
+            if modified is not None and modified != self._mtime:
+                self._mtime = modified
+                self.reload()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def reload(self):
+        try:
+            self._snapshot = parse_snapshot(self._path)
+            logger.info(f"Reloaded configuration from {self._path}")
+        except (OSError, ValueError, TypeError, AssertionError, AttributeError) as e:
+            logger.error(f"Keeping previous configuration, failed to reload {self._path}: {e}")
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.snapshot(), name)
+
+    def __contains__(self, name: str):
+        return name in self.snapshot()
+
+    def to_dict(self):
+        return self.snapshot().to_dict()
+
+
+# Parsed configurations per absolute path, shared by every module of the process
+_configs = {}
+_configs_lock = Lock()
+
+
+class Config:
+    """
+    Retrieves the configuration, the file is parsed once per process and reloaded when it changes.
+    """
+
+    def __init__(self, path: str = "./config.json", builder: ConfigBuilder = None):
+        self.path = path
+        # Kept for compatibility, validation always uses a new builder
+        self.builder = builder
+        self.config = self.get_config()
 
     def get_config(self):
-        self.config = self.builder.parse_config(self.path)
-        return self.config
+        key = os_path.abspath(self.path)
+        config = _configs.get(key)
+        if config is None:
+            with _configs_lock:
+                config = _configs.get(key)
+                if config is None:
+                    config = _configs[key] = LiveConfig(key)
+        return config
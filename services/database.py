@@ -1,30 +1,110 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, pool
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
-from services.config import Config
-
-from bcrypt import hashpw, gensalt
+from services.config import JOURNAL_MODES, SYNCHRONOUS_MODES, Config
+from services.passwords import PasswordPool
+from services.versioning import track_sessions
 
 config = Config().get_config()
-engine = create_engine(f"sqlite:///{config.database.absolute_path}",
-                       convert_unicode=True, connect_args={"check_same_thread": False})
+
+
+def engine_pragmas(profile):
+    """
+    Creates the pragma statements of a ``database.engine`` profile.\n
+    Modes are checked against ``JOURNAL_MODES`` and ``SYNCHRONOUS_MODES``, numbers have to be integers,
+    nothing else from the configuration reaches the statements.
+
+    :param profile: Section, ``database.engine``
+    :return: List of strings, statements
+    """
+    journal_mode = str(profile.journal_mode).upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Unknown journal mode <{profile.journal_mode}>, expected one of {', '.join(JOURNAL_MODES)}")
+    synchronous = str(profile.synchronous).upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown synchronous mode <{profile.synchronous}>, "
+                         f"expected one of {', '.join(SYNCHRONOUS_MODES)}")
+
+    statements = [f"PRAGMA journal_mode={journal_mode}", f"PRAGMA synchronous={synchronous}"]
+    for name in ("cache_size", "mmap_size", "busy_timeout"):
+        value = getattr(profile, name)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"Expected an integer for database.engine.{name}, got <{value}>")
+        statements.append(f"PRAGMA {name}={value}")
+    return statements
+
+
+def apply_pragmas(connection, record=None):
+    """
+    Applies the pragmas of the ``database.engine`` profile to a new DBAPI connection.\n
+    Used as ``connect`` event hook, by both the synchronous and the asynchronous engine.
+
+    :param connection: DBAPI connection
+    :param record: Connection pool record
+    :return: Nothing
+    """
+    cursor = connection.cursor()
+    for statement in engine_pragmas(config.database.engine):
+        cursor.execute(statement)
+    cursor.close()
+
+
+def create_configured_engine(url: str = f"sqlite:///{config.database.absolute_path}"):
+    """
+    Creates the SQLite engine using the ``database.engine`` profile from the configuration.\n
+    The pool class and size are passed to the engine, pragmas are applied on every new connection.
+
+    :param url: Database URL
+    :return: Engine
+    """
+    profile = config.database.engine
+    # Fails at startup rather than on the first connection
+    engine_pragmas(profile)
+
+    pool_class = getattr(pool, profile.pool, None)
+    if pool_class is None:
+        raise ValueError(f"Unknown pool class <{profile.pool}>")
+
+    options = {"poolclass": pool_class}
+    if pool_class is pool.QueuePool:
+        options.update(pool_size=profile.pool_size, max_overflow=profile.max_overflow,
+                       pool_timeout=profile.pool_timeout)
+
+    result = create_engine(url, convert_unicode=True, connect_args={"check_same_thread": False}, **options)
+
+    event.listen(result, "connect", apply_pragmas)
+    return result
+
+
+engine = create_configured_engine()
 db_session = scoped_session(sessionmaker(autocommit=False,
                                          autoflush=False,
                                          bind=engine))
+track_sessions(db_session)
 Base = declarative_base()
 Base.query = db_session.query_property()
 
 
-def init_db():
-    from models import user, product, order, event, data
-    user = user.User(name="Example Administrator", username="admin", email="admin@administrator.com", admin=True,
-                     password=hashpw(b'admin', gensalt()).decode("UTF-8"), address="Example", phone_number="0612345678",
-                     postal_code="1234AB")
-    event = event.Event()
-    data = data.Data()
+def init_db(users: bool = True, events: bool = True, data: bool = True):
+    """
+    Creates the tables and seeds the given ones with their initial row.\n
+    The administrator password is only hashed when the administrator is actually created.
+
+    :param users: Create the default administrator
+    :param events: Create an initial event
+    :param data: Create the change tracking row
+    :return: Nothing
+    """
+    from models import user, product, order, event, data as data_model, change, ticket
     Base.metadata.create_all(bind=engine)
-    db_session.add(user)
-    db_session.add(event)
-    db_session.add(data)
+
+    if data:
+        db_session.add(data_model.Data())
+    if users:
+        db_session.add(user.User(name="Example Administrator", username="admin", email="admin@administrator.com",
+                                 admin=True, password=PasswordPool.hash("admin"), address="Example",
+                                 phone_number="0612345678", postal_code="1234AB"))
+    if events:
+        db_session.add(event.Event())
     db_session.commit()
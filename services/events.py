@@ -0,0 +1,167 @@
+from sqlalchemy import and_, select
+
+from models.event import Event
+from models.order import Order
+from services.cache import DataSnapshot, data_snapshot
+from services.changes import ChangeLog
+from services.config import Config
+from services.metrics import record_cache
+from services.database import db_session, engine
+from services.versioning import bump, publish
+from services.views import View
+
+from dataclasses import fields
+from datetime import datetime
+from logging import getLogger
+from os import getpid
+from threading import Lock, Thread
+from time import sleep
+
+config = Config().get_config()
+logger = getLogger(__name__)
+
+event_view = View(Event, [field.name for field in fields(Event)])
+
+
+class ActiveEventCache:
+    """
+    In-process copy of the active event, reloaded when ``Data.events_version`` changes.\n
+    The cached event is a transient ``Event``, it is never attached to a session and safe to share between threads.
+    """
+
+    def __init__(self, snapshot: DataSnapshot):
+        self._snapshot = snapshot
+        self._lock = Lock()
+        self._state = None
+
+    @staticmethod
+    def _load():
+        row = event_view.first(event_view.query().filter(Event.active.is_(True)).order_by(Event.id))
+        return Event(**row) if row is not None else None
+
+    def _current(self):
+        version = self._snapshot.get().get("events_version")
+        state = self._state
+        record_cache("active_event", state is not None and state[0] == version)
+        if state is None or state[0] != version:
+            with self._lock:
+                if self._state is None or self._state[0] != version:
+                    self._state = (version, self._load())
+                state = self._state
+        return state[1]
+
+    def cached(self, version):
+        """
+        Checks whether the cached event belongs to the given events version, so reading it is free.
+
+        :param version: Events version
+        :return: Boolean
+        """
+        state = self._state
+        return state is not None and state[0] == version
+
+    def get(self):
+        """
+        Returns the active event, or ``None`` if there is none or it has ended.\n
+        Doesn't touch the database while the events are unchanged.
+
+        :return: Event
+        """
+        event = self._current()
+        if event is not None and event.until <= datetime.utcnow():
+            return None
+        return event
+
+    def validators(self):
+        """
+        Describes the active event for the validators of responses depending on it, see ``conditional()``.\n
+        Events end by the clock before the scheduler deactivates them and bumps the events version,
+        so the key changes once ``until`` passes, and ``until`` counts as a modification.
+
+        :return: Tuple, (key, last modified datetime or ``None``)
+        """
+        event = self._current()
+        if event is None:
+            return "none", None
+        if event.until <= datetime.utcnow():
+            return f"ended:{event.uuid}", event.until
+        return event.uuid, None
+
+    def invalidate(self):
+        """
+        Drops the cached event.
+
+        :return: Nothing
+        """
+        with self._lock:
+            self._state = None
+
+
+class EventScheduler:
+    """
+    Background worker enforcing event deadlines, every ``events.check_interval`` seconds.\n
+    Orders of events past their ``deadline`` are marked expired, events past ``until`` are deactivated.\n
+    Also prunes the change log past its retention.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._worker = None
+        self._pid = None
+
+    def ensure_started(self):
+        """
+        Starts the worker in the current process, if it isn't running yet.\n
+        Called once by ``create_app()``, forked workers share the one of the process that created the application.
+
+        :return: Nothing
+        """
+        if self._worker is not None and self._pid == getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == getpid():
+                return
+            self._pid = getpid()
+            self._worker = Thread(target=self._run, name="event-scheduler", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.check()
+                with engine.begin() as connection:
+                    ChangeLog.prune(connection)
+            except Exception as e:
+                logger.error(f"Failed to check event deadlines: {e}")
+            finally:
+                db_session.remove()
+            sleep(config.events.check_interval)
+
+    @staticmethod
+    def check(now: datetime = None):
+        """
+        Expires orders and deactivates events that passed their deadline or end.
+
+        :param now: Current datetime, defaults to ``datetime.utcnow()``
+        :return: Tuple, (amount of orders expired, amount of events deactivated)
+        """
+        now = now or datetime.utcnow()
+        orders, events = Order.__table__, Event.__table__
+
+        with engine.begin() as connection:
+            passed = select(events.c.uuid).where(events.c.deadline <= now)
+            expiring = and_(orders.c.expired.is_(False), orders.c.event.in_(passed))
+            ending = and_(events.c.active.is_(True), events.c.until <= now)
+
+            ChangeLog.record_select(connection, Order, "update", expiring, now)
+            expired = connection.execute(orders.update().where(expiring).values(expired=True)).rowcount
+            ChangeLog.record_select(connection, Event, "update", ending, now)
+            ended = connection.execute(events.update().where(ending).values(active=False)).rowcount
+            changes = bump(connection, *[model for model, count in (("orders", expired), ("events", ended)) if count])
+
+        publish(changes)
+        return expired, ended
+
+
+event_scheduler = EventScheduler()
+active_event = ActiveEventCache(data_snapshot)
@@ -0,0 +1,288 @@
+from sqlalchemy import func, select
+
+from models.event import Event
+from models.order import Order
+from models.product import Product
+from models.user import User
+from services.changes import ChangeLog
+from services.database import engine
+from services.passwords import PasswordPool
+from services.versioning import bump, publish
+
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+from random import Random
+from string import ascii_uppercase
+from time import perf_counter
+from uuid import UUID
+
+FIRST_NAMES = ("Anna", "Bram", "Daan", "Emma", "Fleur", "Finn", "Julia", "Lars", "Lotte", "Luuk", "Milan", "Noah",
+               "Sanne", "Sem", "Sophie", "Thijs", "Tess", "Lucas", "Eva", "Jesse")
+LAST_NAMES = ("Jansen", "Visser", "Smit", "Bakker", "Meijer", "Mulder", "Bos", "Vos", "Peters", "Hendriks", "Dekker",
+              "Brouwer", "Koster", "Prins", "Kok", "Willems", "Maas", "Schouten", "Verbeek", "Kuipers")
+STREETS = ("Kerkstraat", "Schoolstraat", "Molenweg", "Dorpsstraat", "Stationsweg", "Nieuwstraat", "Julianastraat",
+           "Beatrixlaan", "Parallelweg", "Industrieweg", "Wilhelminastraat", "Eikenlaan", "Marktplein", "Havenkade")
+COUNTRIES = ("NL", "NL", "NL", "NL", "BE", "DE")
+BRANDS = ("Huismerk", "Verkade", "Calvé", "Unox", "Lay's", "Milka", "Campina", "Chiquita", "Lipton", "Coca-Cola")
+ALLERGENS = ("gluten", "milk", "eggs", "nuts", "peanuts", "soy", "celery", "mustard", "sesame", "lupin")
+INGREDIENTS = ("water", "sugar", "salt", "wheat flour", "sunflower oil", "milk powder", "cocoa", "yeast", "vinegar",
+               "potato", "tomato", "rice", "oats", "corn", "honey", "butter")
+NUTRI_SCORES = ("A", "B", "C", "D", "E")
+
+# Categories with their price range, and energy/fat/carbohydrates/proteins profile per 100g
+CATEGORIES = {
+    "Bread": ((0.9, 3.5), (250, 3, 45, 9)),
+    "Dairy": ((0.6, 3.0), (60, 3, 5, 3)),
+    "Snacks": ((0.8, 3.5), (520, 30, 55, 6)),
+    "Candy": ((0.5, 2.5), (450, 20, 65, 5)),
+    "Drinks": ((0.5, 2.5), (40, 0, 10, 0)),
+    "Fruit": ((0.3, 3.0), (55, 0, 12, 1)),
+    "Spreads": ((1.0, 4.0), (400, 25, 40, 5)),
+    "Soup": ((1.0, 3.5), (45, 2, 5, 2)),
+}
+
+# Relative frequency of basket sizes, mostly small orders
+BASKET_SIZES = (1, 2, 3, 4, 5, 6, 8)
+BASKET_WEIGHTS = (20, 30, 22, 13, 8, 5, 2)
+
+# Unique columns generated values must stay clear of
+UNIQUE_USER_COLUMNS = ("username", "name", "email", "phone_number", "address", "postal_code")
+
+
+class DataGenerator:
+    """
+    Deterministic bulk generator of users, products, events and orders.\n
+    Rows are built as plain dictionaries and inserted with ``executemany`` in ``batch_size`` batches,
+    all within a single transaction. The same seed always produces the same dataset.\n
+    Inserted products, events and orders are recorded in the change log with one ``INSERT ... SELECT`` per table.
+    """
+
+    def __init__(self, seed: int = 0, batch_size: int = 10000):
+        self.random = Random(seed)
+        self.batch_size = batch_size
+
+    def uuid(self):
+        return str(UUID(int=self.random.getrandbits(128), version=4))
+
+    @staticmethod
+    def postal_code(number: int):
+        # Unique for the first 9000 * 26 * 26 users
+        digits, letters = 1000 + number % 9000, number // 9000
+        return f"{digits}{ascii_uppercase[letters // 26 % 26]}{ascii_uppercase[letters % 26]}"
+
+    def users(self, count: int, start: int = 0, password: str = "password", taken: dict = None):
+        """
+        Generates users with unique names, usernames, e-mail addresses, phone numbers, addresses and postal codes.\n
+        Every user shares one password hash, so bcrypt runs only once.
+        Numbers producing a value that already exists, e.g. the postal code of the seeded administrator, are skipped.
+
+        :param count: Amount of users
+        :param start: Offset of the generated numbers, to stay clear of users generated before
+        :param password: Password of every user
+        :param taken: Dictionary of unique columns to sets of existing values
+        :return: Generator of dictionaries
+        """
+        random, hashed, now = self.random, PasswordPool.hash(password), datetime.utcnow()
+        taken = taken or {}
+        number, generated = start, 0
+        while generated < count:
+            first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+            username = f"{first.lower()}.{last.lower()}{number}"
+            user = {
+                "uuid": self.uuid(), "username": username, "name": f"{first} {last}-{number}",
+                "email": f"{username}@example.com", "phone_number": f"06{number:08d}",
+                "address": f"{STREETS[number % len(STREETS)]} {number // len(STREETS) + 1}",
+                "postal_code": self.postal_code(number), "created_at": now - timedelta(days=random.randrange(730)),
+                "country": random.choice(COUNTRIES), "flags": [], "admin": False, "password": hashed,
+                "secret": f"{random.getrandbits(64):016x}{number:x}", "token": None, "tags": [], "login_count": 0,
+            }
+            number += 1
+            if any(user[column] in values for column, values in taken.items()):
+                continue
+            generated += 1
+            yield user
+
+    def products(self, count: int, start: int = 0, taken: set = None):
+        """
+        Generates products spread over the categories, with prices and nutrition values per category.
+
+        :param count: Amount of products
+        :param start: Offset of the generated numbers, to stay clear of products generated before
+        :param taken: Set of existing product names, skipped
+        :return: Generator of dictionaries
+        """
+        random, categories = self.random, list(CATEGORIES.items())
+
+        def vary(value):
+            return round(value * random.uniform(0.7, 1.3), 1)
+
+        taken = taken or set()
+        number, generated = start, 0
+        while generated < count:
+            category, ((low, high), (energy, fat, carbohydrates, proteins)) = categories[number % len(categories)]
+            brand = random.choice(BRANDS)
+            name = f"{brand} {category} {number}"
+            number += 1
+            if name in taken:
+                continue
+            generated += 1
+            fat_value, carbohydrates_value = vary(fat), vary(carbohydrates)
+            saturated = round(fat_value * random.uniform(0.1, 0.6), 1)
+            yield {
+                "uuid": self.uuid(), "name": name, "brand": brand, "price": round(random.uniform(low, high), 2),
+                "category": category, "description": f"{category} by {brand}", "image": "null",
+                "image_path": f"/static/images/products/{category.lower()}/{brand.lower()}-{number}.jpg",
+                "original_link": "", "nutri_score": random.choice(NUTRI_SCORES),
+                "quantity": f"{random.choice((100, 250, 500, 1000))}{'ml' if category == 'Drinks' else 'g'}",
+                "allergens": random.sample(ALLERGENS, random.choice((0, 0, 1, 1, 2, 3))),
+                "ingredients": random.sample(INGREDIENTS, random.randint(1, 6)),
+                "energy": vary(energy), "fat": fat_value, "saturated_fat": saturated,
+                "unsaturated_fat": round(fat_value - saturated, 1), "carbohydrates": carbohydrates_value,
+                "sugars": round(carbohydrates_value * random.uniform(0.05, 0.7), 1),
+                "fiber": round(random.uniform(0, 8), 1), "proteins": vary(proteins),
+                "salt": round(random.uniform(0, 2.5), 2), "extra": [],
+            }
+
+    def events(self, count: int, now: datetime = None):
+        """
+        Generates weekly events, every event but the last one has ended, the last one is active.
+
+        :param count: Amount of events
+        :param now: Current datetime
+        :return: List of dictionaries
+        """
+        now = now or datetime.utcnow()
+        result = []
+        for index in range(count):
+            created = now - timedelta(weeks=count - 1 - index, days=1)
+            active = index == count - 1
+            result.append({
+                "uuid": self.uuid(), "active": active, "created_at": created,
+                "until": created + timedelta(days=8 if active else 7),
+                "deadline": created + timedelta(days=5 if active else 4),
+                "max_order_price": self.random.choice((15.0, 20.0, 25.0)),
+            })
+        return result
+
+    def orders(self, events, users, products, participation: float = 0.6):
+        """
+        Generates at most one order per user per event, with baskets favouring popular products.\n
+        Baskets are trimmed to the maximum order price of their event.
+
+        :param events: Events, as generated by ``events()``
+        :param users: UUIDs of users
+        :param products: Tuples of product UUID and price
+        :param participation: Fraction of users ordering per event
+        :return: Generator of dictionaries
+        """
+        random = self.random
+        # Zipf-like popularity, the first products are ordered the most
+        weights = list(accumulate(1 / (rank + 1) for rank in range(len(products))))
+        sizes = list(accumulate(BASKET_WEIGHTS))
+
+        for event in events:
+            for user in random.sample(users, int(len(users) * participation)):
+                basket = random.choices(products, cum_weights=weights, k=random.choices(BASKET_SIZES,
+                                                                                       cum_weights=sizes)[0])
+                total = 0.0
+                items = []
+                for uuid, price in basket:
+                    if total + price <= event["max_order_price"]:
+                        items.append(uuid)
+                        total += price
+                if not items:
+                    continue
+                created = event["created_at"] + timedelta(minutes=random.randrange(60 * 24 * 4))
+                yield {
+                    "uuid": self.uuid(), "user": user, "products": items, "total_price": round(total, 2),
+                    "notes": None, "event": event["uuid"], "created_at": created, "last_changed_at": created,
+                    "expired": not event["active"], "completed": not event["active"],
+                }
+
+    @staticmethod
+    def existing(connection, model, *columns):
+        """
+        Reads the existing values of unique columns, generated rows must not reuse them.
+
+        :param connection: Connection within the transaction
+        :param model: Model
+        :param columns: Column names
+        :return: Dictionary, column names to sets of values
+        """
+        result = {column: set() for column in columns}
+        for row in connection.execute(select(*[getattr(model, column) for column in columns])):
+            for column, value in zip(columns, row):
+                result[column].add(value)
+        return result
+
+    def insert(self, connection, table, rows):
+        """
+        Inserts rows in ``executemany`` batches.
+
+        :param connection: Connection within a transaction
+        :param table: Table
+        :param rows: Iterable of dictionaries
+        :return: Integer, amount of rows inserted
+        """
+        rows, count = iter(rows), 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return count
+            connection.execute(table.insert(), batch)
+            count += len(batch)
+
+    def run(self, users: int = 0, products: int = 0, events: int = 0, participation: float = 0.6,
+            password: str = "password"):
+        """
+        Generates and inserts a dataset in a single transaction, and marks every affected table as changed.\n
+        Orders are generated for the new events, from all users and products in the database.
+
+        :param users: Amount of users
+        :param products: Amount of products
+        :param events: Amount of events
+        :param participation: Fraction of users ordering per event
+        :param password: Password of every generated user
+        :return: Dictionary, report with counts and throughput
+        """
+        start, now = perf_counter(), datetime.utcnow()
+        report = {"users": 0, "products": 0, "events": 0, "orders": 0}
+
+        with engine.begin() as connection:
+            offsets = {model: connection.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+                       for model in (User, Product, Event, Order)}
+
+            taken_users = self.existing(connection, User, *UNIQUE_USER_COLUMNS) if users else {}
+            taken_products = self.existing(connection, Product, "name")["name"] if products else set()
+
+            report["users"] = self.insert(connection, User.__table__,
+                                          self.users(users, offsets[User], password, taken_users))
+            report["products"] = self.insert(connection, Product.__table__,
+                                             self.products(products, offsets[Product], taken_products))
+
+            generated = self.events(events, now)
+            if generated:
+                # Only a single event is active at a time
+                ChangeLog.record_select(connection, Event, "update", Event.active.is_(True), now)
+                connection.execute(Event.__table__.update().where(Event.active.is_(True)).values(active=False))
+            report["events"] = self.insert(connection, Event.__table__, generated)
+
+            user_uuids = connection.execute(select(User.uuid).order_by(User.id)).scalars().all()
+            product_prices = [tuple(row) for row in connection.execute(select(Product.uuid, Product.price)
+                                                                       .order_by(Product.id))]
+            if user_uuids and product_prices:
+                report["orders"] = self.insert(connection, Order.__table__,
+                                               self.orders(generated, user_uuids, product_prices, participation))
+
+            for model in (Product, Event, Order):
+                if report[model.__tracked__]:
+                    ChangeLog.record_select(connection, model, "insert", model.id > offsets[model], now)
+
+            changes = bump(connection, *[table for table, count in report.items() if count], time=now)
+        publish(changes)
+
+        elapsed = perf_counter() - start
+        total = sum(report.values())
+        report["time"] = f"{round(elapsed * 1000, 2)}ms"
+        report["throughput"] = f"{round(total / elapsed, 2) if elapsed else 0} rows/s"
+        return report
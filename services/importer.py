@@ -0,0 +1,240 @@
+from sqlalchemy import JSON, Float, String, bindparam, select
+
+from models.product import Product
+from services.config import Config
+from services.changes import ChangeLog
+from services.database import engine
+from services.versioning import bump, publish
+
+from json import JSONDecoder, JSONDecodeError
+from time import perf_counter
+from uuid import uuid4
+
+config = Config().get_config()
+
+# Natural key products are matched on, and columns that are never imported
+NATURAL_KEY = "name"
+SKIPPED_COLUMNS = ("id", "uuid")
+WHITESPACE = " \t\n\r,"
+
+
+class ProductImporter:
+    """
+    Streaming, transactional product catalog importer.\n
+    Parses the catalog incrementally, validates every row against the ``Product`` table,
+    and upserts by product name in ``executemany`` batches.\n
+    Products that didn't change keep their row and UUID, products missing from the catalog are removed,
+    unless the catalog has invalid rows, is empty, or would remove more than ``importer.max_deletion_ratio``
+    of the products. ``force`` removes them regardless.
+    """
+
+    def __init__(self, batch_size: int = None, chunk_size: int = None):
+        self.batch_size = batch_size or config.importer.batch_size
+        self.chunk_size = chunk_size or config.importer.chunk_size
+        self.table = Product.__table__
+        self.columns = [column for column in self.table.columns if column.name not in SKIPPED_COLUMNS]
+
+    def iterate(self, handle):
+        """
+        Yields every object of the product array, without loading the whole file.\n
+        Accepts ``{"products": [...]}`` as well as a plain array.
+
+        :param handle: Text file handle
+        :return: Generator of dictionaries
+        """
+        decoder = JSONDecoder()
+        buffer = handle.read(self.chunk_size)
+
+        # Locate the start of the array
+        while True:
+            stripped = buffer.lstrip()
+            if stripped.startswith("["):
+                position = len(buffer) - len(stripped) + 1
+                break
+            key = buffer.find('"products"')
+            start = buffer.find("[", key) if key != -1 else -1
+            if start != -1:
+                position = start + 1
+                break
+            more = handle.read(self.chunk_size)
+            if not more:
+                raise ValueError("No product array found")
+            buffer += more
+
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+
+            try:
+                if position >= len(buffer):
+                    raise JSONDecodeError("Unexpected end of buffer", buffer, position)
+                value, position = decoder.raw_decode(buffer, position)
+            except JSONDecodeError:
+                more = handle.read(self.chunk_size)
+                if not more:
+                    raise ValueError(f"Malformed product array near character {position}")
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+
+            yield value
+
+            # Drop consumed input, keeping memory bound to a few chunks
+            if position > self.chunk_size:
+                buffer = buffer[position:]
+                position = 0
+
+    def validate(self, row):
+        """
+        Validates a row against the ``Product`` table.\n
+        Returns the values to store and ``None``, or ``None`` and an error message.
+
+        :param row: Dictionary, parsed product
+        :return: Tuple, (dictionary, error)
+        """
+        if not isinstance(row, dict):
+            return None, f"Expected object, instead got {type(row)}"
+
+        values = {}
+        for column in self.columns:
+            value = row.get(column.name, None)
+            if value is None:
+                if not column.nullable:
+                    return None, f"Field <{column.name}> is required"
+                values[column.name] = None
+                continue
+
+            if isinstance(column.type, Float):
+                valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+                value = float(value) if valid else value
+            elif isinstance(column.type, String):
+                valid = isinstance(value, str)
+            elif isinstance(column.type, JSON):
+                valid = isinstance(value, (list, dict))
+            else:
+                valid = True
+            if not valid:
+                return None, f"Field <{column.name}> has invalid type {type(value)}"
+            values[column.name] = value
+
+        if values["nutri_score"] is not None:
+            values["nutri_score"] = values["nutri_score"].upper()
+
+        uuid = row.get("uuid", None)
+        if uuid is not None and not isinstance(uuid, str):
+            return None, f"Field <uuid> has invalid type {type(uuid)}"
+        values["uuid"] = uuid
+        return values, None
+
+    def deletion_refused(self, report, seen, existing, removed, force=False):
+        """
+        Checks whether products missing from the catalog must be kept.
+
+        :param report: Dictionary, report of the import so far
+        :param seen: Set, names of the valid catalog rows
+        :param existing: Dictionary, products before the import by name
+        :param removed: List, products missing from the catalog
+        :param force: Remove them regardless
+        :return: String, the reason, or ``None`` if they are removed
+        """
+        if force or not removed:
+            return None
+        # A product of an invalid row may still be meant to exist, so only complete catalogs remove products
+        if report["invalid"] > 0:
+            return "The catalog has invalid rows"
+        if not seen:
+            return "The catalog is empty"
+        ratio = config.importer.max_deletion_ratio
+        if ratio is not None and len(removed) > ratio * len(existing):
+            return f"Removing {len(removed)} of {len(existing)} products exceeds importer.max_deletion_ratio"
+        return None
+
+    def run(self, path: str, force: bool = False):
+        """
+        Imports the catalog at the given path in a single transaction, which also increments the products version.\n
+        Returns a report with counts, throughput and the first validation errors.
+
+        :param path: Path to the catalog file
+        :param force: Remove products missing from the catalog, even if it looks incomplete
+        :return: Dictionary, report
+        """
+        start = perf_counter()
+        report = {"read": 0, "inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "invalid": 0, "errors": []}
+
+        names = [column.name for column in self.columns]
+        insert_statement = self.table.insert()
+        update_statement = self.table.update().where(self.table.c.id == bindparam("b_id"))
+
+        with engine.begin() as connection:
+            existing = {row._mapping[NATURAL_KEY]: dict(row._mapping)
+                        for row in connection.execute(select(self.table))}
+            # Product names by UUID, catalog UUIDs must not take over the UUID of another product
+            owners = {current["uuid"]: name for name, current in existing.items()}
+            seen = set()
+            inserts, updates, changed = [], [], []
+
+            def flush(final=False):
+                if inserts and (final or len(inserts) >= self.batch_size):
+                    connection.execute(insert_statement, inserts)
+                    inserts.clear()
+                if updates and (final or len(updates) >= self.batch_size):
+                    connection.execute(update_statement, updates)
+                    updates.clear()
+
+            with open(path, "r", encoding="UTF-8") as handle:
+                for index, row in enumerate(self.iterate(handle)):
+                    report["read"] += 1
+                    values, error = self.validate(row)
+                    if error is None and values[NATURAL_KEY] in seen:
+                        error = f"Duplicate product <{values[NATURAL_KEY]}>"
+                    if error is None and values["uuid"] is not None and \
+                            owners.setdefault(values["uuid"], values[NATURAL_KEY]) != values[NATURAL_KEY]:
+                        error = f"UUID <{values['uuid']}> belongs to product <{owners[values['uuid']]}>"
+                    if error is not None:
+                        report["invalid"] += 1
+                        if len(report["errors"]) < config.importer.max_errors:
+                            report["errors"].append({"index": index, "error": error})
+                        continue
+                    seen.add(values[NATURAL_KEY])
+
+                    current = existing.get(values[NATURAL_KEY])
+                    if current is None:
+                        values["uuid"] = values["uuid"] or str(uuid4())
+                        inserts.append(values)
+                        changed.append((values["uuid"], "insert", None))
+                        report["inserted"] += 1
+                    elif any(current[name] != values[name] for name in names):
+                        values = {name: values[name] for name in names}
+                        values["b_id"] = current["id"]
+                        updates.append(values)
+                        changed.append((current["uuid"], "update", None))
+                        report["updated"] += 1
+                    else:
+                        report["unchanged"] += 1
+                    flush()
+            flush(final=True)
+
+            removed = [current for name, current in existing.items() if name not in seen]
+            reason = self.deletion_refused(report, seen, existing, removed, force)
+            report["deletion_skipped"] = reason is not None
+            if reason is not None:
+                report["deletion_skipped_reason"] = reason
+                removed = []
+            changed.extend((current["uuid"], "delete", None) for current in removed)
+            removed = [{"b_id": current["id"]} for current in removed]
+            if removed:
+                connection.execute(self.table.delete().where(self.table.c.id == bindparam("b_id")), removed)
+            report["deleted"] = len(removed)
+
+            changes = {}
+            if changed:
+                ChangeLog.record(connection, "products", changed)
+                changes = bump(connection, "products")
+
+        publish(changes)
+        elapsed = perf_counter() - start
+        report["time"] = f"{round(elapsed * 1000, 2)}ms"
+        report["throughput"] = f"{round(report['read'] / elapsed, 2) if elapsed else 0} rows/s"
+        return report
@@ -0,0 +1,60 @@
+from services.config import Config
+
+from json import dump, load
+from os import fdopen, link, makedirs, path, unlink
+from secrets import token_urlsafe
+from tempfile import mkstemp
+
+config = Config().get_config()
+
+# Signing keys kept in the key file, every worker process must sign with the same ones
+KEYS = ("secret_key", "jwt_secret_key")
+
+
+def generate_keys():
+    return {name: token_urlsafe(32) for name in KEYS}
+
+
+def create_key_file(key_path: str):
+    """
+    Creates the key file with new signing keys, unless another process created it first.\n
+    The keys are written to a temporary file which is then linked into place,
+    so readers never observe a partially written file and exactly one process wins.
+
+    :param key_path: Path of the key file
+    :return: Nothing
+    """
+    directory = path.dirname(path.abspath(key_path))
+    makedirs(directory, exist_ok=True)
+
+    descriptor, temporary = mkstemp(dir=directory, prefix=".keys-")
+    try:
+        with fdopen(descriptor, "w", encoding="UTF-8") as handle:
+            dump(generate_keys(), handle)
+        link(temporary, key_path)
+    except FileExistsError:
+        pass
+    finally:
+        unlink(temporary)
+
+
+def load_signing_keys():
+    """
+    Loads the signing keys shared by every worker.\n
+    Keys set in the ``security`` configuration take precedence,
+    missing ones are read from ``security.key_file``, which is created on first use.
+
+    :return: Tuple, (secret key, JWT secret key)
+    """
+    configured = {name: getattr(config.security, name, None) for name in KEYS}
+    if all(configured.values()):
+        return configured["secret_key"], configured["jwt_secret_key"]
+
+    key_path = config.security.key_file
+    if not path.exists(key_path):
+        create_key_file(key_path)
+
+    with open(key_path, "r", encoding="UTF-8") as handle:
+        stored = load(handle)
+
+    return configured["secret_key"] or stored["secret_key"], configured["jwt_secret_key"] or stored["jwt_secret_key"]
@@ -0,0 +1,471 @@
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from services.config import Config
+from services.utilities import admin_required
+
+from atexit import register
+from bisect import bisect_left
+from ipaddress import ip_address, ip_network
+from json import dumps, loads
+from logging import getLogger
+from os import getpid, makedirs, path as os_path
+from sqlite3 import Error as SQLiteError, connect
+from threading import Lock, Thread, local
+from time import perf_counter, sleep, time
+
+config = Config().get_config()
+logger = getLogger(__name__)
+
+# Histogram buckets in seconds, and in amounts of queries
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """
+    Monotonically increasing value per label combination.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._lock = Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def drain(self):
+        # Takes the values counted since the last drain, see ``MetricsStore``
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def restore(self, values):
+        for labels, value in values.items():
+            self.inc(*labels, amount=value)
+
+    @staticmethod
+    def flatten(values):
+        return values.items()
+
+    @staticmethod
+    def unflatten(series):
+        return dict(series)
+
+    def samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{format_labels(self.labels, labels)} {value}"
+
+
+class Gauge:
+    """
+    Value read from a callback at collection time, the callback returns a dictionary of label tuples to values.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labels=(), callback=None):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.callback = callback
+
+    def values(self):
+        return {labels: value for labels, value in self.callback().items() if value is not None}
+
+    def samples(self, values=None):
+        # Shared values are per process, labelled by its pid
+        names = self.labels if values is None else self.labels + ("pid",)
+        for labels, value in sorted((self.values() if values is None else values).items()):
+            yield f"{self.name}{format_labels(names, labels)} {value}"
+
+
+class Histogram:
+    """
+    Cumulative histogram per label combination, with a sum and count.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        self._values = {}
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def drain(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return {labels: (entry[0], entry[1], entry[2]) for labels, entry in values.items()}
+
+    def restore(self, values):
+        with self._lock:
+            for labels, (counts, total, count) in values.items():
+                entry = self._values.get(labels)
+                if entry is None:
+                    entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                entry[0] = [current + amount for current, amount in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    @staticmethod
+    def flatten(values):
+        # Every bucket, the sum and the count are a series of their own
+        for labels, (counts, total, count) in values.items():
+            for index, amount in enumerate(counts):
+                yield labels + (index,), amount
+            yield labels + ("sum",), total
+            yield labels + ("count",), count
+
+    def unflatten(self, series):
+        values = {}
+        for key, value in series:
+            labels, part = key[:-1], key[-1]
+            entry = values.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            if part == "sum":
+                entry[1] = value
+            elif part == "count":
+                entry[2] = int(value)
+            else:
+                entry[0][part] = int(value)
+        return {labels: tuple(entry) for labels, entry in values.items()}
+
+    def samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = {labels: ([*entry[0]], entry[1], entry[2]) for labels, entry in self._values.items()}
+
+        names = self.labels + ("le",)
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, amount in zip(self.buckets + ("+Inf",), counts):
+                cumulative += amount
+                yield f"{self.name}_bucket{format_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {total}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {count}"
+
+
+class MetricsStore:
+    """
+    Metrics of every worker process on the host, kept in a SQLite file.\n
+    Workers add what they counted to the file every ``metrics.flush_interval`` seconds, and before rendering.
+    Counters and histograms are summed over every worker, exited ones included, so they never decrease.
+    Gauges are kept per process, and dropped once a process stops reporting.
+    """
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self._local = local()
+        self._lock = Lock()
+        self._worker = None
+        self._pid = None
+
+        makedirs(os_path.dirname(os_path.abspath(path)), exist_ok=True)
+        connection = self.connection()
+        connection.execute("CREATE TABLE IF NOT EXISTS series "
+                           "(metric TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, "
+                           "PRIMARY KEY (metric, labels))")
+        connection.execute("CREATE TABLE IF NOT EXISTS gauges "
+                           "(metric TEXT NOT NULL, labels TEXT NOT NULL, pid INTEGER NOT NULL, value REAL NOT NULL, "
+                           "updated REAL NOT NULL, PRIMARY KEY (metric, labels, pid))")
+
+    def connection(self):
+        # Connections are per thread, and never inherited by forked workers
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != getpid():
+            connection = connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection, self._local.pid = connection, getpid()
+        return connection
+
+    def ensure_started(self, registry):
+        """
+        Starts flushing in the background in the current process, if it isn't yet.
+
+        :param registry: Registry to flush
+        :return: Nothing
+        """
+        if self._worker is not None and self._pid == getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == getpid():
+                return
+            self._pid = getpid()
+            self._worker = Thread(target=self._run, args=(registry,), name="metrics-flush", daemon=True)
+            self._worker.start()
+            # What was counted after the last flush of an exiting worker
+            register(self.try_flush, registry)
+
+    def _run(self, registry):
+        while True:
+            sleep(self.interval)
+            self.try_flush(registry)
+
+    def try_flush(self, registry):
+        try:
+            self.flush(registry)
+        except SQLiteError as e:
+            logger.error(f"Failed to flush metrics: {e}")
+
+    def flush(self, registry):
+        """
+        Adds what the process counted since the last flush to the file, and replaces its gauges.
+
+        :param registry: Registry
+        :return: Nothing
+        """
+        drained = [(metric, metric.drain()) for metric in registry.metrics if hasattr(metric, "drain")]
+        series = [(metric.name, dumps(list(labels)), value)
+                  for metric, values in drained for labels, value in metric.flatten(values)]
+        now, pid = time(), getpid()
+        gauges = [(metric.name, dumps(list(labels)), pid, value, now)
+                  for metric in registry.metrics if isinstance(metric, Gauge)
+                  for labels, value in metric.values().items()]
+
+        connection = self.connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany("INSERT INTO series (metric, labels, value) VALUES (?, ?, ?) "
+                                   "ON CONFLICT (metric, labels) DO UPDATE SET value = value + excluded.value", series)
+            connection.execute("DELETE FROM gauges WHERE pid = ? OR updated <= ?", (pid, now - self.stale_after()))
+            connection.executemany("INSERT INTO gauges (metric, labels, pid, value, updated) VALUES (?, ?, ?, ?, ?)",
+                                   gauges)
+            connection.execute("COMMIT")
+        except SQLiteError:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            # Kept for the next flush
+            for metric, values in drained:
+                metric.restore(values)
+            raise
+
+    def stale_after(self):
+        return max(self.interval * 3, 30)
+
+    def collect(self, registry):
+        """
+        Reads the metrics of every process, after flushing the current one.
+
+        :param registry: Registry
+        :return: Dictionary, values per metric name
+        """
+        self.flush(registry)
+        connection = self.connection()
+
+        series = {}
+        for metric, labels, value in connection.execute("SELECT metric, labels, value FROM series"):
+            series.setdefault(metric, []).append((tuple(loads(labels)), value))
+        gauges = {}
+        for metric, labels, pid, value in connection.execute("SELECT metric, labels, pid, value FROM gauges "
+                                                             "WHERE updated > ?", (time() - self.stale_after(),)):
+            gauges.setdefault(metric, {})[tuple(loads(labels)) + (pid,)] = value
+
+        return {metric.name: gauges.get(metric.name, {}) if isinstance(metric, Gauge)
+                else metric.unflatten(series.get(metric.name, ())) for metric in registry.metrics}
+
+
+class Registry:
+    """
+    Collection of metrics, rendered in the Prometheus text exposition format.\n
+    Metrics are kept per process, unless a ``MetricsStore`` shares them between the worker processes.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.store = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        values = self.store.collect(self) if self.store is not None else {}
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(values.get(metric.name)))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "orderserver_request_duration_seconds", "Request latency per blueprint and route.",
+    ("blueprint", "endpoint", "method", "status")))
+request_queries = registry.register(Histogram(
+    "orderserver_request_queries", "SQL statements executed per request.", ("blueprint", "endpoint"), QUERY_BUCKETS))
+query_duration = registry.register(Histogram(
+    "orderserver_query_duration_seconds", "SQL statement latency, per blueprint and route.", ("blueprint", "endpoint")))
+commits = registry.register(Counter(
+    "orderserver_commits_total", "Database transactions committed.", ("blueprint", "endpoint")))
+cache_requests = registry.register(Counter(
+    "orderserver_cache_requests_total", "Cache lookups, per cache and hit or miss.", ("cache", "result")))
+rate_limited = registry.register(Counter(
+    "orderserver_rate_limited_total", "Requests rejected by the rate limiter.", ("blueprint", "endpoint")))
+
+
+def password_pool_values():
+    from services.passwords import password_pool
+
+    stats = password_pool.stats()
+    return {(name,): stats[name] for name in ("in_flight", "peak_in_flight", "verified", "rejected", "timeouts")}
+
+
+def stream_values():
+    from services.broker import broker
+
+    return {(): broker.count()}
+
+
+registry.register(Gauge("orderserver_password_pool", "Password pool saturation and totals.", ("value",),
+                        password_pool_values))
+registry.register(Gauge("orderserver_stream_subscribers", "Open change notification streams.", (), stream_values))
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+def request_labels():
+    # Statements outside of a request, e.g. of background workers, are labelled as such
+    if not has_request_context():
+        return "background", "background"
+    return request.blueprint or "", request.endpoint or "unknown"
+
+
+def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, statements failing in between leave nothing behind
+    if context is not None:
+        context.metrics_started = perf_counter()
+
+
+def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "metrics_started", None)
+    if started is None:
+        return
+    query_duration.observe(perf_counter() - started, *request_labels())
+    if has_request_context():
+        g.metrics_queries = g.get("metrics_queries", 0) + 1
+
+
+def after_commit(connection):
+    commits.inc(*request_labels())
+
+
+def instrument_engine(engine):
+    """
+    Counts and times every SQL statement and commit of an engine.
+
+    :param engine: Engine
+    :return: Nothing
+    """
+    if event.contains(engine, "commit", after_commit):
+        return
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "commit", after_commit)
+
+
+def start_request():
+    if registry.store is not None:
+        registry.store.ensure_started(registry)
+    g.metrics_started = perf_counter()
+    g.metrics_queries = 0
+
+
+def finish_request(response):
+    blueprint, endpoint = request_labels()
+    started = g.get("metrics_started")
+    if started is not None:
+        request_duration.observe(perf_counter() - started, blueprint, endpoint, request.method, response.status_code)
+        request_queries.observe(g.get("metrics_queries", 0), blueprint, endpoint)
+    if response.status_code == 429:
+        rate_limited.inc(blueprint, endpoint)
+    return response
+
+
+def address_allowed(address):
+    """
+    Checks whether an address is within one of the ``metrics.allowed`` addresses or networks.
+
+    :param address: String, remote address
+    :return: Boolean
+    """
+    try:
+        address = ip_address(address)
+    except ValueError:
+        return False
+    return any(address in ip_network(network, strict=False) for network in config.metrics.allowed or ())
+
+
+def render_metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def get_metrics():
+    """
+    Exports the metrics, to addresses in ``metrics.allowed`` and to administrators.
+
+    :return: Metrics in the Prometheus text format, or JSON status response.
+    """
+    if address_allowed(request.remote_addr):
+        return render_metrics()
+    return admin_required()(render_metrics)()
+
+
+def init_metrics(app, limiter=None):
+    """
+    Instruments an application and registers the ``/metrics`` endpoint, if ``metrics.enabled``.\n
+    Metrics of every worker are combined in ``metrics.database``, relative to the instance folder,
+    unless it is unset.
+
+    :param app: Flask application
+    :param limiter: Limiter to exempt the endpoint from
+    :return: Nothing
+    """
+    if not config.metrics.enabled:
+        return
+
+    from services.database import engine
+    instrument_engine(engine)
+
+    if config.metrics.database:
+        registry.store = MetricsStore(os_path.join(app.instance_path, config.metrics.database),
+                                      config.metrics.flush_interval or 5)
+
+    # Registered first, so rejected requests are timed as well
+    app.before_request_funcs.setdefault(None, []).insert(0, start_request)
+    app.after_request(finish_request)
+
+    view = app.route(config.metrics.path, methods=['GET'])(get_metrics)
+    if limiter is not None:
+        limiter.exempt(view)
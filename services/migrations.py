@@ -0,0 +1,167 @@
+from sqlalchemy import text
+
+from services.database import Base, engine
+from services.versioning import TRACKED_TABLES
+
+from json import dumps
+from logging import getLogger
+from pickle import loads
+
+logger = getLogger(__name__)
+
+
+def backup_duplicate_orders(connection):
+    """
+    Moves all but the latest order of a user per event to ``orders_duplicates``, which the unique
+    ``ix_orders_user_event`` requires.\n
+    The backup table has the columns of ``orders``, and is filled in the transaction of the migration, so orders are
+    never lost. Administrators restore or drop them by hand.
+
+    :param connection: Connection within the migration transaction
+    :return: Integer, amount of orders moved
+    """
+    duplicates = connection.execute(text(
+        'SELECT id, uuid, "user", event FROM orders '
+        'WHERE id NOT IN (SELECT MAX(id) FROM orders GROUP BY "user", event)')).fetchall()
+    if not duplicates:
+        return 0
+
+    connection.execute(text("CREATE TABLE IF NOT EXISTS orders_duplicates AS SELECT * FROM orders WHERE 0"))
+    for _, uuid, user, event in duplicates:
+        logger.warning(f"Moving duplicate order <{uuid}> of user <{user}> for event <{event}> to orders_duplicates")
+    ids = [{"id": row[0]} for row in duplicates]
+    connection.execute(text("INSERT INTO orders_duplicates SELECT * FROM orders WHERE id = :id"), ids)
+    connection.execute(text("DELETE FROM orders WHERE id = :id"), ids)
+    return len(duplicates)
+
+
+def create_indexes(connection):
+    """
+    Creates every index declared on the models that doesn't exist yet.\n
+    ``create_all()`` only creates indexes together with new tables, existing tables are handled here.
+    Duplicate orders are moved to a backup table first, they would fail the unique index of orders.
+
+    :param connection: Connection within the migration transaction
+    :return: Nothing
+    """
+    backup_duplicate_orders(connection)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+# Columns formerly stored as ``PickleType``, now stored as ``JSON``
+PICKLED_COLUMNS = (
+    ("orders", "products"),
+    ("products", "allergens"),
+    ("products", "ingredients"),
+    ("products", "extra"),
+    ("users", "flags"),
+    ("users", "tags"),
+)
+
+
+def convert_pickled_columns(connection):
+    """
+    Converts pickled values to JSON.\n
+    Pickles are stored as blobs and JSON as text, so only rows still holding a blob are converted.
+
+    :param connection: Connection within the migration transaction
+    :return: Nothing
+    """
+    for table, column in PICKLED_COLUMNS:
+        rows = connection.execute(text(f"SELECT id, {column} FROM {table} WHERE typeof({column}) = 'blob'")).fetchall()
+        if not rows:
+            continue
+
+        logger.info(f"Converting {len(rows)} pickled values in {table}.{column}")
+        connection.execute(text(f"UPDATE {table} SET {column} = :value WHERE id = :id"),
+                           [{"id": row[0], "value": dumps(loads(row[1]))} for row in rows])
+
+
+def add_version_columns(connection):
+    """
+    Adds the version counters replacing the random hashes of ``Data``.\n
+    The former hash columns are left in place, they are no longer read or written.
+
+    :param connection: Connection within the migration transaction
+    :return: Nothing
+    """
+    existing = {row[1] for row in connection.execute(text("PRAGMA table_info(data)"))}
+    for table in TRACKED_TABLES:
+        if f"{table}_version" not in existing:
+            connection.execute(text(f"ALTER TABLE data ADD COLUMN {table}_version INTEGER NOT NULL DEFAULT 0"))
+
+
+def create_change_log(connection):
+    """
+    Creates the change log table for databases created before it existed.\n
+    Migrated databases skip ``create_all()`` once up to date, new tables need a step of their own.
+
+    :param connection: Connection within the migration transaction
+    :return: Nothing
+    """
+    from models.change import Change
+    Change.__table__.create(bind=connection, checkfirst=True)
+    for index in Change.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+def create_tickets(connection):
+    """
+    Creates the table of redeemed stream tickets for databases created before it existed.
+
+    :param connection: Connection within the migration transaction
+    :return: Nothing
+    """
+    from models.ticket import Ticket
+    Ticket.__table__.create(bind=connection, checkfirst=True)
+    for index in Ticket.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+# Ordered migration steps, the schema version is the amount of steps applied.
+# Steps have to be idempotent, new databases run every step once.
+MIGRATIONS = [
+    create_indexes,
+    convert_pickled_columns,
+    add_version_columns,
+    create_change_log,
+    create_tickets,
+]
+
+
+def get_schema_version(connection):
+    """
+    Retrieves the schema version stored in the SQLite ``user_version`` pragma.
+
+    :param connection: Connection to the database
+    :return: Integer, schema version
+    """
+    return connection.execute(text("PRAGMA user_version")).scalar()
+
+
+def migrate_db():
+    """
+    Applies all pending migration steps to the database, in order.\n
+    Each step is stamped in the same transaction it runs in, databases at the latest schema version are left untouched.
+
+    :return: Integer, amount of steps applied
+    """
+    with engine.connect() as connection:
+        version = get_schema_version(connection)
+    # Up to date databases have every table already, skip inspecting them
+    if version >= len(MIGRATIONS):
+        return 0
+
+    from models import user, product, order, event, data, change, ticket
+    Base.metadata.create_all(bind=engine)
+
+    applied = 0
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        logger.info(f"Applying migration {number}: {step.__name__}")
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(text(f"PRAGMA user_version={number}"))
+        applied += 1
+    return applied
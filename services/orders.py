@@ -0,0 +1,97 @@
+from services.cache import product_cache
+from services.utilities import Utilities
+
+from collections import Counter
+
+
+class OrderValidator:
+    """
+    Shared validation for order payloads, used by ``/order/add`` and ``/order/edit``.\n
+    Resolves all products in one pass, against the catalog cache and at most one ``IN`` query.
+    """
+
+    @staticmethod
+    def _error(message, field=None, index=None, value=None):
+        return {"field": field, "index": index, "value": value, "error": message}
+
+    @staticmethod
+    def _resolve_prices(uuids):
+        """
+        Resolves product prices by UUID.\n
+        Uses the catalog index, falling back to a single ``IN`` query for UUIDs missing from it.
+
+        :param uuids: Set of product UUIDs
+        :return: Dictionary, price by UUID
+        """
+        index = product_cache.index()
+        prices = {uuid: index[uuid]["price"] for uuid in uuids if uuid in index}
+
+        missing = uuids.difference(prices)
+        if missing:
+            from models.product import Product
+            from services.database import db_session
+
+            for uuid, price in db_session.query(Product.uuid, Product.price).filter(Product.uuid.in_(missing)):
+                prices[uuid] = price
+        return prices
+
+    @staticmethod
+    def validate(payload, event):
+        """
+        Validates an order payload for the given event.\n
+        Returns a tuple of the validated order and a list of per-item errors, the order is ``None`` on errors.
+
+        :param payload: Request JSON body
+        :param event: Event the order is placed upon
+        :return: Tuple, (dictionary with products/notes/counts/total_price, list of errors)
+        """
+        if not isinstance(payload, dict):
+            return None, [OrderValidator._error(f"Expected JSON object, instead got {type(payload)}")]
+
+        errors = []
+        notes = payload.get("notes", None)
+        products = payload.get("products", None)
+
+        if not isinstance(notes, str) and notes is not None:
+            errors.append(OrderValidator._error(f"Expected string, instead got {type(notes)}", "notes"))
+        if not isinstance(products, list):
+            errors.append(OrderValidator._error(f"Expected list, instead got {type(products)}", "products"))
+            return None, errors
+
+        for index, product in enumerate(products):
+            if not isinstance(product, str):
+                errors.append(OrderValidator._error(f"Field <{product}> in product list is not str",
+                                                    "products", index, product))
+        if errors:
+            return None, errors
+
+        counts = Counter(products)
+        prices = OrderValidator._resolve_prices(set(counts))
+
+        total_price = 0.0
+        for index, product in enumerate(products):
+            price = prices.get(product)
+            if price is None:
+                errors.append(OrderValidator._error(f"Product <{product}> was not found", "products", index, product))
+                continue
+            total_price += price
+
+        if not errors and total_price > event.max_order_price:
+            errors.append(OrderValidator._error(f"Price exceeded maximum: <{event.max_order_price}>",
+                                                "products", value=total_price))
+        if errors:
+            return None, errors
+
+        return {"products": products, "notes": notes, "counts": dict(counts), "total_price": total_price}, errors
+
+    @staticmethod
+    def return_errors(errors):
+        """
+        Generates the bad request response for validation errors.\n
+        The first error is kept under ``error`` for older clients.
+
+        :param errors: List of errors
+        :return: Dictionary
+        """
+        return Utilities.return_complex_response(400, "Bad request, see details.",
+                                                 {"error": errors[0]["error"], "errors": errors})
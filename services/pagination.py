@@ -0,0 +1,139 @@
+from flask import Response, json, request, stream_with_context
+
+from services.config import Config
+from services.utilities import Utilities
+
+from bisect import bisect_right
+
+config = Config().get_config()
+
+
+class Pagination:
+    """
+    Keyset pagination of list endpoints, using ``id`` as key.\n
+    Enabled by the ``limit`` and ``cursor`` query parameters, ``format=ndjson`` streams rows instead.\n
+    Without any of these parameters, list endpoints return everything like before.
+    """
+
+    def __init__(self, limit: int = None, cursor: int = None, stream: bool = False):
+        self.limit = limit
+        self.cursor = cursor
+        self.stream = stream
+
+    @classmethod
+    def from_request(cls):
+        """
+        Parses the pagination parameters of the current request.\n
+        Raises a ValueError on invalid parameters.
+
+        :return: Pagination
+        """
+        limit = request.args.get("limit", None)
+        cursor = request.args.get("cursor", None)
+        stream = request.args.get("format", "json") == "ndjson"
+
+        if limit is not None:
+            if not limit.isdigit() or not 0 < int(limit) <= config.pagination.max_limit:
+                raise ValueError(f"Expected limit between 1 and {config.pagination.max_limit}, instead got <{limit}>")
+            limit = int(limit)
+        if cursor is not None:
+            if not cursor.isdigit():
+                raise ValueError(f"Expected numeric cursor, instead got <{cursor}>")
+            cursor = int(cursor)
+        if limit is None and cursor is not None and not stream:
+            limit = config.pagination.default_limit
+
+        return cls(limit, cursor, stream)
+
+    @property
+    def enabled(self):
+        return self.limit is not None or self.stream
+
+    @staticmethod
+    def return_bad_request(error: ValueError):
+        return Utilities.return_complex_response(400, "Bad request, see details.", {"error": error.__str__()})
+
+    def _keyed(self, query, column):
+        if self.cursor is not None:
+            query = query.filter(column > self.cursor)
+        return query.order_by(column)
+
+    def page_query(self, query, column, mapper=None):
+        """
+        Fetches a single page from a query, using one extra row to detect the next page.\n
+        Returns the (mapped) rows and the cursor of the next page, ``None`` on the last page.
+
+        :param query: Query to paginate, rows need an ``id``
+        :param column: Key column, for example ``Product.id``
+        :param mapper: Optional function mapping rows to results
+        :return: Tuple, (list of results, next cursor)
+        """
+        rows = self._keyed(query, column).limit(self.limit + 1).all()
+        next_cursor = rows[self.limit - 1].id if len(rows) > self.limit else None
+        rows = rows[:self.limit]
+        return ([mapper(row) for row in rows] if mapper else rows), next_cursor
+
+    def _slice(self, items):
+        start = 0
+        if self.cursor is not None:
+            start = bisect_right(items, self.cursor, key=lambda item: item["id"])
+        end = start + self.limit if self.limit is not None else len(items)
+        return items[start:end], end < len(items)
+
+    def page_sequence(self, items):
+        """
+        Fetches a single page from an in-memory list of dictionaries sorted by ``id``.
+
+        :param items: List of dictionaries, sorted by id
+        :return: Tuple, (list of results, next cursor)
+        """
+        page, more = self._slice(items)
+        return page, (page[-1]["id"] if more and page else None)
+
+    @staticmethod
+    def _response(lines):
+        return Response(stream_with_context(lines), status=200, mimetype="application/x-ndjson")
+
+    def stream_query(self, query, column, mapper=None):
+        """
+        Streams a query as newline delimited JSON.\n
+        Rows are fetched in batches of ``pagination.stream_batch`` with a server-side iterator.
+
+        :param query: Query to stream
+        :param column: Key column, for example ``Product.id``
+        :param mapper: Optional function mapping rows to results
+        :return: Response
+        """
+        query = self._keyed(query, column)
+        if self.limit is not None:
+            query = query.limit(self.limit)
+
+        def generate():
+            for row in query.yield_per(config.pagination.stream_batch):
+                yield json.dumps(mapper(row) if mapper else row) + "\n"
+
+        return self._response(generate())
+
+    def stream_sequence(self, items):
+        """
+        Streams an in-memory list of dictionaries sorted by ``id`` as newline delimited JSON.
+
+        :param items: List of dictionaries, sorted by id
+        :return: Response
+        """
+        items, _ = self._slice(items)
+
+        def generate():
+            for item in items:
+                yield json.dumps(item) + "\n"
+
+        return self._response(generate())
+
+    @staticmethod
+    def return_page(message, result, next_cursor):
+        """
+        Generates a JSON response for a single page.
+
+        :return: Dictionary
+        """
+        return Utilities.return_custom_response(200, message, {"result": result, "next_cursor": next_cursor})
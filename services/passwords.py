@@ -0,0 +1,153 @@
+from bcrypt import checkpw, gensalt, hashpw
+
+from services.config import Config
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from os import getpid
+from threading import BoundedSemaphore, Lock
+from time import perf_counter
+
+config = Config().get_config()
+
+
+class PoolSaturated(Exception):
+    """
+    Raised when the password pool has no room left for another verification.
+    """
+
+
+class PasswordPool:
+    """
+    Bounded pool verifying and hashing passwords on dedicated threads.\n
+    bcrypt releases the GIL while hashing, so ``passwords.workers`` threads verify in parallel.\n
+    At most ``passwords.queue_size`` verifications may wait for a thread, further ones are rejected immediately.\n
+    The request thread still waits for its verification, WSGI has no way to give it back meanwhile.
+    The pool bounds how many request threads wait on bcrypt, and how long, so logins can't occupy every thread.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._dummy = None
+        self._latencies = deque(maxlen=1024)
+        self._counters = {"verified": 0, "rehashed": 0, "rejected": 0, "timeouts": 0, "in_flight": 0,
+                          "peak_in_flight": 0}
+
+    def _ensure_executor(self):
+        # Threads don't survive a fork, so every process starts its own pool
+        if self._executor is not None and self._pid == getpid():
+            return
+        with self._lock:
+            if self._executor is not None and self._pid == getpid():
+                return
+            self._pid = getpid()
+            self._slots = BoundedSemaphore(config.passwords.workers + config.passwords.queue_size)
+            self._executor = ThreadPoolExecutor(max_workers=config.passwords.workers, thread_name_prefix="passwords")
+
+    @staticmethod
+    def hash(password: str):
+        """
+        Hashes a password with the configured ``passwords.rounds``, on the calling thread.
+
+        :param password: Password
+        :return: String, bcrypt hash
+        """
+        return hashpw(password.encode("UTF-8"), gensalt(config.passwords.rounds)).decode("UTF-8")
+
+    @staticmethod
+    def needs_rehash(hashed: str):
+        """
+        Checks whether a hash was created with a different amount of rounds than configured.
+
+        :param hashed: bcrypt hash
+        :return: Boolean
+        """
+        try:
+            return int(hashed.split("$")[2]) != config.passwords.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def _verify(self, password: str, hashed: str):
+        if hashed is None:
+            # Unknown users cost as much as known ones, so usernames can't be probed by timing
+            if self._dummy is None:
+                self._dummy = self.hash("")
+            checkpw(password.encode("UTF-8"), self._dummy.encode("UTF-8"))
+            return False, None
+
+        if not checkpw(password.encode("UTF-8"), hashed.encode("UTF-8")):
+            return False, None
+        if self.needs_rehash(hashed):
+            return True, self.hash(password)
+        return True, None
+
+    def _release(self):
+        with self._lock:
+            self._counters["in_flight"] -= 1
+        self._slots.release()
+
+    def verify(self, password: str, hashed: str = None):
+        """
+        Verifies a password against a hash in the pool.\n
+        Blocks the calling thread until done, or at most ``passwords.timeout`` seconds.
+        Returns a new hash as well if the stored one should be replaced.
+
+        :param password: Password
+        :param hashed: bcrypt hash, ``None`` for unknown users
+        :return: Tuple, (valid, new hash or ``None``)
+        :raises PoolSaturated: If the queue is full or the verification times out
+        """
+        self._ensure_executor()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise PoolSaturated()
+
+        started = perf_counter()
+        with self._lock:
+            self._counters["in_flight"] += 1
+            self._counters["peak_in_flight"] = max(self._counters["peak_in_flight"], self._counters["in_flight"])
+        try:
+            future = self._executor.submit(self._verify, password, hashed)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until bcrypt is done, even if the request gave up waiting
+        future.add_done_callback(lambda _: self._release())
+
+        # The request thread waits here, the pool only bounds how many threads do and for how long
+        try:
+            result = future.result(timeout=config.passwords.timeout)
+        except TimeoutError:
+            with self._lock:
+                self._counters["timeouts"] += 1
+            raise PoolSaturated()
+
+        with self._lock:
+            self._counters["verified"] += 1
+            self._counters["rehashed"] += result[1] is not None
+            self._latencies.append(perf_counter() - started)
+        return result
+
+    def stats(self):
+        """
+        Reports pool saturation and login latency over the last verifications.
+
+        :return: Dictionary
+        """
+        with self._lock:
+            result = dict(self._counters)
+            latencies = sorted(self._latencies)
+
+        result.update(workers=config.passwords.workers, queue_size=config.passwords.queue_size,
+                      rounds=config.passwords.rounds)
+        for name, fraction in (("p50_ms", 0.50), ("p99_ms", 0.99)):
+            result[name] = round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 3) \
+                if latencies else None
+        return result
+
+
+password_pool = PasswordPool()
@@ -0,0 +1,135 @@
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+
+from models.user import User
+from services.config import Config
+from services.metrics import record_cache
+from services.tracking import activity_tracker
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from inspect import currentframe
+from threading import Lock
+from time import monotonic
+
+config = Config().get_config()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Slim projection of an authenticated ``User``.\n
+    Only holds what authorization needs, without secrets or pickled columns.
+    """
+    id: int
+    uuid: str
+    username: str
+    admin: bool
+
+    def perform_tracking(self, source: str = None, address: str = "UNKNOWN", active: bool = True):
+        if source is None:
+            source = str(currentframe().f_back.f_code.co_name)
+
+        activity_tracker.track(self.uuid, source, address, active)
+
+    def __repr__(self):
+        return f"<Principal {self.username}>"
+
+
+class PrincipalCache:
+    """
+    TTL/LRU cache of principals by UUID.\n
+    Entries expire after ``cache.principal_ttl`` seconds, at most ``cache.principal_size`` are kept.\n
+    Users changed through the ORM are invalidated immediately.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _load(uuid):
+        from services.database import db_session
+
+        row = db_session.query(User.id, User.uuid, User.username, User.admin).filter_by(uuid=uuid).first()
+        if row is None:
+            return None
+        return Principal(*row)
+
+    def lookup(self, uuid):
+        """
+        Returns the cached principal for the given UUID, without loading it.
+
+        :param uuid: UUID of the user
+        :return: Principal, or ``None`` on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(uuid)
+            if entry is not None and entry[1] > monotonic():
+                self._entries.move_to_end(uuid)
+                return entry[0]
+        return None
+
+    def store(self, principal: Principal):
+        """
+        Stores a loaded principal, evicting the least recently used ones.
+
+        :param principal: Principal
+        :return: Nothing
+        """
+        with self._lock:
+            self._entries[principal.uuid] = (principal, monotonic() + config.cache.principal_ttl)
+            self._entries.move_to_end(principal.uuid)
+            while len(self._entries) > config.cache.principal_size:
+                self._entries.popitem(last=False)
+
+    def get(self, uuid):
+        """
+        Returns the principal for the given UUID, loading it on a miss.\n
+        Returns ``None`` if the user doesn't exist.
+
+        :param uuid: UUID of the user
+        :return: Principal
+        """
+        principal = self.lookup(uuid)
+        record_cache("principals", principal is not None)
+        if principal is None:
+            principal = self._load(uuid)
+            if principal is not None:
+                self.store(principal)
+        return principal
+
+    def invalidate(self, uuid=None):
+        """
+        Drops a single principal, or every principal if no UUID is given.
+
+        :param uuid: UUID of the user
+        :return: Nothing
+        """
+        with self._lock:
+            if uuid is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(uuid, None)
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.uuid)
+
+
+def current_principal():
+    """
+    Resolves the principal of the current request from the JWT identity.\n
+    Resolved once per request and kept on ``g``, requires a verified JWT.
+
+    :return: Principal, or ``None`` if the user doesn't exist
+    """
+    if "principal" not in g:
+        g.principal = principal_cache.get(get_jwt_identity())
+    return g.principal
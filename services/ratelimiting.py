@@ -0,0 +1,182 @@
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from jwt import PyJWTError
+from limits.storage import Storage
+
+from services.config import Config
+
+from itertools import count
+from os import getpid, makedirs, path
+from sqlite3 import Error as SQLiteError, connect
+from threading import local
+from time import time
+from urllib.parse import urlparse
+
+config = Config().get_config()
+
+# Blueprints limited by ``ratelimiting.authorization`` unless configured in ``ratelimiting.blueprints``
+AUTHORIZATION_BLUEPRINTS = ("auth",)
+
+
+class SQLiteStorage(Storage):
+    """
+    Fixed window rate limit counters in a SQLite file, shared by every worker process on the host.\n
+    Registered for ``sqlite:///relative/path.db`` and ``sqlite:////absolute/path.db`` storage URIs,
+    relative paths are resolved against the instance folder by ``init_limiter()``.
+    Every increment runs in an immediate transaction, so concurrent workers never lose hits.
+    The moving window strategy is not supported.
+    """
+    STORAGE_SCHEME = ["sqlite"]
+
+    # Increments between removals of expired counters
+    CLEANUP_INTERVAL = 1000
+
+    def __init__(self, uri: str, **options):
+        super().__init__(uri, **options)
+        location = urlparse(uri).path
+        self.path = location[1:] if location.startswith("/") else location
+        self.timeout = float(options.get("timeout", 5))
+        self._local = local()
+        self._increments = count(1)
+
+        directory = path.dirname(path.abspath(self.path))
+        makedirs(directory, exist_ok=True)
+        self.connection().execute("CREATE TABLE IF NOT EXISTS limits "
+                                  "(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires REAL NOT NULL)")
+
+    @property
+    def base_exceptions(self):
+        return SQLiteError
+
+    def connection(self):
+        # Connections are per thread, and never inherited by forked workers
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != getpid():
+            connection = connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection, self._local.pid = connection, getpid()
+        return connection
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1):
+        now = time()
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT INTO limits (key, count, expires) VALUES (:key, :amount, :expires) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "count = CASE WHEN limits.expires <= :now THEN :amount ELSE limits.count + :amount END, "
+                "expires = CASE WHEN limits.expires <= :now OR :elastic THEN :expires ELSE limits.expires END",
+                {"key": key, "amount": amount, "expires": now + expiry, "now": now, "elastic": elastic_expiry})
+            result = connection.execute("SELECT count FROM limits WHERE key = ?", (key,)).fetchone()[0]
+            if next(self._increments) % self.CLEANUP_INTERVAL == 0:
+                connection.execute("DELETE FROM limits WHERE expires <= ?", (now,))
+            connection.execute("COMMIT")
+        except SQLiteError:
+            connection.execute("ROLLBACK")
+            raise
+        return result
+
+    def get(self, key: str):
+        row = self.connection().execute("SELECT count FROM limits WHERE key = ? AND expires > ?",
+                                        (key, time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str):
+        row = self.connection().execute("SELECT expires FROM limits WHERE key = ? AND expires > ?",
+                                        (key, time())).fetchone()
+        return row[0] if row else time()
+
+    def check(self):
+        try:
+            self.connection().execute("SELECT 1").fetchone()
+            return True
+        except SQLiteError:
+            return False
+
+    def reset(self):
+        return self.connection().execute("DELETE FROM limits").rowcount
+
+    def clear(self, key: str):
+        self.connection().execute("DELETE FROM limits WHERE key = ?", (key,))
+
+
+def rate_limit_key():
+    """
+    Identifies the client of a request, by JWT identity if ``ratelimiting.key`` is ``identity``.\n
+    Requests without a valid token, like logins, are identified by their remote address.
+
+    :return: String
+    """
+    if config.ratelimiting.key == "identity":
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except (JWTExtendedException, PyJWTError):
+            identity = None
+        if identity is not None:
+            return f"user:{identity}"
+    return get_remote_address()
+
+
+def blueprint_limit(name: str):
+    limits = config.ratelimiting.blueprints
+    value = getattr(limits, name) if limits is not None else None
+    if value is not None:
+        return value
+    return config.ratelimiting.authorization if name in AUTHORIZATION_BLUEPRINTS else config.ratelimiting.default
+
+
+def route_limit(endpoint: str):
+    # Routes removed from the configuration fall back to the limit of their blueprint
+    routes = config.ratelimiting.routes
+    value = routes.to_dict().get(endpoint) if routes is not None else None
+    return value or blueprint_limit(endpoint.split(".")[0])
+
+
+def storage_uri(app):
+    """
+    Retrieves ``ratelimiting.storage_uri``, relative SQLite paths are resolved against the instance folder.
+
+    :param app: Flask application
+    :return: String
+    """
+    uri = config.ratelimiting.storage_uri or "memory://"
+    location = uri[len("sqlite:///"):]
+    if uri.startswith("sqlite:///") and not path.isabs(location):
+        return f"sqlite:///{path.join(app.instance_path, location)}"
+    return uri
+
+
+def init_limiter(app, blueprints):
+    """
+    Creates the rate limiter of an application, with limits per blueprint and per route from the configuration.\n
+    Limits are read on every request, changed values apply without a restart. Routes added to
+    ``ratelimiting.routes`` need a restart, a route limit replaces the limit of its blueprint.\n
+    Counters are kept in ``ratelimiting.storage_uri``, ``memory://`` by default. Counters in memory are per worker,
+    ``sqlite:///limits.db`` shares them between local workers, ``redis://host:6379`` between hosts.
+
+    :param app: Flask application, with every blueprint registered
+    :param blueprints: Blueprints to limit
+    :return: Limiter
+    """
+    limiter = Limiter(key_func=rate_limit_key,
+                      default_limits=[lambda: config.ratelimiting.default],
+                      storage_uri=storage_uri(app),
+                      strategy=config.ratelimiting.strategy or "fixed-window")
+    limiter.init_app(app)
+
+    for blueprint in blueprints:
+        limiter.limit(lambda name=blueprint.name: blueprint_limit(name))(blueprint)
+
+    routes = config.ratelimiting.routes
+    for endpoint in (routes.to_dict() if routes is not None else {}):
+        view = app.view_functions.get(endpoint)
+        if view is None:
+            app.logger.warning(f"Skipping rate limit of unknown route <{endpoint}>")
+            continue
+        app.view_functions[endpoint] = limiter.limit(lambda name=endpoint: route_limit(name))(view)
+    return limiter
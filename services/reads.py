@@ -0,0 +1,108 @@
+from models.event import Event
+from models.order import Order
+from services.events import event_view
+from services.utilities import Utilities
+from services.views import order_summary_view, order_view
+
+LAST_CHANGED_MESSAGES = {
+    "products": "Successfully fetched product last changed",
+    "events": "Successfully fetched events last changed",
+    "orders": "Successfully fetched orders last changed",
+}
+
+
+class Reads:
+    """
+    Statements and responses of the read endpoints.\n
+    Shared by the Flask views and the asynchronous handlers of ``flaskr.asgi``, so both serving modes
+    query the same columns and answer with the same messages.
+    Statements are Core selects, executed with ``db_session`` or an ``AsyncSession``.
+    """
+
+    @staticmethod
+    def event_statement(uuid):
+        return event_view.select().where(Event.uuid == uuid)
+
+    @staticmethod
+    def events_statement():
+        return event_view.select().order_by(Event.id)
+
+    @staticmethod
+    def current_order_statement(user, event):
+        return order_summary_view.select().where(Order.user == user, Order.event == event)
+
+    @staticmethod
+    def order_statement(user, uuid):
+        return order_view.select().where(Order.user == user, Order.uuid == uuid)
+
+    @staticmethod
+    def orders_statement(user):
+        return order_view.select().where(Order.user == user).order_by(Order.id)
+
+    @staticmethod
+    def products(products):
+        if not products:
+            return Utilities.return_response(404, "No products found")
+        return Utilities.return_result(200, f"Fetched {len(products)} products successfully", products)
+
+    @staticmethod
+    def product(uuid, product):
+        if product is None:
+            return Utilities.return_response(404, f"Product <{uuid}> not found")
+        return Utilities.return_result(200, "Fetched product successfully", product)
+
+    @staticmethod
+    def current_event(event):
+        if event is None:
+            return Utilities.return_response(500, "No active event exists.")
+        return Utilities.return_result(200, "Successfully fetched current event", {"uuid": event.uuid})
+
+    @staticmethod
+    def event(uuid, row):
+        if row is None:
+            return Utilities.return_response(404, f"No event found with UUID: {uuid}.")
+        return Utilities.return_result(200, "Successfully fetched current event", event_view.map(row))
+
+    @staticmethod
+    def events(rows):
+        if not rows:
+            return Utilities.return_response(404, "No events found")
+        return Utilities.return_result(200, "Successfully fetched current events", [event_view.map(row) for row in rows])
+
+    @staticmethod
+    def current_order(event, row):
+        if event is None:
+            return Utilities.return_response(500, "No current event exists.")
+        if row is None:
+            return Utilities.return_response(404, "No order for current event exists, use /order/add instead.")
+        return Utilities.return_result(200, "Successfully retrieved current order", order_summary_view.map(row))
+
+    @staticmethod
+    def order(uuid, row):
+        if row is None:
+            return Utilities.return_response(404, f"No order found with UUID: {uuid}.")
+        return Utilities.return_result(200, "Successfully retrieved current order", order_view.map(row))
+
+    @staticmethod
+    def orders(rows):
+        if not rows:
+            return Utilities.return_response(404, "No orders found for any events.")
+        result = [order_view.map(row) for row in rows]
+        return Utilities.return_result(200, f"Successfully retrieved {len(result)} orders", result)
+
+    @staticmethod
+    def last_changed(model, values):
+        """
+        Creates the ``/last_changed`` response of a tracked table.\n
+        Keys are named after products for every table, clients rely on it.
+
+        :param model: Tracked table
+        :param values: Tracking values, see ``DataSnapshot.get()``, empty without a ``Data`` row
+        :return: JSON result response
+        """
+        if not values:
+            return Utilities.return_response(503, "Change tracking is unavailable, try again later.")
+        return Utilities.return_result(200, LAST_CHANGED_MESSAGES[model],
+                                       {"products_hash": str(values.get(f"{model}_version")),
+                                        "products_version": values.get(f"{model}_version"),
+                                        "products_last_changed": values.get(f"{model}_last_changed")})
@@ -0,0 +1,167 @@
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from services.config import Config
+from services.metrics import record_cache
+
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from datetime import date
+from decimal import Decimal
+from json import dumps
+from operator import attrgetter
+from threading import Lock
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+config = Config().get_config()
+
+
+class Serializer:
+    """
+    Precompiled serialization of dataclass models.\n
+    Every model gets a single field extractor, replacing the recursive deep copy of ``dataclasses.asdict``.\n
+    Models setting ``__tracked__`` to their ``Data`` table have their serialized rows cached per table version,
+    unless they declare ``__untracked__`` columns, which change without a new version.
+    """
+    _extractors = {}
+    _rows = OrderedDict()
+    _lock = Lock()
+
+    @staticmethod
+    def extractor(cls):
+        """
+        Retrieves the field extractor of a dataclass, compiling it on first use.
+
+        :param cls: Dataclass
+        :return: Function, mapping an instance to a dictionary
+        """
+        result = Serializer._extractors.get(cls)
+        if result is None:
+            names = tuple(field.name for field in fields(cls))
+            getter = attrgetter(*names)
+            if len(names) == 1:
+                def result(obj):
+                    return {names[0]: getter(obj)}
+            else:
+                def result(obj):
+                    return dict(zip(names, getter(obj)))
+            Serializer._extractors[cls] = result
+        return result
+
+    @staticmethod
+    def serialize(obj):
+        """
+        Serializes a dataclass instance to a dictionary.\n
+        Rows of tracked models are served from the row cache while their table is unchanged.
+
+        :param obj: Dataclass instance
+        :return: Dictionary
+        """
+        cls = type(obj)
+        tracked = getattr(cls, "__tracked__", None)
+        if tracked is None or hasattr(cls, "__untracked__") or getattr(obj, "id", None) is None:
+            return Serializer.extractor(cls)(obj)
+
+        from services.cache import data_snapshot
+        key = (cls, obj.id, data_snapshot.get().get(f"{tracked}_version"))
+
+        with Serializer._lock:
+            result = Serializer._rows.get(key)
+            if result is not None:
+                Serializer._rows.move_to_end(key)
+        record_cache("serialized_rows", result is not None)
+        if result is not None:
+            return result
+
+        result = Serializer.extractor(cls)(obj)
+        with Serializer._lock:
+            Serializer._rows[key] = result
+            while len(Serializer._rows) > config.serialization.row_cache_size:
+                Serializer._rows.popitem(last=False)
+        return result
+
+    @staticmethod
+    def default(obj):
+        """
+        Converts objects JSON doesn't support natively, matching Flask's default provider.
+
+        :param obj: Object to convert
+        :return: JSON compatible object
+        """
+        if is_dataclass(obj) and not isinstance(obj, type):
+            return Serializer.serialize(obj)
+        if isinstance(obj, date):
+            return http_date(obj)
+        if isinstance(obj, (Decimal, UUID)):
+            return str(obj)
+        if hasattr(obj, "__html__"):
+            return str(obj.__html__())
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    @staticmethod
+    def encode(obj):
+        """
+        Encodes an object to compact JSON with sorted keys, without requiring a Flask application.
+
+        :param obj: Object to encode
+        :return: Bytes, JSON
+        """
+        if orjson is not None and config.serialization.backend == "orjson":
+            try:
+                return orjson.dumps(obj, default=Serializer.default,
+                                    option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS |
+                                    orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+            except orjson.JSONEncodeError:
+                pass
+        return dumps(obj, default=Serializer.default, sort_keys=True, separators=(",", ":")).encode("UTF-8")
+
+
+class OrderJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider of the application.\n
+    Uses ``orjson`` if it is installed and enabled by ``serialization.backend``, the standard library otherwise.\n
+    Both backends use the precompiled extractors of ``Serializer``.
+    """
+    default = staticmethod(Serializer.default)
+
+    @property
+    def use_orjson(self):
+        return orjson is not None and config.serialization.backend == "orjson"
+
+    def _options(self, pretty=False):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _encode(self, obj, pretty=False):
+        try:
+            return orjson.dumps(obj, default=Serializer.default, option=self._options(pretty))
+        except orjson.JSONEncodeError:
+            # Values orjson refuses, such as integers over 64 bits
+            return None
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            result = self._encode(obj)
+            if result is not None:
+                return result.decode("UTF-8")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        result = self._encode(obj, pretty)
+        if result is None:
+            return super().response(obj)
+        return self._app.response_class(result + b"\n", mimetype=self.mimetype)
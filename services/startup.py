@@ -0,0 +1,98 @@
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from services.database import Base, db_session, engine, init_db
+from services.migrations import MIGRATIONS, get_schema_version, migrate_db
+
+from contextlib import contextmanager
+from logging import getLogger
+from time import perf_counter
+
+logger = getLogger(__name__)
+
+
+class Startup:
+    """
+    Times the phases of application startup and prepares the database once, at boot.\n
+    Initialization only checks whether the seeded tables have any row at all, it never reads whole tables.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.timings = {}
+        self.details = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Times a phase of startup, phases with the same name add up.
+
+        :param name: Name of the phase
+        :return: Context manager
+        """
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + perf_counter() - started
+
+    @staticmethod
+    def is_empty(connection, model):
+        """
+        Checks whether a table has no rows, with ``SELECT EXISTS (SELECT id ... LIMIT 1)``.
+
+        :param connection: Connection to the database
+        :param model: Model
+        :return: Boolean
+        """
+        return not connection.execute(select(select(model.id).limit(1).exists())).scalar()
+
+    def empty_tables(self):
+        from models.data import Data
+        from models.event import Event
+        from models.user import User
+
+        with engine.connect() as connection:
+            return {name: self.is_empty(connection, model)
+                    for name, model in (("users", User), ("events", Event), ("data", Data))}
+
+    def initialize_database(self):
+        """
+        Migrates the database if its schema version is behind, and seeds tables that are empty.
+
+        :return: Nothing
+        """
+        with self.phase("schema"):
+            with engine.connect() as connection:
+                version = get_schema_version(connection)
+        self.details["schema_version"] = version
+        self.details["latest_schema_version"] = len(MIGRATIONS)
+
+        with self.phase("migrations"):
+            self.details["migrations"] = migrate_db()
+
+        with self.phase("checks"):
+            try:
+                empty = self.empty_tables()
+            except OperationalError:
+                # Tables went missing from a database stamped as up to date
+                from models import user, product, order, event, data, change, ticket
+                Base.metadata.create_all(bind=engine)
+                empty = self.empty_tables()
+
+        seeded = [name for name, value in empty.items() if value]
+        self.details["seeded"] = seeded
+        if seeded:
+            with self.phase("seed"):
+                init_db(**empty)
+                db_session.remove()
+
+    def report(self):
+        """
+        Summarizes startup, in milliseconds per phase.
+
+        :return: Dictionary
+        """
+        return {**self.details,
+                "phases": {name: round(value * 1000, 2) for name, value in self.timings.items()},
+                "total": round((perf_counter() - self.started) * 1000, 2)}
@@ -0,0 +1,63 @@
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy.exc import IntegrityError
+
+from models.ticket import Ticket
+from services.config import Config
+from services.database import engine
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+config = Config().get_config()
+
+
+class StreamTickets:
+    """
+    Short-lived, single-use tickets to open a stream with.\n
+    ``EventSource`` can't send headers, tickets are passed in the URL instead of access tokens.
+    A ticket is signed with the identity and the expiry of the token it was created with, and a random nonce.
+    Redeeming stores the nonce in the database, shared by every worker, so a ticket that leaked from a URL or a log
+    can't be replayed.
+    """
+    table = Ticket.__table__
+
+    @staticmethod
+    def serializer(secret_key: str):
+        return URLSafeTimedSerializer(secret_key, salt="stream-ticket")
+
+    @staticmethod
+    def issue(secret_key: str, identity: str, expires: int = None):
+        """
+        Creates a ticket for an identity.
+
+        :param secret_key: Secret key of the application
+        :param identity: JWT identity
+        :param expires: Expiry of the access token, as a timestamp, ``None`` if it doesn't expire
+        :return: String, ticket
+        """
+        return StreamTickets.serializer(secret_key).dumps([identity, expires, uuid4().hex])
+
+    @staticmethod
+    def redeem(secret_key: str, ticket: str):
+        """
+        Verifies a ticket and marks it as used, expired nonces are pruned on the way.
+
+        :param secret_key: Secret key of the application
+        :param ticket: Ticket, as created by ``issue()``
+        :return: Tuple, (identity, expiry), or ``None`` if the ticket is invalid, expired or used
+        """
+        try:
+            identity, expires, nonce = StreamTickets.serializer(secret_key).loads(ticket,
+                                                                                max_age=config.stream.ticket_ttl)
+        except (BadSignature, ValueError, TypeError):
+            return None
+
+        now = datetime.utcnow()
+        try:
+            with engine.begin() as connection:
+                connection.execute(StreamTickets.table.delete().where(StreamTickets.table.c.expires_at < now))
+                connection.execute(StreamTickets.table.insert(), {
+                    "nonce": nonce, "expires_at": now + timedelta(seconds=config.stream.ticket_ttl)})
+        except IntegrityError:
+            return None
+        return identity, expires
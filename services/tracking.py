@@ -0,0 +1,113 @@
+from sqlalchemy import bindparam
+
+from services.config import Config
+
+from atexit import register
+from datetime import datetime
+from logging import getLogger
+from os import getpid
+from threading import Event, Lock, Thread
+
+config = Config().get_config()
+logger = getLogger(__name__)
+
+
+class ActivityTracker:
+    """
+    Buffers user activity tracking in memory.\n
+    Updates are coalesced per user, only the latest action is kept,
+    and written in one bulk ``UPDATE`` every ``tracking.flush_interval`` seconds
+    or once ``tracking.flush_size`` users are pending.\n
+    Writes only happen on the background worker, and at exit, never on the request thread.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._pending = {}
+        self._wake = Event()
+        self._worker = None
+        self._pid = None
+
+    def _ensure_worker(self):
+        # Threads don't survive a fork, so every process starts its own worker
+        if self._worker is not None and self._pid == getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == getpid():
+                return
+            self._pid = getpid()
+            # Imported up front, the flush at exit can't import modules that register exit handlers themselves
+            import models.user
+            import services.database
+            self._wake = Event()
+            self._worker = Thread(target=self._run, name="activity-tracker", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            # Woken early once enough users are pending
+            self._wake.wait(config.tracking.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush activity tracking: {e}")
+
+    def track(self, uuid: str, source: str, address: str = "UNKNOWN", active: bool = True):
+        """
+        Records an action for a user, without touching the database.
+
+        :param uuid: UUID of the user
+        :param source: Name of the action performed
+        :param address: Remote address of the user
+        :param active: Active state of the user
+        :return: Nothing
+        """
+        entry = {"b_uuid": uuid, "b_active": active, "b_action": source,
+                 "b_action_at": datetime.utcnow(), "b_action_ip": address}
+
+        with self._lock:
+            self._pending[uuid] = entry
+            size = len(self._pending)
+
+        self._ensure_worker()
+        if size >= config.tracking.flush_size:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Writes all pending actions in a single bulk ``UPDATE``.\n
+        Failed batches are put back, unless a newer action was recorded in the meantime.
+
+        :return: Integer, amount of users updated
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            from models.user import User
+            from services.database import engine
+
+            table = User.__table__
+            statement = table.update().where(table.c.uuid == bindparam("b_uuid")).values(
+                active=bindparam("b_active"),
+                last_action=bindparam("b_action"),
+                last_action_at=bindparam("b_action_at"),
+                last_action_ip=bindparam("b_action_ip"))
+
+            try:
+                with engine.begin() as connection:
+                    connection.execute(statement, list(batch.values()))
+            except Exception:
+                with self._lock:
+                    for uuid, entry in batch.items():
+                        self._pending.setdefault(uuid, entry)
+                raise
+            return len(batch)
+
+
+activity_tracker = ActivityTracker()
+register(activity_tracker.flush)
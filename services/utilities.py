@@ -1,4 +1,4 @@
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended import verify_jwt_in_request
 
 from random import choice
 from functools import wraps
@@ -111,15 +111,16 @@ class Utilities:
         return result, status
 
     @staticmethod
-    def calculate_time(start: datetime, end: datetime = datetime.now()):
+    def calculate_time(start: datetime, end: datetime = None):
         """
         Calculates time difference in milliseconds.\n
         Returns the result in two decimal rounded string.
 
         :param start: Start datetime object
-        :param end: End datetime object
+        :param end: End datetime object, defaults to now
         :return: Time difference in milliseconds, string.
         """
+        end = end or datetime.now()
         time = round((end - start).total_seconds() * 1000, 2)
         return f"{time}ms"
 
@@ -137,8 +138,10 @@ def admin_required():
         @wraps(fn)
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
-            from models.user import User
-            user = User.query.filter_by(uuid=get_jwt_identity()).first()
+            from services.principal import current_principal
+            user = current_principal()
+            if user is None:
+                return Utilities.return_response(401, "Unauthorized")
             if user.admin:
                 return fn(*args, **kwargs)
             else:
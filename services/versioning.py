@@ -0,0 +1,135 @@
+from sqlalchemy import event, inspect, select
+
+from datetime import datetime
+from itertools import chain
+
+# Tracked tables, with a ``<table>_version`` and ``<table>_last_changed`` column on ``Data``
+TRACKED_TABLES = ("events", "products", "orders", "users")
+
+
+def bump(connection, *models, time: datetime = None):
+    """
+    Increments the versions of the given tables in a single ``UPDATE``, within the caller's transaction.\n
+    The new versions become visible to other processes together with the changes they describe.
+
+    :param connection: Connection within the transaction performing the changes
+    :param models: Tracked tables, see ``TRACKED_TABLES``
+    :param time: Last changed datetime, defaults to ``datetime.utcnow()``
+    :return: Dictionary, tables to (version, last changed) tuples
+    """
+    from models.data import Data
+
+    for model in models:
+        if model not in TRACKED_TABLES:
+            raise ValueError(f"Unknown tracked table <{model}>")
+    if not models:
+        return {}
+
+    time = time or datetime.utcnow()
+    table = Data.__table__
+    values = {}
+    for model in models:
+        values[f"{model}_version"] = table.c[f"{model}_version"] + 1
+        values[f"{model}_last_changed"] = time
+    connection.execute(table.update().values(**values))
+
+    row = connection.execute(select(*[table.c[f"{model}_version"] for model in models]).limit(1)).first()
+    if row is None:
+        return {}
+    return {model: (row[index], time) for index, model in enumerate(models)}
+
+
+def publish(changes):
+    """
+    Applies committed version changes to the in-process caches of this process, and notifies subscribers.
+
+    :param changes: Dictionary, as returned by ``bump()``
+    :return: Nothing
+    """
+    from services.broker import STREAMED_TABLES, broker
+    from services.cache import data_snapshot, product_cache
+
+    for model, (version, time) in changes.items():
+        data_snapshot.apply(model, version, time)
+        if model == "products":
+            product_cache.invalidate()
+        elif model == "users":
+            from services.principal import principal_cache
+            principal_cache.invalidate()
+
+        if model in STREAMED_TABLES:
+            broker.publish({"table": model, "version": version, "last_changed": time})
+
+
+def with_hash_keys(values):
+    """
+    Adds the former ``<table>_hash`` keys to tracking values, for clients comparing hashes.
+
+    :param values: Dictionary with ``<table>_version`` keys
+    :return: Dictionary
+    """
+    result = dict(values)
+    for model in TRACKED_TABLES:
+        if f"{model}_version" in result:
+            result[f"{model}_hash"] = str(result[f"{model}_version"])
+    return result
+
+
+def has_tracked_changes(instance):
+    """
+    Checks whether a persistent instance has pending changes outside of its ``__untracked__`` columns.
+
+    :param instance: Model instance
+    :return: Boolean
+    """
+    untracked = getattr(type(instance), "__untracked__", ())
+    return any(attribute.history.has_changes() for attribute in inspect(instance).attrs
+               if attribute.key not in untracked)
+
+
+def changed_tables(session):
+    """
+    Collects the tracked tables touched by a flush.\n
+    Models declare their table with ``__tracked__``, changes limited to the ``__untracked__`` columns are ignored.
+
+    :param session: Session being flushed
+    :return: Set of tracked tables
+    """
+    tables = set()
+    for instance in chain(session.new, session.deleted):
+        tracked = getattr(type(instance), "__tracked__", None)
+        if tracked is not None:
+            tables.add(tracked)
+
+    for instance in session.dirty:
+        tracked = getattr(type(instance), "__tracked__", None)
+        if tracked is not None and tracked not in tables and has_tracked_changes(instance):
+            tables.add(tracked)
+    return tables
+
+
+def after_flush(session, flush_context):
+    changes = session.info.setdefault("versions", {})
+    tables = changed_tables(session).difference(changes)
+    if tables:
+        changes.update(bump(session.connection(), *sorted(tables)))
+
+
+def after_commit(session):
+    publish(session.info.pop("versions", {}))
+
+
+def after_rollback(session):
+    session.info.pop("versions", None)
+
+
+def track_sessions(session):
+    """
+    Versions tracked tables on every flush of the given session (factory), in the flushing transaction.
+
+    :param session: Session, sessionmaker or scoped_session
+    :return: Nothing
+    """
+    event.listen(session, "after_flush", after_flush)
+    event.listen(session, "after_commit", after_commit)
+    event.listen(session, "after_rollback", after_rollback)
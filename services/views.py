@@ -0,0 +1,76 @@
+from sqlalchemy import select
+
+from models.order import Order
+from models.product import Product
+from models.user import User
+from services.database import db_session
+
+from dataclasses import fields
+
+
+class View:
+    """
+    Column-level projection of a model, with a precomputed row to dictionary mapper.\n
+    Queries only select the projected columns, entities are never hydrated.\n
+    The key column is always selected for pagination, but left out of the mapped result unless projected.
+    """
+
+    def __init__(self, model, names, key: str = "id"):
+        self.model = model
+        self.names = tuple(names)
+        self.columns = [getattr(model, key).label(key)] + [getattr(model, name) for name in self.names]
+
+    def query(self):
+        """
+        Creates a query selecting the projected columns.
+
+        :return: Query
+        """
+        return db_session.query(*self.columns)
+
+    def select(self):
+        """
+        Creates a Core select of the projected columns, for use with ``AsyncSession``.
+
+        :return: Select
+        """
+        return select(*self.columns)
+
+    def map(self, row):
+        """
+        Maps a row of ``query()`` to a dictionary.
+
+        :param row: Row
+        :return: Dictionary
+        """
+        return dict(zip(self.names, row[1:]))
+
+    def all(self, query=None):
+        """
+        Fetches and maps all rows of the given query, or of the whole table.
+
+        :param query: Query created by ``query()``
+        :return: List of dictionaries
+        """
+        return [self.map(row) for row in (query if query is not None else self.query())]
+
+    def first(self, query):
+        """
+        Fetches and maps the first row of the given query.
+
+        :param query: Query created by ``query()``
+        :return: Dictionary, or ``None`` if there is no row
+        """
+        row = query.first()
+        return self.map(row) if row is not None else None
+
+
+# Public information about users, never includes secrets
+public_user_view = View(User, ("uuid", "name", "username", "country", "admin", "tags", "active"))
+
+# Full products and orders, as serialized from their dataclasses
+product_view = View(Product, [field.name for field in fields(Product)])
+order_view = View(Order, [field.name for field in fields(Order)])
+
+# Orders as shown for the current event
+order_summary_view = View(Order, ("uuid", "products", "notes"))
@@ -32,5 +32,14 @@ setup(
         "Flask-Limiter",
         "bcrypt"
     ],
+    extras_require={
+        "speedups": ["orjson"],
+        "asgi": ["starlette", "uvicorn", "aiosqlite", "a2wsgi", "httpx"],
+        "production": ["gunicorn; platform_system != 'Windows'", "waitress"],
+        "redis": ["redis"],
+    },
+    entry_points={
+        "console_scripts": ["orderserver=flaskr.serve:main"],
+    },
     python_requires=">=3.10",
 )
@@ -0,0 +1,109 @@
+"""
+Shared fixtures. Modules read ``./config.json`` on import, so a configuration for a temporary database is written
+and made the working directory before anything of the application is imported.
+"""
+import pytest
+
+from atexit import register
+from json import dump, load
+from os import chdir, path
+from shutil import rmtree
+from sys import path as sys_path
+from tempfile import mkdtemp
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+DIRECTORY = mkdtemp(prefix="orderserver-tests-")
+register(rmtree, DIRECTORY, ignore_errors=True)
+
+
+def write_config():
+    with open(path.join(ROOT, "config-sample.json"), "r", encoding="UTF-8") as handle:
+        config = load(handle)
+
+    config["application"]["debug"] = False
+    config["application"]["reload_interval"] = 0
+    config["database"]["filename"] = "tests.db"
+    config["database"]["absolute_path"] = path.join(DIRECTORY, "tests.db")
+    config["security"]["key_file"] = path.join(DIRECTORY, "keys.json")
+    config["ratelimiting"].update({"default": "100000 per second", "authorization": "100000 per second",
+                                   "storage_uri": "memory://", "routes": {}})
+    config["metrics"].update({"allowed": [], "database": path.join(DIRECTORY, "metrics.db")})
+    config["passwords"]["rounds"] = 4
+    config["events"]["check_interval"] = 3600
+
+    with open(path.join(DIRECTORY, "config.json"), "w", encoding="UTF-8") as handle:
+        dump(config, handle, indent=2)
+
+
+write_config()
+chdir(DIRECTORY)
+sys_path.insert(0, ROOT)
+
+
+def reset_database():
+    """
+    Recreates every table and seeds it like a new installation, and drops every in-process cache.
+    """
+    from sqlalchemy import text
+
+    from services.cache import data_snapshot, product_cache
+    from services.database import Base, db_session, engine
+    from services.events import active_event
+    from services.principal import principal_cache
+    from services.serialization import Serializer
+    from services.startup import Startup
+
+    db_session.remove()
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("PRAGMA user_version=0"))
+    Startup().initialize_database()
+
+    for cache in (data_snapshot, product_cache, principal_cache, active_event):
+        cache.invalidate()
+    Serializer._rows.clear()
+
+
+@pytest.fixture(scope="session")
+def app():
+    from flaskr import create_app
+
+    application = create_app()
+    application.testing = True
+    return application
+
+
+@pytest.fixture
+def database(app):
+    reset_database()
+    yield
+    from services.database import db_session
+    db_session.remove()
+
+
+@pytest.fixture
+def client(app, database):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    """
+    Creates authorization headers for a user.
+    """
+    from flask_jwt_extended import create_access_token
+
+    def create(user):
+        with app.app_context():
+            token = create_access_token(identity=user.uuid,
+                                        additional_claims={"username": user.username, "admin": user.admin})
+        return {"Authorization": f"Bearer {token}"}
+
+    return create
+
+
+@pytest.fixture
+def admin(database):
+    from models.user import User
+
+    return User.query.filter_by(username="admin").first()
@@ -0,0 +1,155 @@
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("a2wsgi")
+pytest.importorskip("httpx")
+
+PATHS = ("/product/all", "/product/last_changed", "/event/current", "/event/all", "/event/last_changed",
+         "/order/current", "/order/all", "/order/last_changed", "/order/unknown", "/product/unknown")
+
+
+@pytest.fixture(scope="module")
+def asgi_app(app):
+    from flaskr.asgi import create_asgi_app
+
+    return create_asgi_app()
+
+
+@pytest.fixture
+def asgi_client(asgi_app, database):
+    from starlette.testclient import TestClient
+
+    with TestClient(asgi_app) as client:
+        yield client
+
+
+def test_responses_match_flask(client, asgi_client, admin, headers):
+    from services.generator import DataGenerator
+
+    # Every user orders, the administrator included
+    DataGenerator(seed=1).run(users=5, products=5, events=1, participation=1.0, password="password")
+    product = client.get("/product/all", headers=headers(admin)).get_json()["result"][0]["uuid"]
+    order = client.get("/order/all", headers=headers(admin)).get_json()["result"][0]["uuid"]
+
+    for path in PATHS + (f"/product/{product}", f"/order/{order}"):
+        expected = client.get(path, headers=headers(admin))
+        response = asgi_client.get(path, headers=headers(admin))
+
+        assert response.status_code == expected.status_code, path
+        assert response.json() == expected.get_json(), path
+        assert response.headers.get("ETag") == expected.headers.get("ETag"), path
+
+
+def test_not_modified_uses_snapshot(asgi_client, admin, headers, monkeypatch):
+    from services.cache import DataSnapshot
+
+    etag = asgi_client.get("/event/all", headers=headers(admin)).headers["ETag"]
+
+    def load(self):
+        raise AssertionError("Data was queried")
+
+    monkeypatch.setattr(DataSnapshot, "_load", load)
+    response = asgi_client.get("/event/all", headers={**headers(admin), "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+
+async def open_stream(asgi_app, path, headers, until):
+    """
+    Drives a stream of the ASGI application directly, the test client waits for responses to end.\n
+    Awaits ``until`` with the body received so far, the client disconnects once it returns true.
+
+    :return: Tuple, (status, body)
+    """
+    import asyncio
+
+    disconnected = asyncio.Event()
+    status, body = [], []
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+            if await until(b"".join(body)):
+                disconnected.set()
+
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "root_path": "", "scheme": "http", "http_version": "1.1", "client": ("127.0.0.1", 1),
+             "server": ("testserver", 80),
+             "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()]}
+    await asyncio.wait_for(asgi_app(scope, receive, send), 10)
+    return status[0], b"".join(body)
+
+
+def run_stream(asgi_app, path, headers, until):
+    import asyncio
+
+    return asyncio.run(open_stream(asgi_app, path, headers, until))
+
+
+def test_stream_pushes_changes(asgi_app, database, admin, headers):
+    import asyncio
+
+    from services.broker import broker
+    from services.cache import data_snapshot
+
+    version = data_snapshot.get()["products_version"]
+
+    async def until(body):
+        if b"event: snapshot" in body and b"event: change" not in body:
+            # Published from another thread, like a write served by the Flask application
+            await asyncio.get_running_loop().run_in_executor(None, broker.publish, {
+                "table": "products", "version": version + 1, "last_changed": None})
+        return b"event: change" in body
+
+    status, body = run_stream(asgi_app, "/events/stream", headers(admin), until)
+
+    assert status == 200
+    assert f'"version":{version + 1}'.encode() in body.split(b"event: change")[1]
+    assert broker.count() == 0
+
+
+def test_streams_do_not_hold_threads(asgi_app, database, admin, headers):
+    import asyncio
+
+    from services.broker import broker
+    from services.config import Config
+
+    config = Config().get_config()
+    # More streams than threads of the Flask application and the adapter, all open at once
+    amount = config.asgi.wsgi_workers + config.server.threads + 1
+    opened = []
+
+    async def until(body):
+        if b"event: snapshot" not in body:
+            return False
+        opened.append(body)
+        while len(opened) < amount:
+            await asyncio.sleep(0.01)
+        return True
+
+    async def run():
+        return await asyncio.gather(*[open_stream(asgi_app, "/events/stream", headers(admin), until)
+                                      for _ in range(amount)])
+
+    assert [status for status, _ in asyncio.run(run())] == [200] * amount
+    assert broker.count() == 0
+
+
+def test_stream_tickets_are_single_use(client, asgi_app, admin, headers):
+    ticket = client.post("/events/ticket", headers=headers(admin)).get_json()["result"]["ticket"]
+
+    async def until(body):
+        return b"event: snapshot" in body
+
+    assert run_stream(asgi_app, f"/events/stream?ticket={ticket}", {}, until)[0] == 200
+    assert run_stream(asgi_app, f"/events/stream?ticket={ticket}", {}, until)[0] == 401
@@ -0,0 +1,67 @@
+def login(client, username, password):
+    return client.post("/auth/login", json={"username": username, "password": password})
+
+
+def test_login(client, admin):
+    response = login(client, "admin", "admin")
+
+    assert response.status_code == 200
+    assert response.get_json()["login"]["uuid"] == admin.uuid
+    assert login(client, "admin", "wrong").status_code == 401
+
+
+def test_saturated_pool_sheds_logins(client, monkeypatch):
+    from threading import BoundedSemaphore
+
+    from services.config import Config
+    from services.passwords import password_pool
+
+    password_pool._ensure_executor()
+    # Every slot taken by other logins
+    monkeypatch.setattr(password_pool, "_slots", BoundedSemaphore(1))
+    password_pool._slots.acquire()
+    rejected = password_pool.stats()["rejected"]
+
+    response = login(client, "admin", "admin")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(Config().get_config().passwords.retry_after)
+    assert password_pool.stats()["rejected"] == rejected + 1
+
+
+def test_unknown_users_are_verified_against_dummy_hash(client, monkeypatch):
+    import services.passwords as passwords
+
+    original, checked = passwords.checkpw, []
+
+    def checkpw(password, hashed):
+        checked.append((password, hashed))
+        return original(password, hashed)
+
+    monkeypatch.setattr(passwords, "checkpw", checkpw)
+
+    assert login(client, "nobody", "secret").status_code == 401
+    assert [password for password, _ in checked] == [b"secret"]
+    assert checked[0][1] == passwords.password_pool._dummy.encode("UTF-8")
+
+
+def test_login_rehashes_outdated_hash(client, admin):
+    from bcrypt import checkpw, gensalt, hashpw
+
+    from models.user import User
+    from services.config import Config
+    from services.database import db_session
+    from services.passwords import PasswordPool
+
+    rounds = Config().get_config().passwords.rounds
+    user = User.query.filter_by(uuid=admin.uuid).first()
+    user.password = hashpw(b"admin", gensalt(rounds + 1)).decode("UTF-8")
+    db_session.commit()
+    assert PasswordPool.needs_rehash(user.password)
+
+    assert login(client, "admin", "admin").status_code == 200
+
+    db_session.expire_all()
+    stored = User.query.filter_by(uuid=admin.uuid).first().password
+    assert stored.split("$")[2] == f"{rounds:02d}"
+    assert checkpw(b"admin", stored.encode("UTF-8"))
@@ -0,0 +1,69 @@
+def test_not_modified(client, admin, headers):
+    response = client.get("/event/all", headers=headers(admin))
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert client.get("/event/all", headers={**headers(admin), "If-None-Match": etag}).status_code == 304
+    assert client.get("/event/all", headers={**headers(admin), "If-Modified-Since": response.headers["Last-Modified"]}
+                      ).status_code == 304
+    assert client.get("/event/all", headers={**headers(admin), "If-None-Match": '"other"'}).status_code == 200
+
+
+def test_not_modified_requires_authentication(client, admin, headers):
+    from models.user import User
+    from services.database import db_session
+    from services.generator import DataGenerator
+
+    DataGenerator(seed=1).run(users=2)
+    user = User.query.filter_by(admin=False).first()
+    user_headers = headers(user)
+    etag = client.get("/event/all", headers=user_headers).headers["ETag"]
+
+    assert client.get("/event/all", headers={"If-None-Match": etag}).status_code == 401
+
+    # Tokens outlive their user, which mustn't be able to revalidate anymore
+    db_session.delete(user)
+    db_session.commit()
+    assert client.get("/event/all", headers={**user_headers, "If-None-Match": etag}).status_code == 401
+
+
+def test_etag_changes_with_version(client, admin, headers):
+    from models.event import Event
+    from services.database import db_session
+
+    etag = client.get("/event/all", headers=headers(admin)).headers["ETag"]
+    db_session.add(Event(active=False))
+    db_session.commit()
+
+    response = client.get("/event/all", headers={**headers(admin), "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_etag_changes_when_event_ends(client, admin, headers, monkeypatch):
+    import services.events as events
+    from models.event import Event
+    from models.order import Order
+    from services.database import db_session
+    from services.events import active_event
+
+    current_event = active_event.get()
+    # Gives the responses a Last-Modified
+    db_session.add(Event(active=False))
+    db_session.add(Order(user=admin.uuid, event=current_event.uuid, products=[], total_price=0.0))
+    db_session.commit()
+    responses = {path: client.get(path, headers=headers(admin)) for path in ("/event/current", "/order/current")}
+
+    # The event ends by the clock, before the scheduler deactivates it and bumps the events version
+    class Clock(events.datetime):
+        @classmethod
+        def utcnow(cls):
+            return current_event.until
+
+    monkeypatch.setattr(events, "datetime", Clock)
+
+    for path, response in responses.items():
+        assert client.get(path, headers={**headers(admin), "If-None-Match": response.headers["ETag"]}
+                          ).status_code != 304, path
+        assert client.get(path, headers={**headers(admin), "If-Modified-Since": response.headers["Last-Modified"]}
+                          ).status_code != 304, path
@@ -0,0 +1,138 @@
+import pytest
+
+from json import dump, dumps
+
+
+def write(directory, values):
+    path = directory / "config.json"
+    with open(path, "w", encoding="UTF-8") as handle:
+        dump(values, handle)
+    return str(path)
+
+
+# The configuration of the first release, before any of the sections added since
+FIRST_RELEASE = {
+    "application": {"name": "OrderServer", "debug": True},
+    "server": {"host": "localhost", "port": 8000, "version": "/v1/"},
+    "security": {"character_list": "abcd-$.01234567890", "secret_length": 16},
+    "ratelimiting": {"default": "10 per second", "authorization": "1 per second"},
+    "database": {"local": True, "filename": "flaskr.db", "absolute_path": "full/path/to/flaskr.db"},
+}
+
+
+def test_defaults_for_old_configuration(tmp_path):
+    from services.config import parse_snapshot
+
+    snapshot = parse_snapshot(write(tmp_path, FIRST_RELEASE))
+
+    assert snapshot.database.engine.journal_mode == "WAL"
+    assert snapshot.database.filename == "flaskr.db"
+    assert snapshot.stream.ticket_ttl == 30
+    assert snapshot.ratelimiting.default == "10 per second"
+    assert snapshot.ratelimiting.routes.to_dict() == {}
+
+
+def test_configured_values_take_precedence(tmp_path):
+    from services.config import parse_snapshot
+
+    values = {**FIRST_RELEASE, "database": {**FIRST_RELEASE["database"], "engine": {"journal_mode": "DELETE"}},
+              "ratelimiting": {**FIRST_RELEASE["ratelimiting"], "routes": {"auth.post_login": "1 per minute"}}}
+    snapshot = parse_snapshot(write(tmp_path, values))
+
+    assert snapshot.database.engine.journal_mode == "DELETE"
+    assert snapshot.database.engine.pool_size == 8
+    assert snapshot.ratelimiting.routes.to_dict() == {"auth.post_login": "1 per minute"}
+
+
+def test_environment_overrides(tmp_path, monkeypatch):
+    from services.config import parse_snapshot
+
+    monkeypatch.setenv("ORDERSERVER_SERVER__PORT", "9000")
+    monkeypatch.setenv("ORDERSERVER_DATABASE__ENGINE__POOL_SIZE", "4")
+    monkeypatch.setenv("ORDERSERVER_APPLICATION__NAME", "Orders")
+    snapshot = parse_snapshot(write(tmp_path, FIRST_RELEASE))
+
+    assert snapshot.server.port == 9000
+    assert snapshot.database.engine.pool_size == 4
+    assert snapshot.database.engine.journal_mode == "WAL"
+    assert snapshot.application.name == "Orders"
+
+
+@pytest.mark.parametrize("name, value", [
+    ("ORDERSERVER_DATABASE__ENGINE__POOL_SIZE", "abc"),
+    ("ORDERSERVER_DATABASE__ENGINE__POOL_SIZE", "true"),
+    ("ORDERSERVER_DATABASE__ENGINE__POOL_SIZE", "0"),
+    ("ORDERSERVER_DATABASE__ENGINE__JOURNAL_MODE", "WAL; DROP TABLE users"),
+    ("ORDERSERVER_RATELIMITING__DEFAULT", "often"),
+    ("ORDERSERVER_RATELIMITING__ROUTES", '{"auth.post_login": "often"}'),
+    ("ORDERSERVER_STREAM__TICKET_TTL", "1.5"),
+    ("ORDERSERVER_METRICS__ALLOWED", '["localhost"]'),
+])
+def test_invalid_values_are_rejected(tmp_path, monkeypatch, name, value):
+    from services.config import parse_snapshot
+
+    monkeypatch.setenv(name, value)
+    with pytest.raises(AssertionError):
+        parse_snapshot(write(tmp_path, FIRST_RELEASE))
+
+
+def reloading(tmp_path, monkeypatch, values):
+    import services.config as config_module
+    from services.config import LiveConfig
+
+    clock = [0.0]
+    monkeypatch.setattr(config_module, "monotonic", lambda: clock[0])
+    path = write(tmp_path, values)
+    config = LiveConfig(path)
+
+    def change(changed):
+        with open(path, "w", encoding="UTF-8") as handle:
+            handle.write(changed)
+        # The file is only checked once the reload interval passed
+        clock[0] += 10
+
+    return config, change
+
+
+def test_reload_on_change(tmp_path, monkeypatch):
+    config, change = reloading(tmp_path, monkeypatch, FIRST_RELEASE)
+    snapshot = config.snapshot()
+
+    change(dumps({**FIRST_RELEASE, "server": {**FIRST_RELEASE["server"], "port": 9000}}))
+
+    assert config.server.port == 9000
+    # Snapshots taken before keep their values
+    assert snapshot.server.port == 8000
+
+
+@pytest.mark.parametrize("changed", [
+    "{ not json",
+    dumps({**FIRST_RELEASE, "server": {**FIRST_RELEASE["server"], "port": "9000"}}),
+    dumps({**FIRST_RELEASE, "database": {**FIRST_RELEASE["database"], "engine": {"synchronous": "SOMETIMES"}}}),
+    dumps({**FIRST_RELEASE, "ratelimiting": {**FIRST_RELEASE["ratelimiting"], "default": "fast"}}),
+])
+def test_invalid_reload_keeps_snapshot(tmp_path, monkeypatch, changed):
+    config, change = reloading(tmp_path, monkeypatch, FIRST_RELEASE)
+
+    change(changed)
+
+    assert config.server.port == 8000
+    assert config.database.engine.synchronous == "NORMAL"
+    assert config.ratelimiting.default == "10 per second"
+
+
+def test_section_is_read_only():
+    from services.config import Section
+
+    section = Section({"server": {"port": 8000, "hosts": ["a", {"name": "b"}]}})
+
+    assert section.server.port == 8000
+    assert section.server.missing is None
+    assert section.missing is None
+    assert "server" in section and "missing" not in section
+    assert section.server.hosts[1].name == "b"
+    with pytest.raises(AttributeError):
+        section.server.port = 9000
+    with pytest.raises(TypeError):
+        section.server._values["port"] = 9000
+    assert isinstance(section.server.hosts, tuple)
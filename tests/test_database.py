@@ -0,0 +1,40 @@
+import pytest
+
+
+def profile(**values):
+    from services.config import DEFAULTS, Section
+
+    return Section({**DEFAULTS["database"]["engine"], **values})
+
+
+def test_engine_pragmas():
+    from services.database import engine_pragmas
+
+    assert engine_pragmas(profile(journal_mode="wal", synchronous="normal")) == [
+        "PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL", "PRAGMA cache_size=-65536",
+        "PRAGMA mmap_size=268435456", "PRAGMA busy_timeout=5000"]
+
+
+@pytest.mark.parametrize("values", [
+    {"journal_mode": "WAL; DROP TABLE users"},
+    {"synchronous": "FULL; DROP TABLE users"},
+    {"synchronous": 1},
+    {"cache_size": "1; DROP TABLE users"},
+    {"busy_timeout": 1.5},
+    {"mmap_size": True},
+])
+def test_engine_pragmas_rejects(values):
+    from services.database import engine_pragmas
+
+    with pytest.raises(ValueError):
+        engine_pragmas(profile(**values))
+
+
+def test_connections_use_profile(database):
+    from sqlalchemy import text
+
+    from services.database import engine
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+
+def test_active_event_does_not_start_scheduler(database, monkeypatch):
+    from services.events import active_event, event_scheduler
+
+    def ensure_started():
+        raise AssertionError("Scheduler started by the cache")
+
+    monkeypatch.setattr(event_scheduler, "ensure_started", ensure_started)
+    active_event.invalidate()
+
+    assert active_event.get() is not None
+
+
+def test_scheduler_expires_orders_and_ends_events(database, admin):
+    from models.event import Event
+    from models.order import Order
+    from services.cache import data_snapshot
+    from services.database import db_session
+    from services.events import active_event, event_scheduler
+
+    current_event = active_event.get()
+    db_session.add(Order(user=admin.uuid, event=current_event.uuid, products=[], total_price=0.0))
+    db_session.commit()
+    version = data_snapshot.get()["events_version"]
+
+    assert event_scheduler.check(current_event.deadline + timedelta(seconds=1)) == (1, 0)
+    assert event_scheduler.check(current_event.until + timedelta(seconds=1)) == (0, 1)
+
+    db_session.expire_all()
+    assert Order.query.filter_by(event=current_event.uuid).first().expired
+    assert not Event.query.filter_by(uuid=current_event.uuid).first().active
+    # The cache follows the events version, without being invalidated
+    assert data_snapshot.get()["events_version"] == version + 1
+    # Gone because it was deactivated, it hasn't ended yet by the clock
+    assert active_event.get() is None
+    assert current_event.until > datetime.utcnow()
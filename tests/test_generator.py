@@ -0,0 +1,30 @@
+from conftest import reset_database
+from models.order import Order
+from models.user import User
+from services.generator import DataGenerator
+
+
+def generated_orders():
+    return [(order.user, order.event, tuple(order.products)) for order in Order.query.order_by(Order.id)]
+
+
+def test_generator_skips_values_of_existing_users(database):
+    # The seeded administrator owns 1234AB, the postal code of generated number 9234
+    assert DataGenerator.postal_code(9234) == "1234AB"
+
+    report = DataGenerator(seed=1).run(users=9300, products=20, events=1)
+
+    assert report["users"] == 9300
+    assert User.query.count() == 9301
+    assert User.query.filter_by(postal_code="1234AB").count() == 1
+
+
+def test_generator_is_deterministic(database):
+    DataGenerator(seed=5).run(users=200, products=30, events=2)
+    orders = generated_orders()
+
+    reset_database()
+    DataGenerator(seed=5).run(users=200, products=30, events=2)
+
+    assert orders
+    assert generated_orders() == orders
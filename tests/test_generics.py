@@ -0,0 +1,19 @@
+def test_last_changed(client, admin, headers):
+    response = client.get("/last_changed", headers=headers(admin))
+
+    assert response.status_code == 200
+    assert "products_version" in response.get_json()["result"]
+
+
+def test_last_changed_without_data(client, admin, headers):
+    from models.data import Data
+    from services.cache import data_snapshot
+    from services.database import db_session
+
+    Data.query.delete()
+    db_session.commit()
+    data_snapshot.invalidate()
+
+    for path in ("/last_changed", "/product/last_changed", "/event/last_changed", "/order/last_changed"):
+        response = client.get(path, headers=headers(admin))
+        assert response.status_code == 503, path
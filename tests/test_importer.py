@@ -0,0 +1,97 @@
+import pytest
+
+from json import dump
+
+from sqlalchemy.exc import OperationalError
+
+from models.product import Product
+from services.importer import ProductImporter
+
+
+def product(name, price=1.5):
+    return {"name": name, "brand": "Brand", "price": price, "category": "Snacks", "description": "Tasty",
+            "image": "null", "image_path": "/static/images/null.jpg", "original_link": "", "allergens": [],
+            "ingredients": [], "extra": []}
+
+
+def write_catalog(tmp_path, products):
+    path = tmp_path / "products.json"
+    with open(path, "w", encoding="UTF-8") as handle:
+        dump({"products": products}, handle)
+    return str(path)
+
+
+def test_import_inserts_updates_and_removes(database, tmp_path):
+    ProductImporter().run(write_catalog(tmp_path, [product("A"), product("B"), product("C")]))
+    report = ProductImporter().run(write_catalog(tmp_path, [product("A"), product("B", 2.0)]))
+
+    assert (report["unchanged"], report["updated"], report["deleted"]) == (1, 1, 1)
+    assert sorted(name for name, in Product.query.with_entities(Product.name)) == ["A", "B"]
+
+
+def test_import_with_invalid_rows_keeps_existing_products(database, tmp_path):
+    ProductImporter().run(write_catalog(tmp_path, [product("A"), product("B")]))
+    report = ProductImporter().run(write_catalog(tmp_path, [product("A"), product("A"), {"name": "B"}]))
+
+    assert report["invalid"] == 2
+    assert report["deleted"] == 0
+    assert report["deletion_skipped"] is True
+    assert Product.query.count() == 2
+
+
+def test_import_of_only_invalid_rows_keeps_catalog(database, tmp_path):
+    ProductImporter().run(write_catalog(tmp_path, [product("A"), product("B")]))
+    report = ProductImporter().run(write_catalog(tmp_path, [{"name": "A", "price": "free"}, 1]))
+
+    assert report["invalid"] == 2
+    assert Product.query.count() == 2
+
+
+@pytest.mark.parametrize("catalog", ["[]", '{"products": []}'])
+def test_empty_catalog_keeps_products(database, tmp_path, catalog):
+    ProductImporter().run(write_catalog(tmp_path, [product("A"), product("B")]))
+    path = tmp_path / "empty.json"
+    path.write_text(catalog, encoding="UTF-8")
+
+    report = ProductImporter().run(str(path))
+
+    assert report["deleted"] == 0
+    assert report["deletion_skipped_reason"] == "The catalog is empty"
+    assert Product.query.count() == 2
+    assert ProductImporter().run(str(path), force=True)["deleted"] == 2
+
+
+def test_import_caps_deletions(database, tmp_path):
+    ProductImporter().run(write_catalog(tmp_path, [product(name) for name in "ABCD"]))
+    path = write_catalog(tmp_path, [product("A")])
+
+    report = ProductImporter().run(path)
+    assert report["deletion_skipped"] is True
+    assert Product.query.count() == 4
+
+    assert ProductImporter().run(path, force=True)["deleted"] == 3
+    assert Product.query.count() == 1
+
+
+def test_import_rejects_uuid_of_other_product(database, tmp_path):
+    ProductImporter().run(write_catalog(tmp_path, [product("A"), product("B")]))
+    taken = Product.query.filter_by(name="A").first().uuid
+
+    report = ProductImporter().run(write_catalog(tmp_path, [
+        product("A"), product("B"), {**product("C"), "uuid": taken}, {**product("D"), "uuid": "new"},
+        {**product("E"), "uuid": "new"}]))
+
+    assert report["inserted"] == 1
+    assert [error["index"] for error in report["errors"]] == [2, 4]
+    assert Product.query.filter_by(uuid="new").first().name == "D"
+
+
+def test_admin_import_reports_database_errors(client, admin, headers, monkeypatch):
+    def fail(self, path, force=False):
+        raise OperationalError("UPDATE products", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(ProductImporter, "run", fail)
+    response = client.get("/admin/product/populate", headers=headers(admin))
+
+    assert response.status_code == 503
+    assert response.json["details"] == {"error": "OperationalError"}
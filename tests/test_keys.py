@@ -0,0 +1,55 @@
+from conftest import DIRECTORY, ROOT
+
+from json import load
+from os import listdir
+
+
+def test_key_file_is_created_once(tmp_path):
+    from services.keys import KEYS, create_key_file
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    key_path = tmp_path / "instance" / "keys.json"
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: create_key_file(str(key_path)), range(16)))
+
+    with open(key_path, "r", encoding="UTF-8") as handle:
+        keys = load(handle)
+    create_key_file(str(key_path))
+
+    assert set(keys) == set(KEYS)
+    assert keys["secret_key"] != keys["jwt_secret_key"]
+    assert listdir(key_path.parent) == ["keys.json"]
+    with open(key_path, "r", encoding="UTF-8") as handle:
+        assert load(handle) == keys
+
+
+def test_configured_keys_take_precedence(tmp_path, monkeypatch):
+    from services import keys
+    from services.config import Section
+
+    key_path = str(tmp_path / "keys.json")
+    security = {"secret_key": "configured", "jwt_secret_key": "", "key_file": key_path}
+    monkeypatch.setattr(keys, "config", Section({"security": security}))
+
+    secret_key, jwt_secret_key = keys.load_signing_keys()
+    with open(key_path, "r", encoding="UTF-8") as handle:
+        stored = load(handle)
+    assert (secret_key, jwt_secret_key) == ("configured", stored["jwt_secret_key"])
+
+    security.update(secret_key="secret", jwt_secret_key="jwt", key_file=str(tmp_path / "unused.json"))
+    monkeypatch.setattr(keys, "config", Section({"security": security}))
+    assert keys.load_signing_keys() == ("secret", "jwt")
+    assert listdir(tmp_path) == ["keys.json"]
+
+
+def test_processes_share_signing_keys(app):
+    from subprocess import run
+    from sys import executable
+
+    script = (f"import sys; sys.path.insert(0, {ROOT!r})\n"
+              "from services.keys import load_signing_keys\n"
+              "print(*load_signing_keys())\n")
+    output = run([executable, "-c", script], cwd=DIRECTORY, check=True, timeout=60, capture_output=True, text=True)
+
+    assert output.stdout.split() == [app.config["SECRET_KEY"], app.config["JWT_SECRET_KEY"]]
@@ -0,0 +1,94 @@
+import pytest
+
+from multiprocessing import get_context
+
+
+@pytest.fixture
+def shared(tmp_path):
+    """
+    Creates a registry shared through a metrics store of its own.
+    """
+    from services.metrics import Counter, Gauge, Histogram, MetricsStore, Registry
+
+    registry = Registry()
+    counter = registry.register(Counter("test_total", "Counter.", ("name",)))
+    histogram = registry.register(Histogram("test_seconds", "Histogram.", ("name",), (0.1, 1.0)))
+    registry.register(Gauge("test_gauge", "Gauge.", (), lambda: {(): 1}))
+    registry.store = MetricsStore(str(tmp_path / "metrics.db"), 60)
+    return registry, counter, histogram
+
+
+def count_in_worker(registry, counter, histogram):
+    counter.inc("worker", amount=2)
+    histogram.observe(0.5, "worker")
+    registry.store.flush(registry)
+
+
+def test_metrics_require_admin(client, admin, headers):
+    from models.user import User
+    from services.generator import DataGenerator
+
+    DataGenerator(seed=1).run(users=2)
+    user = User.query.filter_by(admin=False).first()
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=headers(user)).status_code == 403
+
+    response = client.get("/metrics", headers=headers(admin))
+    assert response.status_code == 200
+    assert b"orderserver_request_duration_seconds" in response.data
+
+
+def test_metrics_allowed_addresses(monkeypatch):
+    import services.metrics as metrics
+    from services.config import Section
+
+    monkeypatch.setattr(metrics, "config", Section({"metrics": {"allowed": ["10.0.0.0/8", "::1"]}}))
+
+    assert metrics.address_allowed("10.1.2.3")
+    assert metrics.address_allowed("::1")
+    assert not metrics.address_allowed("192.168.1.1")
+    assert not metrics.address_allowed("unknown")
+
+
+def test_metrics_combine_processes(shared):
+    registry, counter, histogram = shared
+
+    # The worker exits before the metrics are rendered, its counts are kept
+    worker = get_context("fork").Process(target=count_in_worker, args=shared)
+    worker.start()
+    worker.join()
+    assert worker.exitcode == 0
+
+    counter.inc("worker")
+    histogram.observe(0.05, "worker")
+    rendered = registry.render().splitlines()
+
+    assert 'test_total{name="worker"} 3.0' in rendered
+    assert 'test_seconds_bucket{name="worker",le="0.1"} 1' in rendered
+    assert 'test_seconds_bucket{name="worker",le="1.0"} 2' in rendered
+    assert 'test_seconds_count{name="worker"} 2' in rendered
+    assert len([line for line in rendered if line.startswith("test_gauge{")]) == 2
+
+    # Rendering again doesn't count twice
+    assert 'test_total{name="worker"} 3.0' in registry.render().splitlines()
+
+
+def test_failed_statements_keep_query_timing(database):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from services.database import engine
+    from services.metrics import query_duration
+
+    def observed():
+        return sum(entry[2] for entry in query_duration._values.values())
+
+    with engine.connect() as connection:
+        before = observed()
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+        connection.execute(text("SELECT 1"))
+
+        assert observed() == before + 1
+        assert "query_started" not in connection.info
@@ -0,0 +1,117 @@
+from sqlalchemy import text
+
+from datetime import datetime
+from uuid import uuid4
+
+
+def insert_order(connection, user, event):
+    uuid = str(uuid4())
+    connection.execute(text('INSERT INTO orders (uuid, "user", products, total_price, event, created_at, '
+                            'last_changed_at, expired, completed) '
+                            'VALUES (:uuid, :user, \'[]\', 0, :event, :now, :now, 0, 0)'),
+                       {"uuid": uuid, "user": user, "event": event, "now": datetime.utcnow()})
+    return uuid
+
+
+def test_migration_backs_up_duplicate_orders(database, admin):
+    from services.database import engine
+    from services.migrations import MIGRATIONS, get_schema_version, migrate_db
+
+    # A database from before the unique index, holding two orders of the same user for one event
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_orders_user_event"))
+        duplicate = insert_order(connection, admin.uuid, "event")
+        connection.execute(text("UPDATE orders SET notes = 'keep me' WHERE uuid = :uuid"), {"uuid": duplicate})
+        latest = insert_order(connection, admin.uuid, "event")
+        other = insert_order(connection, admin.uuid, "other")
+        connection.execute(text("PRAGMA user_version=0"))
+
+    assert migrate_db() == len(MIGRATIONS)
+
+    with engine.connect() as connection:
+        remaining = {row[0] for row in connection.execute(text("SELECT uuid FROM orders"))}
+        indexes = {row[1] for row in connection.execute(text("PRAGMA index_list(orders)"))}
+        backup = connection.execute(text("SELECT uuid, notes FROM orders_duplicates")).fetchall()
+        assert get_schema_version(connection) == len(MIGRATIONS)
+        connection.execute(text("DROP TABLE orders_duplicates"))
+    assert remaining == {latest, other}
+    assert [tuple(row) for row in backup] == [(duplicate, "keep me")]
+    assert "ix_orders_user_event" in indexes
+
+
+def test_defaults_per_row(database):
+    from models.order import Order
+    from models.user import User
+    from services.database import db_session
+
+    users = [User(username=f"user{number}", name=f"User {number}", email=f"{number}@example.com",
+                  phone_number=str(number), address=f"Street {number}", postal_code=f"{number}000AA",
+                  password="password") for number in range(2)]
+    db_session.add_all(users)
+    db_session.commit()
+    orders = [Order(user=users[0].uuid, event=event, total_price=0.0) for event in ("first", "second")]
+    db_session.add_all(orders)
+    db_session.commit()
+
+    assert users[0].uuid != users[1].uuid
+    assert users[0].secret != users[1].secret
+    assert orders[0].uuid != orders[1].uuid
+    assert users[0].created_at <= orders[0].created_at <= orders[1].created_at
+
+
+def test_concurrent_add_conflicts(client, admin, headers, monkeypatch):
+    from services.database import engine
+    from services.events import active_event
+    from services.orders import OrderValidator
+
+    event = active_event.get()
+    concurrent = {}
+
+    def validate(payload, current_event):
+        # Another request creates the order after the existence check of this one
+        with engine.begin() as connection:
+            concurrent["uuid"] = insert_order(connection, admin.uuid, event.uuid)
+        return {"products": [], "notes": None, "total_price": 0.0}, []
+
+    monkeypatch.setattr(OrderValidator, "validate", staticmethod(validate))
+    response = client.post("/order/add", json={"products": []}, headers=headers(admin))
+
+    assert response.status_code == 409
+    assert response.get_json()["details"]["uuid"] == concurrent["uuid"]
+
+
+def test_migration_converts_pickled_orders(database, admin):
+    from pickle import dumps
+
+    from models.order import Order
+    from services.database import db_session, engine
+    from services.migrations import convert_pickled_columns
+
+    with engine.begin() as connection:
+        pickled = insert_order(connection, admin.uuid, "pickled")
+        converted = insert_order(connection, admin.uuid, "converted")
+        connection.execute(text("UPDATE orders SET products = :products WHERE uuid = :uuid"),
+                           {"uuid": pickled, "products": dumps(["first", "second"])})
+        convert_pickled_columns(connection)
+        # Converted values are text, running the step again leaves them alone
+        convert_pickled_columns(connection)
+        types = dict(connection.execute(text("SELECT uuid, typeof(products) FROM orders")).fetchall())
+
+    assert types == {pickled: "text", converted: "text"}
+    db_session.expire_all()
+    assert Order.query.filter_by(uuid=pickled).one().products == ["first", "second"]
+    assert Order.query.filter_by(uuid=converted).one().products == []
+
+
+def test_orders_containing_product(database, admin):
+    from models.order import Order
+    from services.database import db_session
+
+    db_session.add_all([Order(user=admin.uuid, event="first", total_price=1.0, products=["apple", "pear"]),
+                        Order(user=admin.uuid, event="second", total_price=1.0, products=["pear"]),
+                        Order(user=admin.uuid, event="third", total_price=0.0, products=[])])
+    db_session.commit()
+
+    assert sorted(order.event for order in Order.containing("pear")) == ["first", "second"]
+    assert [order.event for order in Order.containing("apple")] == ["first"]
+    assert Order.containing("app").count() == 0
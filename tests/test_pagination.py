@@ -0,0 +1,65 @@
+import pytest
+
+from json import loads
+
+
+@pytest.fixture
+def generated(database):
+    from services.generator import DataGenerator
+
+    DataGenerator(seed=1).run(users=4, products=4, events=3, participation=1.0)
+
+
+def walk(client, headers, path, limit):
+    """
+    Fetches every page of a list endpoint, returning the pages.
+    """
+    pages, cursor = [], None
+    while True:
+        query = f"?limit={limit}" + (f"&cursor={cursor}" if cursor is not None else "")
+        body = client.get(path + query, headers=headers).get_json()
+        pages.append(body["result"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("path", ["/product/all", "/event/all", "/order/all"])
+def test_pages_cover_everything_once(client, admin, headers, generated, path):
+    everything = client.get(path, headers=headers(admin)).get_json()["result"]
+    assert len(everything) >= 3
+
+    for limit in range(1, len(everything) + 2):
+        pages = walk(client, headers(admin), path, limit)
+
+        assert [item["uuid"] for page in pages for item in page] == [item["uuid"] for item in everything]
+        # A last page that is exactly full doesn't point to an empty one
+        assert all(len(page) == limit for page in pages[:-1])
+        assert 0 < len(pages[-1]) <= limit
+        assert len(pages) == -(-len(everything) // limit)
+
+
+@pytest.mark.parametrize("path", ["/product/all", "/event/all"])
+def test_cursor_past_the_end(client, admin, headers, generated, path):
+    response = client.get(f"{path}?cursor=1000000", headers=headers(admin))
+
+    assert response.status_code == 200
+    assert response.get_json()["result"] == []
+    assert response.get_json()["next_cursor"] is None
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=-1", "limit=abc", "limit=1000000", "cursor=abc"])
+def test_invalid_parameters(client, admin, headers, query):
+    assert client.get(f"/product/all?{query}", headers=headers(admin)).status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/product/all", "/event/all"])
+def test_stream_from_cursor(client, admin, headers, generated, path):
+    everything = client.get(path, headers=headers(admin)).get_json()["result"]
+    cursor = client.get(f"{path}?limit=1", headers=headers(admin)).get_json()["next_cursor"]
+
+    response = client.get(f"{path}?format=ndjson&cursor={cursor}", headers=headers(admin))
+    rows = [loads(line) for line in response.data.decode("UTF-8").splitlines()]
+
+    assert response.mimetype == "application/x-ndjson"
+    assert [row["uuid"] for row in rows] == [item["uuid"] for item in everything[1:]]
@@ -0,0 +1,90 @@
+def cache_config(monkeypatch, ttl=30, size=4096):
+    from services import principal
+    from services.config import Section
+
+    monkeypatch.setattr(principal, "config", Section({"cache": {"principal_ttl": ttl, "principal_size": size}}))
+
+
+def test_principals_expire_after_ttl(database, admin, monkeypatch):
+    from services import principal
+
+    cache_config(monkeypatch, ttl=30)
+    now = [1000.0]
+    monkeypatch.setattr(principal, "monotonic", lambda: now[0])
+
+    cache = principal.PrincipalCache()
+    loaded = cache.get(admin.uuid)
+    assert loaded.username == "admin"
+    assert cache.lookup(admin.uuid) is loaded
+
+    now[0] += 29
+    assert cache.lookup(admin.uuid) is loaded
+    now[0] += 1
+    assert cache.lookup(admin.uuid) is None
+    assert cache.get(admin.uuid) == loaded
+
+
+def test_least_recently_used_principals_are_evicted(monkeypatch):
+    from services.principal import Principal, PrincipalCache
+
+    cache_config(monkeypatch, size=2)
+    cache = PrincipalCache()
+    first, second, third = (Principal(index, f"uuid-{index}", f"user-{index}", False) for index in range(3))
+
+    cache.store(first)
+    cache.store(second)
+    assert cache.lookup(first.uuid) is first
+    cache.store(third)
+
+    assert cache.lookup(second.uuid) is None
+    assert cache.lookup(first.uuid) is first
+    assert cache.lookup(third.uuid) is third
+
+
+def test_orm_changes_invalidate_principal(database, admin):
+    from services.database import db_session
+    from services.principal import principal_cache
+
+    principal_cache.invalidate()
+    assert principal_cache.get(admin.uuid).admin is True
+
+    admin.admin = False
+    db_session.commit()
+
+    assert principal_cache.lookup(admin.uuid) is None
+    assert principal_cache.get(admin.uuid).admin is False
+
+
+def test_users_version_bump_invalidates_principals(database, admin):
+    from models.user import User
+    from services.database import engine
+    from services.principal import principal_cache
+    from services.versioning import bump, publish
+
+    principal_cache.invalidate()
+    principal_cache.get(admin.uuid)
+
+    # Core statements skip the ORM events, the version bump is what reaches the cache
+    with engine.begin() as connection:
+        connection.execute(User.__table__.update().where(User.uuid == admin.uuid).values(admin=False))
+        changes = bump(connection, "users")
+    assert principal_cache.lookup(admin.uuid) is not None
+
+    publish(changes)
+
+    assert principal_cache.lookup(admin.uuid) is None
+    assert principal_cache.get(admin.uuid).admin is False
+
+
+def test_other_version_bumps_keep_principals(database, admin):
+    from services.database import engine
+    from services.principal import principal_cache
+    from services.versioning import bump, publish
+
+    principal_cache.invalidate()
+    loaded = principal_cache.get(admin.uuid)
+
+    with engine.begin() as connection:
+        publish(bump(connection, "products"))
+
+    assert principal_cache.lookup(admin.uuid) is loaded
@@ -0,0 +1,37 @@
+from sqlalchemy import text
+
+from test_importer import product, write_catalog
+
+
+def test_migration_converts_pickled_products(database, tmp_path):
+    from pickle import dumps
+
+    from models.product import Product
+    from services.database import db_session, engine
+    from services.importer import ProductImporter
+    from services.migrations import convert_pickled_columns
+
+    ProductImporter().run(write_catalog(tmp_path, [product("A")]))
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE products SET allergens = :allergens, extra = :extra"),
+                           {"allergens": dumps(["milk"]), "extra": dumps([{"label": "organic"}])})
+        convert_pickled_columns(connection)
+        types = connection.execute(text("SELECT typeof(allergens), typeof(ingredients), typeof(extra) "
+                                        "FROM products")).first()
+
+    assert tuple(types) == ("text", "text", "text")
+    db_session.expire_all()
+    converted = Product.query.one()
+    assert (converted.allergens, converted.ingredients, converted.extra) == (["milk"], [], [{"label": "organic"}])
+
+
+def test_products_without_allergens(database, tmp_path):
+    from models.product import Product
+    from services.importer import ProductImporter
+
+    ProductImporter().run(write_catalog(tmp_path, [
+        {**product("A"), "allergens": ["milk", "nuts"]}, {**product("B"), "allergens": ["gluten"]}, product("C")]))
+
+    assert sorted(item.name for item in Product.without_allergens(["milk"])) == ["B", "C"]
+    assert [item.name for item in Product.without_allergens(["gluten", "nuts"])] == ["C"]
+    assert Product.without_allergens([]).count() == 3
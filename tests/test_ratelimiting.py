@@ -0,0 +1,101 @@
+import pytest
+
+from os import path
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """
+    Replaces the rate limiting configuration.
+    """
+    import services.ratelimiting as ratelimiting
+    from services.config import Section
+
+    def configure(**values):
+        section = {"default": "100 per minute", "authorization": "5 per minute", "routes": {}, "blueprints": {}}
+        section.update(values)
+        monkeypatch.setattr(ratelimiting, "config", Section({"ratelimiting": section}))
+
+    return configure
+
+
+@pytest.fixture
+def storage(tmp_path):
+    from services.ratelimiting import SQLiteStorage
+
+    return SQLiteStorage(f"sqlite:///{tmp_path / 'limits.db'}")
+
+
+def test_storage_counts_hits(storage):
+    assert storage.incr("key", 60) == 1
+    assert storage.incr("key", 60, amount=2) == 3
+    assert storage.get("key") == 3
+    assert storage.get("other") == 0
+    assert storage.check()
+
+
+def test_storage_window_expires(storage, monkeypatch):
+    import services.ratelimiting as ratelimiting
+
+    now = ratelimiting.time()
+    storage.incr("key", 10)
+    storage.incr("key", 10)
+    assert storage.get_expiry("key") == pytest.approx(now + 10, abs=1)
+
+    monkeypatch.setattr(ratelimiting, "time", lambda: now + 11)
+    assert storage.get("key") == 0
+    assert storage.incr("key", 10) == 1
+
+
+def test_storage_clear_and_reset(storage):
+    storage.incr("first", 60)
+    storage.incr("second", 60)
+
+    storage.clear("first")
+    assert storage.get("first") == 0
+    assert storage.get("second") == 1
+
+    assert storage.reset() == 1
+    assert storage.get("second") == 0
+
+
+def test_storage_is_registered(tmp_path):
+    from limits.storage import storage_from_string
+    from services.ratelimiting import SQLiteStorage
+
+    assert isinstance(storage_from_string(f"sqlite:///{tmp_path / 'limits.db'}"), SQLiteStorage)
+
+
+def test_storage_uri_resolves_against_instance(app, limits, tmp_path):
+    from services.ratelimiting import storage_uri
+
+    limits(storage_uri="sqlite:///limits.db")
+    assert storage_uri(app) == f"sqlite:///{path.join(app.instance_path, 'limits.db')}"
+
+    limits(storage_uri=f"sqlite:///{tmp_path / 'limits.db'}")
+    assert storage_uri(app) == f"sqlite:///{tmp_path / 'limits.db'}"
+
+    limits(storage_uri=None)
+    assert storage_uri(app) == "memory://"
+
+
+def test_route_limits(limits):
+    from services.ratelimiting import route_limit
+
+    limits(routes={"order.post_order_add": "1 per second"}, blueprints={"product": "10 per minute"})
+
+    assert route_limit("order.post_order_add") == "1 per second"
+    assert route_limit("order.get_order_all") == "100 per minute"
+    assert route_limit("product.get_product_all") == "10 per minute"
+    assert route_limit("auth.post_login") == "5 per minute"
+
+
+def test_blueprint_limits(limits):
+    from services.ratelimiting import blueprint_limit
+
+    limits(blueprints={"auth": "1 per minute"})
+    assert blueprint_limit("auth") == "1 per minute"
+
+    limits(blueprints=None)
+    assert blueprint_limit("auth") == "5 per minute"
+    assert blueprint_limit("order") == "100 per minute"
@@ -0,0 +1,92 @@
+import pytest
+
+from json import loads
+
+BACKENDS = ["orjson", "json", "missing"]
+
+
+def use_backend(monkeypatch, backend, size=100):
+    from services import serialization
+    from services.config import Section
+
+    monkeypatch.setattr(serialization, "config", Section({"serialization": {
+        "backend": "json" if backend == "json" else "orjson", "row_cache_size": size}}))
+    if backend == "missing":
+        monkeypatch.setattr(serialization, "orjson", None)
+    serialization.Serializer._rows.clear()
+
+
+def import_products(tmp_path, *names):
+    from models.product import Product
+    from services.importer import ProductImporter
+    from test_importer import product, write_catalog
+
+    ProductImporter().run(write_catalog(tmp_path, [product(name) for name in names]))
+    return Product.query.order_by(Product.id).all()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_rows_are_cached_per_version(database, tmp_path, monkeypatch, backend):
+    from services.database import db_session
+    from services.serialization import Serializer
+
+    use_backend(monkeypatch, backend)
+    first, second = import_products(tmp_path, "A", "B")
+
+    body = Serializer.encode([first, second])
+    assert [row["name"] for row in loads(body)] == ["A", "B"]
+    assert len(Serializer._rows) == 2
+
+    cached = Serializer.serialize(first)
+    assert Serializer.encode([first, second]) == body
+    assert Serializer.serialize(first) is cached
+    assert len(Serializer._rows) == 2
+
+    first.price = 2.5
+    db_session.commit()
+
+    assert loads(Serializer.encode(first))["price"] == 2.5
+    assert Serializer.serialize(first) is not cached
+    assert len(Serializer._rows) == 3
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_row_cache_is_bounded(database, tmp_path, monkeypatch, backend):
+    from services.serialization import Serializer
+
+    use_backend(monkeypatch, backend, size=2)
+    first, second, third = import_products(tmp_path, "A", "B", "C")
+
+    Serializer.encode([first, second, third])
+
+    assert [key[1] for key in Serializer._rows] == [second.id, third.id]
+
+
+def test_backends_encode_the_same(database, tmp_path, monkeypatch):
+    from services.serialization import Serializer
+
+    products = import_products(tmp_path, "A", "B")
+    use_backend(monkeypatch, "orjson")
+    expected = Serializer.encode({"products": products, "count": 2})
+
+    for backend in ("json", "missing"):
+        with monkeypatch.context() as context:
+            use_backend(context, backend)
+            assert Serializer.encode({"products": products, "count": 2}) == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_provider_serves_cached_rows(app, database, tmp_path, monkeypatch, backend):
+    from services.serialization import Serializer
+
+    use_backend(monkeypatch, backend)
+    products = import_products(tmp_path, "A", "B")
+
+    with app.app_context():
+        assert app.json.use_orjson is (backend == "orjson")
+        first = app.json.response({"products": products})
+        second = app.json.response({"products": products})
+
+    assert first.get_data() == second.get_data()
+    assert [row["name"] for row in first.json["products"]] == ["A", "B"]
+    assert len(Serializer._rows) == 2
@@ -0,0 +1,70 @@
+import pytest
+
+import sys
+
+
+def use_server(monkeypatch, **values):
+    from flaskr import serve
+    from services.config import DEFAULTS, Section
+
+    monkeypatch.setattr(serve, "config", Section({"server": {**DEFAULTS["server"], **values}}))
+    return serve
+
+
+def test_worker_count(monkeypatch):
+    serve = use_server(monkeypatch, workers=3)
+    assert serve.worker_count() == 3
+
+    serve = use_server(monkeypatch, workers=0)
+    monkeypatch.setattr(serve, "cpu_count", lambda: 4)
+    assert serve.worker_count() == 9
+    monkeypatch.setattr(serve, "cpu_count", lambda: None)
+    assert serve.worker_count() == 3
+
+
+def test_forked_workers_drop_inherited_connections(app):
+    from flaskr.serve import post_fork, prepare
+    from services.database import engine
+
+    prepare(app)
+    with engine.connect():
+        pass
+    pool = engine.pool
+
+    post_fork(None, None)
+
+    assert engine.pool is not pool
+    assert engine.pool.checkedin() == 0
+
+
+def test_gunicorn_preloads_threaded_workers(app, monkeypatch):
+    pytest.importorskip("gunicorn")
+    from gunicorn.app.base import BaseApplication
+
+    serve = use_server(monkeypatch, host="127.0.0.1", port=9000, workers=2, threads=8, max_requests=50,
+                       max_requests_jitter=5, timeout=20, graceful_timeout=10)
+    started = {}
+    monkeypatch.setattr(BaseApplication, "run", lambda self: started.update(cfg=self.cfg, app=self.load()))
+
+    serve.serve_gunicorn(app)
+
+    cfg = started["cfg"]
+    assert started["app"] is app
+    assert (cfg.bind, cfg.workers, cfg.threads) == (["127.0.0.1:9000"], 2, 8)
+    assert (cfg.preload_app, cfg.worker_class_str) == (True, "gthread")
+    assert (cfg.max_requests, cfg.max_requests_jitter, cfg.timeout, cfg.graceful_timeout) == (50, 5, 20, 10)
+    assert cfg.post_fork is serve.post_fork
+
+
+def test_falls_back_to_waitress(app, monkeypatch):
+    from flaskr import serve
+
+    served = []
+    monkeypatch.setitem(sys.modules, "gunicorn.app.base", None)
+    monkeypatch.setattr(serve, "create_app", lambda: app)
+    monkeypatch.setattr(serve, "serve_waitress", served.append)
+    monkeypatch.setattr(serve, "serve_gunicorn", lambda application: pytest.fail("gunicorn is unavailable"))
+
+    serve.main()
+
+    assert served == [app]
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+
+def token(app, user, expires=None):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        return create_access_token(identity=user.uuid, expires_delta=expires or timedelta(minutes=5),
+                                   additional_claims={"username": user.username, "admin": user.admin})
+
+
+def test_token_in_query_string_is_rejected(client, app, admin):
+    response = client.get(f"/events/stream?jwt={token(app, admin)}")
+
+    assert response.status_code == 401
+
+
+def test_ticket_opens_stream(client, admin, headers):
+    ticket = client.post("/events/ticket", headers=headers(admin)).get_json()["result"]["ticket"]
+
+    response = client.get(f"/events/stream?ticket={ticket}", buffered=False)
+    chunks = iter(response.response)
+
+    assert response.status_code == 200
+    assert next(chunks).startswith(b"retry:")
+    assert next(chunks).startswith(b"event: snapshot")
+    response.close()
+
+    assert client.get(f"/events/stream?ticket={ticket}x").status_code == 401
+    # Tickets open a single stream
+    assert client.get(f"/events/stream?ticket={ticket}").status_code == 401
+
+
+def test_stream_ends_when_token_expires(client, app, admin):
+    headers = {"Authorization": f"Bearer {token(app, admin, timedelta(seconds=1))}"}
+
+    response = client.get("/events/stream", headers=headers, buffered=False)
+    chunks = list(response.response)
+
+    assert chunks[1].startswith(b"event: snapshot")
+    assert chunks[-1].startswith(b"event: expired")
+
+
+def test_streams_leave_threads_for_requests(client, admin, headers):
+    from services.config import Config
+
+    config = Config().get_config()
+    capacity = config.server.threads - config.stream.reserved_threads
+    responses = [client.get("/events/stream", headers=headers(admin), buffered=False) for _ in range(capacity)]
+
+    rejected = client.get("/events/stream", headers=headers(admin))
+    assert [response.status_code for response in responses] == [200] * capacity
+    assert rejected.status_code == 503
+
+    # Streams keep their request context until closed, the test client requires closing them in reverse
+    for response in reversed(responses):
+        response.close()
+    response = client.get("/events/stream", headers=headers(admin), buffered=False)
+    assert response.status_code == 200
+    response.close()
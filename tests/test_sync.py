@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+
+def sync(client, headers, since):
+    return client.get(f"/sync?since={since}", headers=headers)
+
+
+def test_sync_changes(client, admin, headers):
+    from models.product import Product
+    from services.database import db_session
+    from services.generator import DataGenerator
+
+    DataGenerator(seed=1).run(users=3, products=3, events=1, participation=1.0)
+    body = sync(client, headers(admin), 0).get_json()["result"]
+
+    assert len(body["changes"]["products"]["changed"]) == 3
+    # Only the orders of the requesting user are synchronized
+    assert {order["user"] for order in body["changes"]["orders"]["changed"]} == {admin.uuid}
+
+    removed = Product.query.first()
+    db_session.delete(removed)
+    db_session.commit()
+
+    following = sync(client, headers(admin), body["next"]).get_json()["result"]
+    assert following["changes"]["products"] == {"changed": [], "deleted": [removed.uuid]}
+    assert sync(client, headers(admin), following["next"]).get_json()["result"]["changes"]["products"] == \
+        {"changed": [], "deleted": []}
+
+
+def test_sync_gone(client, admin, headers):
+    from services.changes import ChangeLog
+    from services.database import db_session, engine
+    from services.generator import DataGenerator
+
+    DataGenerator(seed=1).run(products=3)
+    latest = ChangeLog.latest(db_session)
+
+    # Sequence numbers the log never reached
+    response = sync(client, headers(admin), latest + 1)
+    assert response.status_code == 410
+    assert response.get_json()["details"]["next"] == latest
+
+    # Sequence numbers pruned from the log
+    with engine.begin() as connection:
+        assert ChangeLog.prune(connection, datetime.utcnow() + timedelta(days=1)) == latest - 1
+
+    response = sync(client, headers(admin), 0)
+    assert response.status_code == 410
+    assert response.get_json()["details"]["next"] == latest
+
+    # Synchronizing resumes from the sequence returned with the 410
+    response = sync(client, headers(admin), latest)
+    assert response.status_code == 200
+    assert response.get_json()["result"]["next"] == latest
+    assert sync(client, headers(admin), latest - 1).status_code == 200
+
+
+def test_sync_invalid_since(client, admin, headers):
+    assert sync(client, headers(admin), "abc").status_code == 400
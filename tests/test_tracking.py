@@ -0,0 +1,80 @@
+from conftest import DIRECTORY, ROOT
+
+
+def last_actions():
+    from models.user import User
+    from services.database import db_session
+
+    db_session.expire_all()
+    return {user.username: (user.last_action, user.last_action_ip) for user in User.query}
+
+
+def test_coalesces_and_flushes_in_one_update(database, admin):
+    from sqlalchemy import event
+
+    from models.user import User
+    from services.database import engine
+    from services.generator import DataGenerator
+    from services.tracking import activity_tracker
+
+    DataGenerator(seed=1).run(users=2)
+    users = User.query.all()
+    activity_tracker.flush()
+
+    for user in users:
+        activity_tracker.track(user.uuid, "first", "10.0.0.1")
+    activity_tracker.track(admin.uuid, "latest", "10.0.0.2")
+
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, executemany))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert activity_tracker.flush() == len(users)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert [executemany for statement, executemany in statements if statement.startswith("UPDATE users")] == [True]
+    actions = last_actions()
+    assert actions["admin"] == ("latest", "10.0.0.2")
+    assert {value for name, value in actions.items() if name != "admin"} == {("first", "10.0.0.1")}
+
+
+def test_full_buffer_is_flushed_in_background(database, admin, monkeypatch):
+    import services.tracking as tracking
+    from services.config import Section
+    from services.tracking import activity_tracker
+
+    from threading import Event, current_thread
+
+    activity_tracker.flush()
+    monkeypatch.setattr(tracking, "config", Section({"tracking": {"flush_interval": 3600, "flush_size": 1}}))
+    flushed, threads = Event(), []
+    original = activity_tracker.flush
+
+    def flush():
+        threads.append(current_thread().name)
+        result = original()
+        flushed.set()
+        return result
+
+    monkeypatch.setattr(activity_tracker, "flush", flush)
+    activity_tracker.track(admin.uuid, "background", "10.0.0.3")
+
+    assert flushed.wait(5)
+    assert threads == ["activity-tracker"]
+    assert last_actions()["admin"] == ("background", "10.0.0.3")
+
+
+def test_flushes_on_exit(database, admin):
+    from subprocess import run
+    from sys import executable
+
+    script = (f"import sys; sys.path.insert(0, {ROOT!r})\n"
+              "from services.tracking import activity_tracker\n"
+              f"activity_tracker.track({admin.uuid!r}, 'exiting', '10.0.0.4')\n")
+    run([executable, "-c", script], cwd=DIRECTORY, check=True, timeout=60)
+
+    assert last_actions()["admin"] == ("exiting", "10.0.0.4")
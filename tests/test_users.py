@@ -0,0 +1,74 @@
+import pytest
+
+from json import loads
+
+PUBLIC = {"uuid", "name", "username", "country", "admin", "tags", "active"}
+
+
+@pytest.fixture
+def statements():
+    from sqlalchemy import event
+
+    from services.database import engine
+
+    result = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        result.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield result
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def user_selects(statements):
+    return [statement for statement in statements if statement.startswith("SELECT") and "FROM users" in statement]
+
+
+def test_user_by_uuid_loads_public_columns(client, admin, headers, statements):
+    response = client.get(f"/user/{admin.uuid}", headers=headers(admin))
+
+    assert response.status_code == 200
+    assert response.get_json()["result"] == {"uuid": admin.uuid, "name": admin.name, "username": "admin",
+                                             "country": admin.country, "admin": True, "tags": admin.tags,
+                                             "active": admin.active}
+    assert user_selects(statements)
+    for statement in user_selects(statements):
+        assert "users.password" not in statement and "users.secret" not in statement
+        assert "users.token" not in statement
+
+
+def test_user_by_uuid_errors(client, admin, headers):
+    assert client.get("/user/not-a-uuid", headers=headers(admin)).status_code == 400
+    assert client.get("/user/00000000-0000-0000-0000-000000000000", headers=headers(admin)).status_code == 404
+
+
+@pytest.mark.parametrize("query", ["", "?limit=2", "?format=ndjson"])
+def test_user_listings_are_public(client, admin, headers, statements, query):
+    from services.generator import DataGenerator
+
+    DataGenerator(seed=1).run(users=3)
+    statements.clear()
+
+    response = client.get(f"/user/all{query}", headers=headers(admin))
+
+    if query == "?format=ndjson":
+        rows = [loads(line) for line in response.data.decode("UTF-8").splitlines()]
+    else:
+        rows = response.get_json()["result"]
+    assert len(rows) == (2 if query == "?limit=2" else 4)
+    assert all(set(row) == PUBLIC for row in rows)
+    for statement in user_selects(statements):
+        assert "users.password" not in statement and "users.secret" not in statement
+
+
+def test_user_listing_of_empty_table(client, admin, headers):
+    from services.database import engine
+    from services.principal import principal_cache
+
+    # The cached principal keeps the request authorized after the users are gone
+    principal_cache.get(admin.uuid)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM users")
+
+    assert client.get("/user/all", headers=headers(admin)).status_code == 404
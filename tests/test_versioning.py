@@ -0,0 +1,77 @@
+from test_importer import product as catalog_product
+
+
+def versions():
+    from models.data import Data
+    from services.database import db_session
+
+    db_session.expire_all()
+    data = Data.query.first()
+    return {table: getattr(data, f"{table}_version") for table in ("products", "events", "orders", "users")}
+
+
+def add_product(name):
+    from models.product import Product
+    from services.database import db_session
+
+    product = Product(**catalog_product(name))
+    db_session.add(product)
+    db_session.commit()
+    return product
+
+
+def test_commit_bumps_version_and_invalidates(database):
+    from services.cache import data_snapshot, product_cache
+
+    before = versions()
+    assert product_cache.all() == []
+
+    product = add_product("First")
+
+    assert versions() == {**before, "products": before["products"] + 1}
+    # Applied in process, without waiting for revalidation
+    assert data_snapshot.fresh()["products_version"] == before["products"] + 1
+    assert [item["uuid"] for item in product_cache.all()] == [product.uuid]
+
+
+def test_rollback_and_untracked_changes_keep_version(database, admin):
+    from models.product import Product
+    from models.user import User
+    from services.database import db_session
+
+    before = versions()
+
+    db_session.add(Product(**catalog_product("Rolled back")))
+    db_session.flush()
+    db_session.rollback()
+
+    user = User.query.filter_by(uuid=admin.uuid).first()
+    user.last_action = "test"
+    db_session.commit()
+
+    assert versions() == before
+
+
+def test_changes_of_other_processes(database, monkeypatch):
+    import services.cache as cache
+    from models.product import Product
+    from services.cache import data_snapshot, product_cache
+    from services.database import engine
+    from services.versioning import bump
+
+    add_product("First")
+    known = data_snapshot.get()["products_version"]
+    assert [item["name"] for item in product_cache.all()] == ["First"]
+
+    # Another process bumps the version, this one doesn't publish it
+    with engine.begin() as connection:
+        connection.execute(Product.__table__.insert(), {**catalog_product("Other"), "uuid": "other"})
+        bump(connection, "products")
+
+    # Served from the cache until then
+    assert [item["name"] for item in product_cache.all()] == ["First"]
+
+    # Picked up once the snapshot is revalidated
+    monkeypatch.setattr(cache, "monotonic", lambda: data_snapshot._loaded_at + cache.config.cache.revalidate_interval)
+    assert data_snapshot.get()["products_version"] == known + 1
+    assert [item["name"] for item in product_cache.all()] == ["First", "Other"]
@@ -0,0 +1,46 @@
+def test_view_selects_key_without_mapping_it(database, admin):
+    from models.user import User
+    from services.views import View
+
+    view = View(User, ("username",))
+    row = view.query().filter(User.uuid == admin.uuid).first()
+
+    assert row[0] == admin.id
+    assert view.map(row) == {"username": "admin"}
+    assert view.first(view.query().filter(User.uuid == "missing")) is None
+    assert view.all() == [{"username": "admin"}]
+
+
+def test_order_view_matches_serialized_order(database, admin):
+    from models.order import Order
+    from services.database import db_session
+    from services.serialization import Serializer
+    from services.views import order_view
+
+    order = Order(user=admin.uuid, event="event", total_price=2.5, products=["apple"], notes="Quickly")
+    db_session.add(order)
+    db_session.commit()
+
+    projected = order_view.first(order_view.query().filter(Order.uuid == order.uuid))
+
+    assert projected == Serializer.extractor(Order)(order)
+
+
+def test_order_endpoints_serve_projections(client, admin, headers):
+    from models.order import Order
+    from services.database import db_session
+    from services.events import active_event
+
+    event = active_event.get()
+    order = Order(user=admin.uuid, event=event.uuid, total_price=1.0, products=["apple"], notes="Quickly")
+    db_session.add(order)
+    db_session.commit()
+
+    current = client.get("/order/current", headers=headers(admin)).get_json()["result"]
+    by_uuid = client.get(f"/order/{order.uuid}", headers=headers(admin)).get_json()["result"]
+    by_event = client.get(f"/order/event/{event.uuid}", headers=headers(admin)).get_json()["result"]
+    listed = client.get("/order/all", headers=headers(admin)).get_json()["result"]
+
+    assert current == {"uuid": order.uuid, "products": ["apple"], "notes": "Quickly"}
+    assert by_uuid["uuid"] == by_event["uuid"] == order.uuid
+    assert listed == [by_uuid]